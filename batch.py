@@ -0,0 +1,129 @@
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# batch.py
+# Non-interactive batch mode: reads a JSONL file where each line is either
+#   {"id": "house", "prompt": "draw a house"}          -> shapes come from the model
+#   {"id": "boxes", "shapes": [{"shape": ...}, ...]}  -> shapes are drawn as given
+# Model calls run concurrently on a bounded worker pool; drawing happens on a
+# single ordered queue (input order), either in MS Paint, through a running
+# drawing daemon (ms_paint/daemon.py), or offscreen to PNGs.
+# One JSON line per item, with timings and any error, goes to the report.
+
+
+def read_items(path):
+    items = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as e:
+                item = {"error": f"invalid JSON on line {line_no}: {e}"}
+            if not isinstance(item, dict):
+                item = {"error": f"line {line_no} is not a JSON object"}
+            item.setdefault("id", str(line_no))
+            items.append(item)
+    return items
+
+
+def _safe_name(item_id):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", str(item_id)) or "item"
+
+
+def _resolve_shapes(item, generate):
+    """Runs on the worker pool: returns (shapes, seconds spent generating)."""
+    if "error" in item:
+        raise ValueError(item["error"])
+    if "shapes" in item:
+        shapes = item["shapes"]
+        elapsed = 0.0
+    elif item.get("prompt"):
+        started = time.perf_counter()
+        shapes = generate(item["prompt"])
+        elapsed = time.perf_counter() - started
+    else:
+        raise ValueError("item has neither 'prompt' nor 'shapes'")
+    if not isinstance(shapes, list):
+        raise ValueError(f"expected a list of shapes, got {type(shapes).__name__}")
+    return shapes, elapsed
+
+
+def _draw(item, shapes, backend_name, output_dir):
+    """Runs on the caller's thread, one item at a time, in input order."""
+    from ms_paint.draw_shapes import draw_shapes
+
+    if backend_name == "raster":
+        from ms_paint.raster import RasterBackend
+        backend = RasterBackend()
+        if not draw_shapes(shapes, backend=backend):
+            raise RuntimeError("drawing failed")
+        output = os.path.join(output_dir, f"{_safe_name(item['id'])}.png")
+        backend.save(output)
+        return output
+    if backend_name == "daemon":
+        from ms_paint.daemon import DaemonClient
+        if not DaemonClient().draw(shapes, label=str(item["id"])):
+            raise RuntimeError("drawing failed")
+        return None
+    if not draw_shapes(shapes):
+        raise RuntimeError("drawing failed")
+    return None
+
+
+def run_batch(input_path, report_path, backend="raster", workers=4, output_dir="batch_output", generate=None):
+    """Process every item in `input_path`; returns the list of report rows.
+
+    - backend: "raster" (PNG per item in output_dir), "paint" (live MS Paint)
+      or "daemon" (jobs for the drawing daemon at $PAINT_DAEMON / localhost:8765)
+    - workers: concurrent model calls; at most 2 * workers results are buffered
+    - generate: prompt -> shapes function (models.gemini.generate by default)
+    """
+    if generate is None:
+        from models.gemini import generate
+    if backend == "raster":
+        os.makedirs(output_dir, exist_ok=True)
+
+    items = read_items(input_path)
+    rows = []
+    window = max(2 * workers, 1)
+    batch_started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool, open(report_path, "w", encoding="utf-8") as report:
+        pending = []
+        next_index = 0
+        for index, item in enumerate(items):
+            # Keep a bounded number of model calls queued ahead of the drawer.
+            while next_index < len(items) and next_index < index + window:
+                pending.append(pool.submit(_resolve_shapes, items[next_index], generate))
+                next_index += 1
+            future = pending.pop(0)
+
+            row = {"id": item["id"], "prompt": item.get("prompt"), "status": "ok"}
+            try:
+                shapes, gen_seconds = future.result()
+                row["shape_count"] = len(shapes)
+                row["generate_s"] = round(gen_seconds, 3)
+                started = time.perf_counter()
+                output = _draw(item, shapes, backend, output_dir)
+                row["draw_s"] = round(time.perf_counter() - started, 3)
+                if output:
+                    row["output"] = output
+            except Exception as e:
+                row["status"] = "error"
+                row["error"] = f"{type(e).__name__}: {e}"
+
+            rows.append(row)
+            report.write(json.dumps(row) + "\n")
+            report.flush()
+            print(f"[{index + 1}/{len(items)}] {row['id']}: {row['status']}")
+
+    failed = sum(1 for row in rows if row["status"] != "ok")
+    print(f"Batch finished: {len(rows) - failed} ok, {failed} failed "
+          f"in {time.perf_counter() - batch_started:.1f}s. Report: {report_path}")
+    return rows
@@ -0,0 +1,115 @@
+"""Benchmark automated calibration against a stored screenshot.
+
+Run from the project root:
+    python -m benchmarks.bench_calibration [--screenshot path] [--repeat N]
+
+Without --screenshot it uses benchmarks/fixtures/paint_screen.png, building it
+first (Tool_PNG templates pasted at the positions in paint_calibration.json)
+if it does not exist yet. Compares the old per-template pyscreeze search with
+the single-screenshot OpenCV search in ms_paint.locate.
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+from PIL import Image
+
+from ms_paint.locate import locate_from_store, locate_templates, tool_template_paths
+from ms_paint.templates import TemplateStore
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "paint_screen.png")
+TOOLS = ["pencil", "brush", "fill", "line", "rectangle", "triangle", "circle", "diamond", "right_triangle", "polygon"]
+
+
+def _templates():
+    templates = tool_template_paths(TOOLS)
+    templates["top_left"] = "./Tool_PNG/Top_left.png"
+    templates["bottom_right"] = "./Tool_PNG/Bottom_right.png"
+    return templates
+
+
+def _expected_positions():
+    with open("paint_calibration.json", "r") as f:
+        calib = json.load(f)
+    expected = {name: tuple(pos) for name, pos in calib["tools"].items()}
+    expected["top_left"] = tuple(calib["canvas"]["top_left"])
+    expected["bottom_right"] = tuple(calib["canvas"]["bottom_right"])
+    return expected
+
+
+def build_fixture(path=FIXTURE, size=(1920, 1080)):
+    """Compose a synthetic Paint screenshot from the Tool_PNG templates."""
+    screen = Image.new("RGB", size, (204, 214, 230))
+    screen.paste((243, 243, 243), (0, 0, size[0], 200))  # ribbon
+    expected = _expected_positions()
+    tl, br = expected["top_left"], expected["bottom_right"]
+    screen.paste((255, 255, 255), (tl[0], tl[1], br[0], br[1]))  # canvas
+    for name, template_path in _templates().items():
+        template = Image.open(template_path).convert("RGBA")
+        x, y = expected[name]
+        screen.paste(template, (x - template.width // 2, y - template.height // 2), template)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    screen.save(path)
+    return path
+
+
+def _pyscreeze_search(screen, templates):
+    import pyscreeze
+    found = {}
+    for name, template_path in templates.items():
+        box = pyscreeze.locate(template_path, screen, confidence=0.85)
+        found[name] = pyscreeze.center(box) if box else None
+    return found
+
+
+def _time(fn, repeat):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--screenshot", default=None)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    path = args.screenshot
+    if path is None:
+        path = FIXTURE if os.path.exists(FIXTURE) else build_fixture()
+    screen = Image.open(path).convert("RGB")
+    templates = _templates()
+
+    fast, found = _time(lambda: locate_templates(templates, screen=screen), args.repeat)
+    print(f"locate_templates: {fast * 1000:.1f} ms for {len(templates)} templates")
+    missing = [name for name, pos in found.items() if pos is None]
+    if missing:
+        print(f"  not found: {', '.join(missing)}")
+
+    if args.screenshot is None:
+        expected = _expected_positions()
+        off = {n: p for n, p in found.items() if p and max(abs(p[0] - expected[n][0]), abs(p[1] - expected[n][1])) > 2}
+        print(f"  {len(templates) - len(missing) - len(off)}/{len(templates)} within 2px of the fixture positions")
+
+    started = time.perf_counter()
+    store = TemplateStore()
+    print(f"TemplateStore load: {(time.perf_counter() - started) * 1000:.1f} ms")
+    cached, _ = _time(lambda: locate_from_store(list(templates), screen=screen, store=store), args.repeat)
+    print(f"locate_from_store (templates in memory, scale {store.scale}): {cached * 1000:.1f} ms")
+
+    try:
+        slow, _ = _time(lambda: _pyscreeze_search(screen, templates), max(1, args.repeat // 2))
+    except ImportError:
+        print("pyscreeze not installed; skipping the baseline")
+        return
+    print(f"pyscreeze per-template search: {slow * 1000:.1f} ms (x{slow / fast:.1f} slower)")
+
+
+if __name__ == "__main__":
+    main()
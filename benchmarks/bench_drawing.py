@@ -0,0 +1,158 @@
+"""Drawing pipeline benchmark on the recording fake driver (no display needed).
+
+Run from the project root:
+    python -m benchmarks.bench_drawing [--sizes 10 100 1000 10000] [--modes fixed paced]
+    python -m benchmarks.bench_drawing --check      # fail on regressions vs the baseline
+    python -m benchmarks.bench_drawing --update     # rewrite the baseline
+
+Draws the mspaintdrawer_v2 test scene and seeded synthetic scenes through
+draw_shapes with driver.FakeDriver installed, so every click, move and sleep
+is recorded against a virtual clock. Reports, per scene and pacing mode:
+simulated scene time, input events per shape, sleep time per shape, tool
+clicks, and the real wall time spent in Python. The simulated numbers are
+deterministic, so --check compares them exactly (within --tolerance).
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from ms_paint.calibration import Calibration
+from ms_paint.draw_shapes import PaintBackend, draw_shapes
+from ms_paint.driver import FakeDriver, set_driver
+from ms_paint.mspaintdrawer_v2 import TEST_SHAPES
+from ms_paint.pacing import Pacer
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "drawing.json")
+
+# Fixed copy of the repository's paint_calibration.json, so results do not
+# depend on the local calibration.
+CALIBRATION = {
+    "tools": {
+        "pencil": [326, 112], "brush": [503, 126], "fill": [376, 109],
+        "line": [573, 103], "rectangle": [657, 103], "triangle": [743, 106],
+        "circle": [630, 104], "diamond": [603, 133], "right_triangle": [573, 135],
+        "polygon": [715, 105],
+    },
+    "canvas": {"top_left": [437, 286], "bottom_right": [1483, 893]},
+}
+
+SHAPE_TYPES = ["line", "rectangle", "triangle", "circle", "diamond", "right_triangle", "polygon"]
+PYAUTOGUI_PAUSE = 0.1   # pyautogui's default pause after every input call
+PAINT_LAG = 0.03        # simulated repaint latency for the paced mode
+_TOOL_POINTS = {tuple(pos) for pos in CALIBRATION["tools"].values()}
+CHECKED = ("scene_s", "events_per_shape", "sleep_per_shape", "tool_clicks")
+
+
+def synthetic_scene(count, seed=0):
+    """`count` random shapes of every type, inside the 0-1000 x 0-500 model space."""
+    rng = np.random.default_rng(seed)
+    starts = rng.uniform((0, 0), (900, 450), size=(count, 2))
+    sizes = rng.uniform(10, 100, size=(count, 2))
+    kinds = rng.integers(0, len(SHAPE_TYPES), size=count)
+    return [
+        {"shape": SHAPE_TYPES[k], "start_x": round(float(sx), 1), "start_y": round(float(sy), 1),
+         "end_x": round(float(sx + w), 1), "end_y": round(float(sy + h), 1)}
+        for k, (sx, sy), (w, h) in zip(kinds, starts, sizes)
+    ]
+
+
+def run_scene(shapes, mode):
+    """Draw `shapes` on a fresh FakeDriver and return the measurements."""
+    driver = FakeDriver(pause=PYAUTOGUI_PAUSE, lag=PAINT_LAG)
+    pacer = Pacer(driver=driver, path=None) if mode == "paced" else None
+    backend = PaintBackend(pacer=pacer, driver=driver)
+    previous = set_driver(driver)
+    try:
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            ok = draw_shapes(shapes, backend=backend, calibration=Calibration.from_data(CALIBRATION))
+        wall = time.perf_counter() - started
+    finally:
+        set_driver(previous)
+    if not ok:
+        raise RuntimeError("draw_shapes reported a failure")
+
+    n = len(shapes)
+    tool_clicks = sum(1 for event in driver.events
+                      if event[1] == "click" and tuple(event[2:4]) in _TOOL_POINTS)
+    return {
+        "shapes": n,
+        "scene_s": round(driver.clock, 4),
+        "per_shape_s": round(driver.clock / n, 4),
+        "events_per_shape": round(driver.count() / n, 3),
+        "sleep_per_shape": round(driver.slept / n, 4),
+        "tool_clicks": tool_clicks,
+        "wall_ms": round(wall * 1000, 1),
+        "overhead_us_per_shape": round(wall / n * 1e6, 1),
+    }
+
+
+def scenes(sizes):
+    yield "test_scene", TEST_SHAPES
+    for size in sizes:
+        yield f"synthetic_{size}", synthetic_scene(size)
+
+
+def compare(results, baseline, tolerance):
+    """List of human-readable regressions (values above baseline * (1 + tolerance))."""
+    problems = []
+    for key, row in results.items():
+        expected = baseline.get(key)
+        if expected is None:
+            continue
+        for metric in CHECKED:
+            if metric in expected and row[metric] > expected[metric] * (1 + tolerance) + 1e-9:
+                problems.append(f"{key}: {metric} {row[metric]} > baseline {expected[metric]}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--modes", nargs="+", choices=["fixed", "paced"], default=["fixed", "paced"])
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--check", action="store_true", help="exit 1 if any simulated metric regressed")
+    parser.add_argument("--update", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.01)
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'scene':<18} {'mode':<6} {'shapes':>6} {'scene s':>10} {'s/shape':>8} "
+          f"{'events/shape':>12} {'sleep/shape':>11} {'tool clicks':>11} {'wall ms':>9}")
+    for name, shapes in scenes(args.sizes):
+        for mode in args.modes:
+            row = run_scene(shapes, mode)
+            results[f"{name}/{mode}"] = row
+            print(f"{name:<18} {mode:<6} {row['shapes']:>6} {row['scene_s']:>10.2f} {row['per_shape_s']:>8.3f} "
+                  f"{row['events_per_shape']:>12.2f} {row['sleep_per_shape']:>11.3f} "
+                  f"{row['tool_clicks']:>11} {row['wall_ms']:>9.1f}")
+
+    if args.update:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({key: {m: row[m] for m in CHECKED} for key, row in results.items()}, f, indent=2)
+            f.write("\n")
+        print(f"\nBaseline written to {args.baseline}")
+
+    if args.check:
+        try:
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            print(f"\nNo baseline at {args.baseline}; run with --update first.")
+            sys.exit(1)
+        problems = compare(results, baseline, args.tolerance)
+        if problems:
+            print("\nRegressions:\n  " + "\n  ".join(problems))
+            sys.exit(1)
+        print("\nNo regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Tiled export benchmark: wall time and peak memory per worker count.
+
+Run from the project root:
+    python -m benchmarks.bench_export [--size 20000 20000] [--shapes 10000] [--workers 1 2 4]
+
+Exports a seeded synthetic scene (see bench_drawing) with ms_paint.export at
+the given size, once per worker count, each run in a fresh process so peak
+RSS is measured per run. Reports wall time, tiles per second, and the peak
+resident memory of the parent and of the largest worker. The whole image
+would need width * height * 3 bytes in memory; the tiled path should stay
+far below that at any size.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.bench_drawing import synthetic_scene
+
+_RUN = """
+import json, sys
+from ms_paint.export import export_scene
+try:
+    import resource
+except ImportError:  # Windows: no getrusage, peak memory is not reported
+    resource = None
+shapes = json.load(open(sys.argv[1]))
+width, height, tile, workers = map(int, sys.argv[3:7])
+result = export_scene(shapes, sys.argv[2], width, height, tile=tile, workers=workers, fmt=sys.argv[7])
+print(json.dumps({
+    "seconds": result.seconds, "tiles": result.tiles,
+    "parent_mb": resource and resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "worker_mb": resource and resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+}))
+"""
+
+
+def run_export(shapes_path, output, width, height, tile, workers, fmt):
+    proc = subprocess.run(
+        [sys.executable, "-c", _RUN, shapes_path, output, str(width), str(height), str(tile), str(workers), fmt],
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, nargs=2, default=[20000, 20000], metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--shapes", type=int, default=10000)
+    parser.add_argument("--tile", type=int, default=2048)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--format", choices=["raw", "png"], default="raw")
+    parser.add_argument("--keep", metavar="DIR", help="keep the exported files in DIR")
+    args = parser.parse_args()
+
+    width, height = args.size
+    full_mb = width * height * 3 / 2**20
+    print(f"{width}x{height} canvas ({full_mb:.0f} MB as one RGB array), {args.shapes} shapes, "
+          f"{args.tile}px tiles, {os.cpu_count()} cores")
+    print(f"{'workers':>7} {'tiles':>6} {'wall s':>8} {'tiles/s':>8} {'parent MB':>10} {'worker MB':>10}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        shapes_path = os.path.join(tmp, "shapes.json")
+        with open(shapes_path, "w", encoding="utf-8") as f:
+            json.dump(synthetic_scene(args.shapes), f)
+        out_dir = args.keep or tmp
+        for workers in args.workers:
+            output = os.path.join(out_dir, f"export_{workers}.{args.format}")
+            row = run_export(shapes_path, output, width, height, args.tile, workers, args.format)
+            memory = " ".join("n/a".rjust(10) if row[key] is None else f"{row[key]:>10.0f}"
+                              for key in ("parent_mb", "worker_mb"))
+            print(f"{workers:>7} {row['tiles']:>6} {row['seconds']:>8.2f} {row['tiles'] / row['seconds']:>8.1f} {memory}")
+            if not args.keep:
+                os.remove(output)
+
+
+if __name__ == "__main__":
+    main()
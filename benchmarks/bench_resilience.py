@@ -0,0 +1,79 @@
+"""Model call resilience benchmark: tail latency and failures with and without
+retries and hedging.
+
+Run from the project root:
+    python -m benchmarks.bench_resilience [--calls 200] [--slow-rate 0.05] [--failure-rate 0.1]
+
+Calls generate() against models.fakes.FaultyClient, which answers after
+--latency seconds, after --slow-latency seconds for a --slow-rate share of
+calls (a heavy tail), and fails with a 503 for a --failure-rate share. Each
+request-layer configuration gets a fresh ResilientCaller and the same seeded
+client. Reports the share of calls that returned shapes, latency percentiles,
+and how many upstream requests were made per call.
+"""
+import argparse
+import contextlib
+import io
+import json
+import time
+
+import numpy as np
+
+from models import gemini
+from models.fakes import FaultyClient
+from models.resilience import ResilientCaller
+from ms_paint.mspaintdrawer_v2 import TEST_SHAPES
+
+CONFIGS = {
+    "single": dict(attempts=1, hedge=False),
+    "retry": dict(hedge=False),
+    "retry+hedge": dict(),
+}
+
+
+def run_config(name, args):
+    client = FaultyClient(json.dumps(TEST_SHAPES), latency=args.latency, slow_latency=args.slow_latency,
+                          slow_rate=args.slow_rate, failure_rate=args.failure_rate, seed=args.seed)
+    previous = gemini.model_caller
+    gemini.model_caller = ResilientCaller(backoff=args.latency, seed=args.seed, **CONFIGS[name])
+    times, ok = [], 0
+    try:
+        for i in range(args.calls):
+            started = time.perf_counter()
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    gemini.generate(f"scene {i}", use_cache=False, model_client=client, timeout=args.deadline)
+                ok += 1
+            except Exception:
+                pass
+            times.append(time.perf_counter() - started)
+        stats = gemini.model_call_stats()
+    finally:
+        gemini.model_caller = previous
+    p50, p95, p99 = np.percentile(times, [50, 95, 99])
+    return {"ok": ok / args.calls, "p50": p50, "p95": p95, "p99": p99,
+            "requests": client.calls / args.calls, "hedges": stats["hedges"], "retries": stats["retries"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.02, help="usual call latency, seconds")
+    parser.add_argument("--slow-latency", type=float, default=0.5, help="latency of the slow tail, seconds")
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--failure-rate", type=float, default=0.1)
+    parser.add_argument("--deadline", type=float, default=5.0, help="per-call deadline, seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{args.calls} calls: {args.latency * 1000:.0f} ms usual, {args.slow_latency * 1000:.0f} ms for "
+          f"{args.slow_rate:.0%}, {args.failure_rate:.0%} failing")
+    print(f"{'config':<12} {'ok':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/call':>9} {'retries':>8} {'hedges':>7}")
+    for name in CONFIGS:
+        row = run_config(name, args)
+        print(f"{name:<12} {row['ok']:>6.1%} {row['p50'] * 1000:>8.1f} {row['p95'] * 1000:>8.1f} "
+              f"{row['p99'] * 1000:>8.1f} {row['requests']:>9.2f} {row['retries']:>8} {row['hedges']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Startup benchmark: import cost and time-to-first-prompt for main.py.
+
+Run from the project root:
+    python -m benchmarks.bench_startup [--runs N] [--top N]
+
+Prints the slowest imports (cumulative, from `python -X importtime`) and the
+median time from launching `python main.py` until its first input prompt.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+FIRST_PROMPT = b"Enter your choice"
+
+
+def import_report(module="main", top=15):
+    """Parse `python -X importtime -c "import <module>"` into (total_us, rows)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        env=dict(os.environ, PYTHONDONTWRITEBYTECODE="1"),
+    )
+    rows = []
+    for line in proc.stderr.decode(errors="replace").splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # header line
+        # Nesting is shown by two extra spaces per level after the separator.
+        rows.append((int(cumulative), int(self_us), name[1:].rstrip()))
+    # Top-level imports (no leading indent) add up to the whole import cost.
+    total = sum(cum for cum, _, name in rows if not name.startswith(" "))
+    rows.sort(reverse=True)
+    return total, rows[:top], proc.returncode
+
+
+def time_to_first_prompt(timeout=60):
+    """Seconds from launching main.py until it asks for the first input."""
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-u", "main.py"],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+    )
+    seen = b""
+    try:
+        while FIRST_PROMPT not in seen:
+            chunk = proc.stdout.read1(4096) if hasattr(proc.stdout, "read1") else proc.stdout.read(1)
+            if not chunk:
+                raise RuntimeError(f"main.py exited before prompting:\n{seen.decode(errors='replace')}")
+            seen += chunk
+            if time.perf_counter() - started > timeout:
+                raise TimeoutError("main.py did not prompt in time")
+        return time.perf_counter() - started
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    total, rows, code = import_report(top=args.top)
+    if code != 0:
+        print("warning: `import main` failed; the report covers imports up to the error")
+    print(f"import main: {total / 1000:.1f} ms cumulative")
+    print(f"{'cumulative ms':>14} {'self ms':>8}  module")
+    for cumulative, self_us, name in rows:
+        print(f"{cumulative / 1000:>14.1f} {self_us / 1000:>8.1f}  {name.strip()}")
+
+    samples = [time_to_first_prompt() for _ in range(args.runs)]
+    print(f"\ntime to first prompt: median {statistics.median(samples) * 1000:.0f} ms "
+          f"(min {min(samples) * 1000:.0f}, max {max(samples) * 1000:.0f}, {args.runs} runs)")
+
+
+if __name__ == "__main__":
+    main()
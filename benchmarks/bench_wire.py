@@ -0,0 +1,102 @@
+"""Wire format benchmark: output tokens and parse time, JSON vs compact.
+
+Run from the project root:
+    python -m benchmarks.bench_wire [--sizes 10 100 1000] [--repeat 50]
+    python -m benchmarks.bench_wire --count-tokens   # exact counts from the Gemini API
+
+Encodes the mspaintdrawer_v2 test scene, a path scene and seeded synthetic
+scenes the way the model returns them: indented JSON objects in a code fence
+for the JSON prompt, one tuple per shape for the compact prompt. Reports the
+output tokens of each, the generation time they imply at --tokens-per-second,
+and the median time to parse the text back into shape dicts (gemini's JSON
+path vs wire.parse_shapes). Both encodings are checked to parse back to the
+same shapes.
+
+Token counts are estimated offline with Gemini's tokenization habits (every
+digit is a token; words, punctuation and indentation runs are one each)
+unless --count-tokens is given and GEMINI_API_KEY is set.
+"""
+import argparse
+import json
+import math
+import re
+import statistics
+import time
+
+from benchmarks.bench_drawing import synthetic_scene
+from models.gemini import MODEL_NAME, _parse_shapes
+from models.wire import encode_shapes, parse_shapes
+from ms_paint.mspaintdrawer_v2 import TEST_SHAPES
+
+_APPROX_TOKEN = re.compile(r"\d|[A-Za-z]+|\n| {2,}|[^\sA-Za-z\d]")
+
+
+def approx_tokens(text):
+    return len(_APPROX_TOKEN.findall(text))
+
+
+def path_scene():
+    """A star outline and a spiral stroke: the vertex-list shapes."""
+    star = [[round(500 + (180 if i % 2 == 0 else 70) * math.sin(i * math.pi / 5)),
+             round(250 - (180 if i % 2 == 0 else 70) * math.cos(i * math.pi / 5))] for i in range(10)]
+    spiral = [[round(200 + t * 2 * math.cos(t / 6)), round(250 + t * 2 * math.sin(t / 6))] for t in range(0, 90, 2)]
+    return [{"shape": "polygon", "points": star}, {"shape": "pencil", "points": spiral}]
+
+
+def scenes(sizes):
+    yield "test_scene", TEST_SHAPES
+    yield "paths", path_scene()
+    for count in sizes:
+        # The model writes whole coordinates; keep both encodings comparable.
+        shapes = [{key: round(value) if isinstance(value, float) else value for key, value in shape.items()}
+                  for shape in synthetic_scene(count)]
+        yield f"synthetic_{count}", shapes
+
+
+def json_response(shapes):
+    """Model-style JSON answer: indented objects inside a code fence."""
+    return "```json\n" + json.dumps(shapes, indent=4) + "\n```"
+
+
+def median_ms(parse, text, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        parse(text)
+        times.append(time.perf_counter() - started)
+    return statistics.median(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=50, help="parses per measurement (median is reported)")
+    parser.add_argument("--tokens-per-second", type=float, default=150.0,
+                        help="model output rate used to turn tokens into generation time")
+    parser.add_argument("--count-tokens", action="store_true", help="count tokens with the Gemini API")
+    args = parser.parse_args()
+
+    count_tokens = approx_tokens
+    if args.count_tokens:
+        from models.gemini import get_client
+        client = get_client()
+
+        def count_tokens(text):
+            return client.models.count_tokens(model=MODEL_NAME, contents=text).total_tokens
+
+    print(f"{'scene':<16} {'shapes':>6} {'json tok':>9} {'compact':>8} {'ratio':>6} "
+          f"{'gen s saved':>11} {'json ms':>8} {'compact ms':>10}")
+    for name, shapes in scenes(args.sizes):
+        json_text, compact_text = json_response(shapes), encode_shapes(shapes)
+        if _parse_shapes(json_text) != shapes or parse_shapes(compact_text) != shapes:
+            raise RuntimeError(f"{name}: an encoding did not parse back to the same shapes")
+        json_tokens, compact_tokens = count_tokens(json_text), count_tokens(compact_text)
+        saved = (json_tokens - compact_tokens) / args.tokens_per_second
+        json_ms = median_ms(_parse_shapes, json_text, args.repeat)
+        compact_ms = median_ms(parse_shapes, compact_text, args.repeat)
+        print(f"{name:<16} {len(shapes):>6} {json_tokens:>9} {compact_tokens:>8} "
+              f"{compact_tokens / json_tokens:>6.2f} {saved:>11.2f} {json_ms:>8.3f} {compact_ms:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,49 @@
 import os
+import argparse
 from dotenv import load_dotenv
 load_dotenv()
 
 # Assuming these imports work correctly
+# ms_paint pulls in pyautogui / speech_recognition, so it is imported only
+# once a mode that needs it has been picked (see benchmarks/bench_startup.py).
 from models.gemini import generate
-from ms_paint import draw_shapes, transcribe_from_mic 
 
-def main():
+def _show_partial(text):
+    # Interim hypothesis from a streaming speech backend, overwritten in place.
+    print(f"\r... {text}", end="", flush=True)
+
+def _confirm_transcription(text):
+    """Let the user correct `text`; pre-filled for in-place editing where readline exists."""
+    try:
+        import readline
+    except ImportError:
+        return input("Type correction text, or press Enter to confirm: ").strip() or text
+    readline.set_startup_hook(lambda: readline.insert_text(text))
+    try:
+        return input("Edit the text, or press Enter to confirm: ").strip() or text
+    finally:
+        readline.set_startup_hook()
+
+def _replay_stored(user_input):
+    """Replay the compiled program of a prompt drawn before; returns (done, key)."""
+    from models.gemini import prompt_key
+    from ms_paint.calibration import get_calibration
+    from ms_paint.drift import DriftMonitor
+    from ms_paint.program import get_program_cache, replay_in_paint
+
+    key = prompt_key(user_input)
+    calibration = get_calibration()
+    if calibration.tools is None or calibration.canvas_bounds is None:
+        return False, key
+    program = get_program_cache().lookup(key, calibration)
+    if program is None:
+        return False, key
+    print(f"Replaying the stored drawing for this prompt ({len(program)} input events, ~{program.duration:.1f}s).")
+    # The stored events are absolute screen positions: check Paint has not moved.
+    done = replay_in_paint(program, calibration=calibration, drift=DriftMonitor())
+    return bool(done), key
+
+def main(stream=False, session=False, replay=True, verify=False, daemon=None):
     print("=== MS PAINT DRAWING TOOL WITH AI ===")
     print("Enter 1. To use voice based commands")
     print("Enter 2. To use text based commands")
@@ -16,25 +53,33 @@ def main():
     
     choice = input("\nEnter your choice (1 or 2): ")
 
+    if session and choice in ('1', '2'):
+        # Keep listening while earlier scenes are generated and drawn.
+        from session import run_session
+        run_session(voice=(choice == '1'))
+        return
+
     if choice == '1':
         print("\n--- VOICE INPUT MODE ---")
         print("Listening for your command...")
-        
-        command = transcribe_from_mic(timeout=5, phrase_time_limit=10) # Added typical limits
+        from ms_paint import transcribe_from_mic
+        from ms_paint.Mic import get_mic_session
+
+        command = transcribe_from_mic(timeout=5, phrase_time_limit=10, on_partial=_show_partial) # Added typical limits
+        print()
         
         if not command:
             print("No voice command detected. Returning to main menu.")
             return
 
+        backend = get_mic_session().backend
         print("-" * 40)
-        print(f"Transcription: {command}")
-        correction = input("Type correction text, or press Enter to confirm: ").strip()
+        print(f"Transcription: {command} ({backend.name}, {backend.latencies[-1]:.2f}s)")
+        user_input = _confirm_transcription(command)
         
-        if correction:
-            user_input = correction
+        if user_input != command:
             print("Correction applied.")
         else:
-            user_input = command
             print("Transcription confirmed.")
         print("-" * 40)
         
@@ -52,8 +97,31 @@ def main():
         print("Input command is empty. Cannot generate shapes.")
         return
 
+    program_key = None
+    # A running daemon owns the Paint window, so stored drawings are not replayed alongside it.
+    if replay and not stream and not daemon:
+        try:
+            done, program_key = _replay_stored(user_input)
+            if done:
+                return
+        except Exception as e:
+            print(f"Could not replay the stored drawing: {e}")
+
     print(f"Sending command to AI: '{user_input}'")
-    
+
+    if stream and not daemon:
+        # Draw each shape as soon as the model has finished emitting it.
+        from models.gemini import generate_stream
+        from ms_paint.draw_shapes import draw_shapes_streaming
+        try:
+            if not draw_shapes_streaming(generate_stream(user_input), verify=verify):
+                print("The drawing is incomplete.")
+        except ValueError as ve:
+            print(f"Drawing Error: {ve}")
+        except Exception as e:
+            print(f"An unexpected error occurred: {e}")
+        return
+
     try:
         shapes = generate(user_input)
     except Exception as e:
@@ -73,8 +141,21 @@ def main():
     print(shapes)
     print("------------------------")
     
+    if daemon:
+        # The resident daemon already has Paint open and calibrated.
+        from ms_paint.daemon import DaemonClient
+        try:
+            DaemonClient(daemon).draw(shapes, verify=verify, label=user_input)
+        except (OSError, ValueError) as e:
+            print(f"Could not reach the drawing daemon at {daemon}: {e}")
+        return
+
     try:
-        draw_shapes(shapes)
+        from ms_paint import draw_shapes
+        if draw_shapes(shapes, verify=verify) and program_key:
+            # Store the input events so the next identical prompt skips all of the above.
+            from ms_paint.program import get_program_cache
+            get_program_cache().compile(shapes, key=program_key)
     except ValueError as ve:
         print(f"Drawing Error: {ve}")
     except Exception as e:
@@ -82,4 +163,59 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Draw shapes in MS Paint from natural-language prompts.")
+    parser.add_argument("--stream", action="store_true",
+                        help="start drawing while the model is still generating")
+    parser.add_argument("--session", action="store_true",
+                        help="keep taking commands while earlier scenes are generated and drawn")
+    parser.add_argument("--batch", metavar="JSONL",
+                        help="process a file of prompts and/or shape lists non-interactively")
+    parser.add_argument("--report", default="batch_report.jsonl",
+                        help="where --batch writes per-item results (default: batch_report.jsonl)")
+    parser.add_argument("--backend", choices=["raster", "paint", "daemon"], default="raster",
+                        help="--batch drawing target: PNG files, MS Paint, or a running drawing daemon (default: raster)")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="concurrent model calls in --batch mode (default: 4)")
+    parser.add_argument("--output-dir", default="batch_output",
+                        help="where --batch --backend raster writes PNGs (default: batch_output)")
+    parser.add_argument("--no-replay", action="store_true",
+                        help="always generate and draw, even for prompts drawn before")
+    parser.add_argument("--daemon", nargs="?", const="", metavar="URL",
+                        help="send scenes to a running drawing daemon (python -m ms_paint.daemon) "
+                             "instead of opening Paint; URL defaults to $PAINT_DAEMON or localhost:8765")
+    parser.add_argument("--compact", action="store_true",
+                        help="ask the model for compact shape tuples instead of JSON objects (fewer output tokens)")
+    parser.add_argument("--verify", action="store_true",
+                        help="check the canvas after drawing and redraw shapes that are missing")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="write timing spans to PATH and print where the time went on exit")
+    parser.add_argument("--metrics-format", choices=["jsonl", "prom"], default=None,
+                        help="JSON lines per span or a Prometheus text file (default: from PATH, else jsonl)")
+    parser.add_argument("--quiet", action="store_true",
+                        help="no per-shape progress output while drawing")
+    args = parser.parse_args()
+
+    if args.metrics or args.quiet:
+        from ms_paint.metrics import configure
+        fmt = args.metrics_format or ("prom" if (args.metrics or "").endswith(".prom") else None)
+        configure(path=args.metrics, fmt=fmt, quiet=args.quiet or None)
+
+    if args.compact:
+        from models.gemini import set_wire_format
+        set_wire_format("compact")
+
+    if args.batch:
+        from batch import run_batch
+        run_batch(args.batch, args.report, backend=args.backend,
+                  workers=args.workers, output_dir=args.output_dir)
+    else:
+        daemon = None
+        if args.daemon is not None:
+            from ms_paint.daemon import default_url
+            daemon = args.daemon or default_url()
+        main(stream=args.stream, session=args.session, replay=not args.no_replay, verify=args.verify,
+             daemon=daemon)
+
+    if args.metrics:
+        from ms_paint.metrics import get_metrics
+        print("\n" + get_metrics().describe())
@@ -0,0 +1,198 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+# cache.py
+# Two-tier cache for prompt -> shapes responses: an in-memory LRU in front of
+# an on-disk store (one JSON file per entry). Keys combine the model name, a
+# hash of the system prompt and the normalized query, so editing the prompt or
+# switching models never serves stale shapes. Identical requests made while a
+# call is already in flight wait for that call instead of starting another.
+
+CACHE_DIR = os.path.join(".cache", "responses")
+DEFAULT_TTL = 7 * 24 * 3600        # seconds an entry stays valid
+DEFAULT_MEMORY_ENTRIES = 256
+DEFAULT_DISK_BYTES = 50 * 1024 * 1024
+
+
+def normalize_query(query):
+    """Case-, whitespace- and trailing-punctuation-insensitive form of a prompt."""
+    text = re.sub(r"\s+", " ", str(query)).strip().lower()
+    return text.rstrip(".!?")
+
+
+def cache_key(model, system_prompt, query):
+    prompt_hash = hashlib.sha256((system_prompt or "").encode("utf-8")).hexdigest()[:16]
+    raw = f"{model}\n{prompt_hash}\n{normalize_query(query)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """In-memory LRU + on-disk store with TTL, size-based eviction and
+    single-flight deduplication.
+
+    Use get_or_compute(key, compute); compute() must return a JSON-serializable
+    value. stats() reports hit rate and the model latency saved by hits.
+    """
+
+    def __init__(self, directory=CACHE_DIR, ttl=DEFAULT_TTL,
+                 max_memory_entries=DEFAULT_MEMORY_ENTRIES, max_disk_bytes=DEFAULT_DISK_BYTES):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._counts = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "coalesced": 0}
+        self._latency_saved = 0.0
+
+    # --- tiers ---
+
+    def _fresh(self, entry):
+        return self.ttl is None or time.time() - entry["created"] <= self.ttl
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, key):
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError, OSError):
+            return None
+
+    def _write_disk(self, key, entry):
+        if not self.directory:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            print(f"Could not write response cache entry: {e}")
+            return
+        self._evict_disk()
+
+    def _evict_disk(self):
+        """Drop expired entries, then the oldest ones until under max_disk_bytes."""
+        try:
+            names = [n for n in os.listdir(self.directory) if n.endswith(".json")]
+        except OSError:
+            return
+        files = []
+        now = time.time()
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if self.ttl is not None and now - stat.st_mtime > self.ttl:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def get(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and self._fresh(entry):
+                self._memory.move_to_end(key)
+                self._counts["memory_hits"] += 1
+                self._latency_saved += entry.get("latency", 0.0)
+                return entry["value"]
+        entry = self._read_disk(key)
+        if entry is not None and self._fresh(entry):
+            with self._lock:
+                self._remember(key, entry)
+                self._counts["disk_hits"] += 1
+                self._latency_saved += entry.get("latency", 0.0)
+            return entry["value"]
+        return None
+
+    def put(self, key, value, latency=0.0):
+        entry = {"created": time.time(), "latency": latency, "value": value}
+        with self._lock:
+            self._remember(key, entry)
+        self._write_disk(key, entry)
+
+    # --- single flight ---
+
+    def get_or_compute(self, key, compute):
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            pending = self._inflight.get(key)
+            if pending is None:
+                pending = Future()
+                self._inflight[key] = pending
+                leader = True
+            else:
+                self._counts["coalesced"] += 1
+                leader = False
+        if not leader:
+            return pending.result()
+
+        try:
+            started = time.perf_counter()
+            value = compute()
+            latency = time.perf_counter() - started
+            self.put(key, value, latency)
+            with self._lock:
+                self._counts["misses"] += 1
+            pending.set_result(value)
+            return value
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.directory and os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.endswith(".json"):
+                    os.remove(os.path.join(self.directory, name))
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+            saved = self._latency_saved
+        hits = counts["memory_hits"] + counts["disk_hits"] + counts["coalesced"]
+        lookups = hits + counts["misses"]
+        counts["hit_rate"] = hits / lookups if lookups else 0.0
+        counts["latency_saved_s"] = saved
+        return counts
@@ -0,0 +1,119 @@
+import random
+import threading
+import time
+
+# fakes.py
+# Local stand-ins for the google-genai client, for exercising generate() and
+# generate_stream() without network access or an API key. FaultyClient also
+# injects latency and upstream failures for the retry/hedging layer
+# (resilience.py).
+
+
+class _FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class _FakeModels:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def generate_content(self, model, contents):
+        owner = self._owner
+        owner.calls += 1
+        time.sleep(owner.delay * max(len(owner.chunks()), 1))
+        return _FakeResponse(owner.text)
+
+    def generate_content_stream(self, model, contents):
+        owner = self._owner
+        owner.calls += 1
+        for chunk in owner.chunks():
+            time.sleep(owner.delay)
+            yield _FakeResponse(chunk)
+
+
+class FakeStreamingClient:
+    """Returns a fixed response, streamed in `chunk_size` pieces.
+
+    `delay` is slept before each chunk (and once per chunk for the non-streaming
+    call), roughly how token generation paces a real response.
+    """
+
+    def __init__(self, text, chunk_size=16, delay=0.0):
+        self.text = text
+        self.chunk_size = chunk_size
+        self.delay = delay
+        self.calls = 0
+        self.models = _FakeModels(self)
+
+    def chunks(self):
+        return [self.text[i:i + self.chunk_size] for i in range(0, len(self.text), self.chunk_size)]
+
+
+class FakeAPIError(Exception):
+    """Stands in for google.genai.errors.APIError (HTTP status as .code)."""
+
+    def __init__(self, code, message="fake upstream error"):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+
+class _FaultyModels:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def generate_content(self, model, contents):
+        latency, outcome = self._owner.next_call()
+        time.sleep(latency)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return _FakeResponse(outcome)
+
+    def generate_content_stream(self, model, contents):
+        latency, outcome = self._owner.next_call()
+        time.sleep(latency)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        yield _FakeResponse(outcome)
+
+
+class FaultyClient:
+    """Returns `text` after an injected latency, or fails.
+
+    Each call takes `latency` seconds, or `slow_latency` with probability
+    `slow_rate` (a heavy tail), and raises a 503 FakeAPIError with
+    probability `failure_rate`. `script` overrides the first calls in order:
+    each entry is a latency in seconds, an exception to raise, a response
+    string, or a (latency, exception-or-string) pair. Thread-safe, so hedged
+    and concurrent calls can share one client.
+    """
+
+    def __init__(self, text, latency=0.0, slow_latency=0.0, slow_rate=0.0, failure_rate=0.0,
+                 script=(), seed=0):
+        self.text = text
+        self.latency = latency
+        self.slow_latency = slow_latency
+        self.slow_rate = slow_rate
+        self.failure_rate = failure_rate
+        self.calls = 0
+        self._script = list(script)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.models = _FaultyModels(self)
+
+    def next_call(self):
+        """(latency, response text or exception) for the next call."""
+        with self._lock:
+            self.calls += 1
+            if self._script:
+                entry = self._script.pop(0)
+                latency, outcome = entry if isinstance(entry, tuple) else (None, entry)
+                if isinstance(outcome, (int, float)):
+                    latency, outcome = outcome, None
+                return (self.latency if latency is None else latency,
+                        self.text if outcome is None else outcome)
+            slow = self._random.random() < self.slow_rate
+            latency = self.slow_latency if slow else self.latency
+            if self._random.random() < self.failure_rate:
+                return latency, FakeAPIError(503, "service unavailable")
+            return latency, self.text
@@ -1,19 +1,73 @@
 import os
+import copy
 import json
-from google import genai
+import threading
+import time
 
-GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+from ms_paint.metrics import span, get_metrics
 
-if not GEMINI_API_KEY:
-    raise ValueError("GEMINI_API_KEY environment variable is not set.")
+from .cache import ResponseCache, cache_key
+from .resilience import CircuitOpenError, ResilientCaller, is_transient
+from .stream_parser import ShapeStreamParser
+from .wire import WireParser, parse_shapes as parse_wire_shapes
 
-client = genai.Client(api_key=GEMINI_API_KEY)
+_client = None
+_client_lock = threading.Lock()
 
 
-def _load_system_prompt():
+def get_client():
+    """Build the Gemini client on first use and reuse it afterwards.
+
+    google-genai is only imported here, so text-only startup and cached
+    prompts never pay for it; a missing key is reported when a call is made.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                api_key = os.getenv('GEMINI_API_KEY')
+                if not api_key:
+                    raise ValueError("GEMINI_API_KEY environment variable is not set.")
+                from google import genai
+                _client = genai.Client(api_key=api_key)
+    return _client
+
+MODEL_NAME = "gemini-2.0-flash"
+
+# Shared prompt -> shapes cache; see cache_stats() for hit rate and time saved.
+response_cache = ResponseCache()
+
+# Retries, hedging and the circuit breaker around model calls (resilience.py);
+# see model_call_stats(). Every generate() call must finish within this many
+# seconds, retries included.
+model_caller = ResilientCaller()
+DEFAULT_DEADLINE = 120.0
+
+# Output format asked of the model: "json" objects, or "compact" tuples (see
+# wire.py), which need a fraction of the output tokens. Each has its own
+# system prompt, so their cache entries never mix.
+WIRE_FORMATS = {"json": "system_prompt.txt", "compact": "system_prompt_compact.txt"}
+WIRE_FORMAT_ENV = "GEMINI_WIRE_FORMAT"
+_wire_format = None
+
+
+def set_wire_format(fmt):
+    """Select the output format for later calls (None: from GEMINI_WIRE_FORMAT)."""
+    global _wire_format
+    if fmt is not None and fmt not in WIRE_FORMATS:
+        raise ValueError(f"Unknown wire format '{fmt}'. Expected one of {sorted(WIRE_FORMATS)}.")
+    _wire_format = fmt
+
+
+def get_wire_format():
+    fmt = _wire_format or os.getenv(WIRE_FORMAT_ENV, "json").strip().lower()
+    return fmt if fmt in WIRE_FORMATS else "json"
+
+
+def _load_system_prompt(wire="json"):
     try:
         this_dir = os.path.dirname(os.path.abspath(__file__))
-        prompt_path = os.path.join(this_dir, "system_prompt.txt")
+        prompt_path = os.path.join(this_dir, WIRE_FORMATS[wire])
         with open(prompt_path, "r", encoding="utf-8") as f:
             return f.read().strip()
     except Exception:
@@ -35,15 +89,7 @@ def _strip_code_fences(text: str) -> str:
     return trimmed.strip()
 
 
-def generate(query: str):
-    system_prompt = _load_system_prompt()
-    user_block = f"USER QUERY: {query}"
-    prompt = f"{system_prompt}\n\n{user_block}" if system_prompt else user_block
-
-    response = client.models.generate_content(
-        model="gemini-2.0-flash", contents=prompt
-    )
-    text = getattr(response, "text", None)
+def _parse_shapes(text):
     if not text:
         raise ValueError("Model returned empty response.")
 
@@ -64,4 +110,124 @@ def generate(query: str):
         raise ValueError("Expected a list of shapes from the model.")
 
     return parsed
-    
\ No newline at end of file
+
+
+def _parse_response(text, wire="json"):
+    return parse_wire_shapes(text) if wire == "compact" else _parse_shapes(text)
+
+
+def _call_model(prompt, model_client, wire="json"):
+    response = model_client.models.generate_content(
+        model=MODEL_NAME, contents=prompt
+    )
+    return _parse_response(getattr(response, "text", None), wire)
+
+
+def _build_prompt(query, wire="json"):
+    system_prompt = _load_system_prompt(wire)
+    user_block = f"USER QUERY: {query}"
+    prompt = f"{system_prompt}\n\n{user_block}" if system_prompt else user_block
+    return system_prompt, prompt
+
+
+def prompt_key(query: str, wire=None):
+    """Cache key for `query` (model + system prompt + normalized text)."""
+    system_prompt, _ = _build_prompt(query, wire or get_wire_format())
+    return cache_key(MODEL_NAME, system_prompt, query)
+
+
+def generate(query: str, use_cache=True, model_client=None, wire=None, timeout=DEFAULT_DEADLINE):
+    """Return the list of shape dicts for `query`.
+
+    Repeated prompts are served from `response_cache`; identical concurrent
+    prompts share one model call. Pass model_client to use a stub client, and
+    wire="compact" to ask for the compact output format (default: see
+    get_wire_format()). The model call is retried, hedged and given up on
+    after `timeout` seconds (resilience.DeadlineExceeded), and refused while
+    the upstream is failing (resilience.CircuitOpenError).
+    """
+    wire = wire or get_wire_format()
+    system_prompt, prompt = _build_prompt(query, wire)
+
+    def call():
+        client = model_client or get_client()
+        with span("model_call", model=MODEL_NAME, wire=wire):
+            return model_caller.call(lambda: _call_model(prompt, client, wire), timeout=timeout)
+
+    with span("generate"):
+        if not use_cache:
+            return call()
+
+        key = cache_key(MODEL_NAME, system_prompt, query)
+        shapes = response_cache.get_or_compute(key, call)
+        # Callers may edit the shapes; never hand out the cached objects themselves.
+        return copy.deepcopy(shapes)
+
+
+def generate_stream(query: str, use_cache=True, model_client=None, wire=None):
+    """Yield shape dicts as the model streams them.
+
+    Each shape is yielded as soon as its closing brace (or bracket, in the
+    compact format) arrives. If nothing could be parsed incrementally, the
+    whole response goes through the same parsing as generate() (fences,
+    leading prose). Completed responses are cached, and a cached prompt is
+    replayed without a model call.
+    """
+    wire = wire or get_wire_format()
+    system_prompt, prompt = _build_prompt(query, wire)
+    key = cache_key(MODEL_NAME, system_prompt, query)
+
+    if use_cache:
+        cached = response_cache.get(key)
+        if cached is not None:
+            yield from copy.deepcopy(cached)
+            return
+
+    model_client = model_client or get_client()
+    # Streamed shapes are drawn as they arrive, so a stream is neither
+    # retried nor hedged; it only reports to and respects the breaker.
+    breaker = model_caller.breaker
+    if not breaker.allow():
+        raise CircuitOpenError(f"Model upstream is failing; not calling it for another {breaker.retry_after():.0f}s.")
+    metrics = get_metrics()
+    started = time.perf_counter()
+    parser = WireParser() if wire == "compact" else ShapeStreamParser()
+    shapes = []
+    try:
+        for chunk in model_client.models.generate_content_stream(model=MODEL_NAME, contents=prompt):
+            for shape in parser.feed(getattr(chunk, "text", None) or ""):
+                if not shapes:
+                    metrics.record("model_first_shape", time.perf_counter() - started, model=MODEL_NAME)
+                shapes.append(shape)
+                yield copy.deepcopy(shape)
+    except GeneratorExit:
+        # The consumer stopped early; the upstream itself was answering.
+        breaker.record_success()
+        raise
+    except Exception as exc:
+        if is_transient(exc):
+            breaker.record_failure()
+        raise
+    breaker.record_success()
+    if wire == "compact":
+        # A last entry cut off by the output limit, if it is still a whole shape.
+        for shape in parser.finish():
+            shapes.append(shape)
+            yield copy.deepcopy(shape)
+    # Wall time from request to last chunk; includes time the consumer held each shape.
+    metrics.record("model_stream", time.perf_counter() - started, model=MODEL_NAME)
+
+    if not shapes:
+        shapes = _parse_response(parser.full_text(), wire)
+        yield from copy.deepcopy(shapes)
+
+    if use_cache:
+        response_cache.put(key, shapes, time.perf_counter() - started)
+
+
+def cache_stats():
+    return response_cache.stats()
+
+
+def model_call_stats():
+    return model_caller.stats()
@@ -0,0 +1,240 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from ms_paint.metrics import get_metrics
+
+# resilience.py
+# Request layer for model calls. One slow or failed generate_content call
+# used to stall a whole session, so every call now runs under:
+#   - a deadline covering all attempts (DeadlineExceeded when it passes),
+#   - retries with full-jitter exponential backoff on transient errors
+#     (timeouts, connection errors, HTTP 408/429/5xx) and unparsable output,
+#   - a hedged duplicate request once the first has run longer than the p95
+#     of recent successful calls; the first valid shape list wins,
+#   - a circuit breaker that fails fast (CircuitOpenError) after repeated
+#     upstream failures and lets one trial call through after a cool-down.
+# The blocking client cannot be cancelled, so a call that loses a hedge or
+# passes its deadline finishes in a background thread and is discarded.
+
+TRANSIENT_STATUS = {408, 429, 500, 502, 503, 504}
+DEFAULT_ATTEMPTS = 3
+DEFAULT_BACKOFF = 0.5       # seconds; first retry waits up to this much
+MAX_BACKOFF = 8.0
+HEDGE_QUANTILE = 0.95
+HEDGE_MIN_SAMPLES = 5       # successful calls seen before hedging starts
+FAILURE_THRESHOLD = 5       # consecutive upstream failures that open the breaker
+RESET_TIMEOUT = 30.0        # seconds the breaker stays open before a trial call
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+def is_transient(exc):
+    """Errors worth retrying that also say the upstream is unhealthy."""
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    # google-genai's APIError carries the HTTP status as .code.
+    code = getattr(exc, "code", None) or getattr(exc, "status_code", None)
+    return code in TRANSIENT_STATUS
+
+
+def is_retryable(exc):
+    # A ValueError here is model output that did not parse; another sample
+    # usually does.
+    return is_transient(exc) or isinstance(exc, ValueError)
+
+
+class LatencyTracker:
+    """Recent successful call latencies; hedge_delay() is their p95."""
+
+    def __init__(self, window=100, quantile=HEDGE_QUANTILE, min_samples=HEDGE_MIN_SAMPLES):
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def hedge_delay(self):
+        """Seconds to wait before hedging, or None until there is enough history."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(self.quantile * len(ordered)))]
+
+
+class CircuitBreaker:
+    """Closed -> open after `failure_threshold` consecutive failures; open ->
+    half-open after `reset_timeout`, where one trial call decides which."""
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False     # a half-open trial call is in flight
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._clock() - self._opened_at >= self.reset_timeout:
+                return "half_open"
+            return "open"
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._clock() - self._opened_at < self.reset_timeout or self._trial:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+            self._trial = False
+
+    def retry_after(self):
+        """Seconds until a trial call is allowed (0 when closed)."""
+        with self._lock:
+            if self._opened_at is None:
+                return 0.0
+            return max(0.0, self.reset_timeout - (self._clock() - self._opened_at))
+
+
+class ResilientCaller:
+    """Runs zero-argument calls with a deadline, retries, hedging and a breaker.
+
+    - attempts: tries per call, including the first
+    - backoff / max_backoff: full-jitter exponential backoff between tries
+    - hedge: fire a duplicate after the tracker's p95 (False to disable)
+    stats() counts attempts, retries, hedges, hedge wins and fast failures.
+    """
+
+    def __init__(self, attempts=DEFAULT_ATTEMPTS, backoff=DEFAULT_BACKOFF, max_backoff=MAX_BACKOFF,
+                 hedge=True, tracker=None, breaker=None, max_workers=16, seed=None, sleep=time.sleep):
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.hedge = hedge
+        self.tracker = tracker or LatencyTracker()
+        self.breaker = breaker or CircuitBreaker()
+        self._sleep = sleep
+        self._random = random.Random(seed)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="model-call")
+        self._lock = threading.Lock()
+        self._counts = {"calls": 0, "attempts": 0, "retries": 0, "hedges": 0, "hedge_wins": 0,
+                        "deadline_exceeded": 0, "rejected": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+        counts["breaker"] = self.breaker.state
+        counts["hedge_delay"] = self.tracker.hedge_delay()
+        return counts
+
+    def call(self, fn, timeout=None):
+        """fn() with retries and hedging, within `timeout` seconds overall."""
+        self._count("calls")
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for attempt in range(self.attempts):
+            if not self.breaker.allow():
+                self._count("rejected")
+                raise CircuitOpenError(
+                    f"Model upstream is failing; not calling it for another {self.breaker.retry_after():.0f}s.")
+            try:
+                result = self._hedged(fn, deadline)
+            except Exception as exc:
+                if is_transient(exc):
+                    self.breaker.record_failure()
+                else:
+                    # The upstream answered; only the answer was unusable.
+                    self.breaker.record_success()
+                if isinstance(exc, DeadlineExceeded) or not is_retryable(exc) or attempt == self.attempts - 1:
+                    raise
+                delay = self._random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+                if deadline is not None and time.monotonic() + delay >= deadline:
+                    self._count("deadline_exceeded")
+                    raise DeadlineExceeded(f"No time left to retry after: {exc}") from exc
+                print(f"Model call failed ({exc}); retrying in {delay:.2f}s.")
+                self._count("retries")
+                self._sleep(delay)
+                continue
+            self.breaker.record_success()
+            return result
+
+    def _timed(self, fn, hedge):
+        started = time.perf_counter()
+        ok = False
+        try:
+            result = fn()
+            ok = True
+            return result, time.perf_counter() - started
+        finally:
+            get_metrics().record("model_attempt", time.perf_counter() - started, ok=ok, hedge=hedge)
+
+    def _hedged(self, fn, deadline):
+        """One attempt: the request, plus a hedge if it runs past the p95."""
+        self._count("attempts")
+        started = time.monotonic()
+        hedge_delay = self.tracker.hedge_delay() if self.hedge else None
+        primary = self._pool.submit(self._timed, fn, False)
+        pending = {primary}
+        error = None
+        while pending:
+            now = time.monotonic()
+            wait_for = None if deadline is None else deadline - now
+            if hedge_delay is not None:
+                until_hedge = started + hedge_delay - now
+                wait_for = until_hedge if wait_for is None else min(wait_for, until_hedge)
+            done, pending = wait(pending, timeout=None if wait_for is None else max(wait_for, 0.0),
+                                 return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result, seconds = future.result()
+                except Exception as exc:
+                    error = exc
+                    continue
+                self.tracker.add(seconds)
+                if future is not primary:
+                    self._count("hedge_wins")
+                return result
+            if not pending:
+                break
+            if hedge_delay is not None and time.monotonic() >= started + hedge_delay:
+                # Still waiting past the p95: race a duplicate request.
+                self._count("hedges")
+                pending.add(self._pool.submit(self._timed, fn, True))
+                hedge_delay = None
+            if deadline is not None and time.monotonic() >= deadline:
+                self._count("deadline_exceeded")
+                raise DeadlineExceeded("Model call did not finish before its deadline.")
+        raise error
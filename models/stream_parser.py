@@ -0,0 +1,78 @@
+import json
+
+# stream_parser.py
+# Incremental parser for a streamed JSON array of shape objects. Text is fed in
+# arbitrary chunks; each top-level object is returned as soon as its closing
+# brace arrives, so drawing can start before the model has finished. Anything
+# before the first "[" (code fences, leading prose) and after the closing "]"
+# is ignored, matching the fallback used by gemini.generate.
+
+
+class ShapeStreamParser:
+    def __init__(self):
+        self._buffer = []       # characters of the object currently being read
+        self._started = False   # seen the opening "["
+        self._done = False      # seen the closing "]"
+        self._depth = 0         # brace/bracket depth inside the array
+        self._in_string = False
+        self._escaped = False
+        self._chunks = []       # every chunk fed, for a whole-text fallback
+
+    @property
+    def done(self):
+        return self._done
+
+    def feed(self, chunk):
+        """Consume a chunk of model text; return the shapes completed by it."""
+        self._chunks.append(chunk)
+        shapes = []
+        for ch in chunk:
+            if self._done:
+                break
+            if not self._started:
+                if ch == "[":
+                    self._started = True
+                continue
+
+            if self._depth == 0:
+                # Between elements of the top-level array.
+                if ch == "{":
+                    self._depth = 1
+                    self._buffer = [ch]
+                elif ch == "]":
+                    self._done = True
+                continue
+
+            self._buffer.append(ch)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    shape = self._emit()
+                    if shape is not None:
+                        shapes.append(shape)
+        return shapes
+
+    def _emit(self):
+        raw = "".join(self._buffer)
+        self._buffer = []
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            print(f"Skipping malformed shape in stream: {raw[:80]}")
+            return None
+        return value if isinstance(value, dict) else None
+
+    def full_text(self):
+        return "".join(self._chunks)
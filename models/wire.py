@@ -0,0 +1,326 @@
+import json
+import re
+
+# wire.py
+# Compact wire format for model output. The JSON schema repeats "shape",
+# "start_x", ... for every shape, and output tokens dominate model latency, so
+# the compact format writes one tuple per shape:
+#
+#   [["r",400,350,600,450],["t",400,250,600,350],["g",10,10,60,10,35,50]]
+#
+# The first item is a shape code (or the full shape name); the rest are the
+# corners (x1, y1, x2, y2) or, for paths, the vertices x, y, x, y, ...
+#
+# WireParser reads it in a single pass over a token stream, in chunks as they
+# stream in: code fences and prose around the array, trailing or missing
+# commas, and a final entry cut off by the token limit are all tolerated.
+# JSON shape objects are accepted as well, so a model that falls back to the
+# verbose schema still parses. The output is the shape dicts draw_shapes
+# expects. parse_shapes() first tries the C JSON decoder on the bracketed
+# array, since the tolerant parser is several times slower per shape.
+
+CODES = {
+    "l": "line",
+    "r": "rectangle",
+    "t": "triangle",
+    "c": "circle",
+    "d": "diamond",
+    "rt": "right_triangle",
+    "g": "polygon",
+    "p": "pencil",
+    "b": "brush",
+}
+SHAPE_CODES = {name: code for code, name in CODES.items()}
+# Shapes that are always vertex paths; "polygon" is one when it has more than
+# two corner pairs' worth of numbers.
+PATH_ONLY = {"pencil", "brush"}
+BOX_KEYS = ("start_x", "start_y", "end_x", "end_y")
+
+# Strings (an unterminated one runs to the end of the text), numbers, bare
+# words and brackets. Commas, colons, whitespace, backticks and other
+# punctuation fall between tokens and are skipped.
+_SCALARS = (
+    r'"(?:[^"\\]|\\.)*(?:"|\\?\Z)'
+    r"|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?"
+    r"|[A-Za-z_][A-Za-z_0-9]*"
+    r"|[\[\]{}]"
+)
+_SCALAR_TOKEN = re.compile(_SCALARS)
+# A whole flat compact tuple is matched as one token, so the common case
+# costs one regex match per shape instead of one Python step per number.
+_TOKEN = re.compile(r'(?P<tuple>\[\s*"?(?P<code>[A-Za-z_]+)"?(?:[\s,]+[-+]?\d+(?:\.\d+)?)+[\s,]*\])|' + _SCALARS)
+_NUMBER = re.compile(r"[-+]?\d+(?:\.\d+)?")
+_WORDS = {"true": True, "false": False, "null": None}
+
+
+def _scalar(token):
+    first = token[0]
+    if first == '"':
+        if "\\" not in token and len(token) > 1 and token[-1] == '"':
+            return token[1:-1]
+        try:
+            return json.loads(token)
+        except ValueError:
+            return token.strip('"\\')   # unterminated or badly escaped
+    if first.isdigit() or first in "-+.":
+        if "." in token or "e" in token or "E" in token:
+            return float(token)
+        return int(token)
+    return _WORDS.get(token, token)
+
+
+def _flatten(items):
+    """Numbers of a tuple in order; nested [x, y] pairs are flattened."""
+    numbers = []
+    for item in items:
+        if isinstance(item, list):
+            numbers.extend(_flatten(item))
+        elif isinstance(item, (int, float)) and not isinstance(item, bool):
+            numbers.append(item)
+    return numbers
+
+
+def _pairs(points):
+    """Complete [x, y] vertices of a JSON "points" value (a truncated last one is dropped)."""
+    if not isinstance(points, list):
+        return None
+    if points and not isinstance(points[0], list):
+        numbers = _flatten(points)
+        return [numbers[i:i + 2] for i in range(0, len(numbers) - 1, 2)]
+    return [p for p in points if isinstance(p, list) and len(p) == 2]
+
+
+def _min_points(name):
+    return 3 if name == "polygon" else 2
+
+
+def shape_from_wire(value, partial=False):
+    """Shape dict for one parsed array element, or None if it is not a shape.
+
+    `partial` marks an entry cut off at the end of the text: it is kept only
+    if what arrived is still a complete shape.
+    """
+    if isinstance(value, dict):
+        if "shape" not in value:
+            return None
+        if "points" in value:
+            points = _pairs(value["points"])
+            if partial and (points is None or len(points) < _min_points(value["shape"])):
+                return None
+            if points is not None:
+                value = dict(value, points=points)
+        elif partial and not all(key in value for key in BOX_KEYS):
+            return None
+        return value
+
+    if not isinstance(value, list) or not value or not isinstance(value[0], str):
+        return None
+    return _tuple_shape(value[0], _flatten(value[1:]), partial)
+
+
+def _tuple_shape(code, numbers, partial=False):
+    name = CODES.get(code.lower(), code.lower())
+    if name in PATH_ONLY or (name == "polygon" and (partial or len(numbers) > 4)):
+        points = [numbers[i:i + 2] for i in range(0, len(numbers) - 1, 2)]
+        if len(points) < _min_points(name):
+            return None
+        return {"shape": name, "points": points}
+    if len(numbers) < 4:
+        return None
+    return dict(zip(("shape",) + BOX_KEYS, [name] + numbers[:4]))
+
+
+_NAMES = {**CODES, **{name: name for name in CODES.values()}}
+_NUMERIC = (int, float)
+_FLAT_PATHS = PATH_ONLY | {"polygon"}
+
+
+def _decoded_shape(value):
+    """shape_from_wire for a JSON-decoded element, with a shortcut for flat box tuples."""
+    if type(value) is list and len(value) == 5:
+        code, x1, y1, x2, y2 = value
+        name = _NAMES.get(code)
+        if (name is not None and name not in PATH_ONLY and type(x1) in _NUMERIC and type(y1) in _NUMERIC
+                and type(x2) in _NUMERIC and type(y2) in _NUMERIC):
+            return {"shape": name, "start_x": x1, "start_y": y1, "end_x": x2, "end_y": y2}
+    elif type(value) is list and len(value) > 5 and _NAMES.get(value[0]) in _FLAT_PATHS:
+        numbers = value[1:]
+        if all(type(v) in _NUMERIC for v in numbers):
+            return _tuple_shape(value[0], numbers)
+    return shape_from_wire(value)
+
+
+class WireParser:
+    """Incremental parser for a compact (or JSON) array of shapes.
+
+    feed(chunk) returns the shapes completed by that chunk; finish() returns a
+    shape cut off at the end of the text, if it is still usable. Every
+    character is tokenized once; only a token split across two chunks is
+    carried over.
+    """
+
+    def __init__(self):
+        self._pending = ""      # text of a token that may continue in the next chunk
+        self._stack = []        # open containers; [0] is the top-level array
+        self._keys = []         # per open container: pending dict key (or None)
+        self._started = False   # seen the opening "[" of the shape array
+        self._done = False      # seen its closing "]"
+        self._emitted = 0
+        self._chunks = []
+
+    @property
+    def done(self):
+        return self._done
+
+    @property
+    def started(self):
+        return self._started or self._done
+
+    def feed(self, chunk):
+        """Consume a chunk of model text; return the shapes completed by it."""
+        self._chunks.append(chunk)
+        if self._done:
+            return []
+        text = self._pending + chunk
+        self._pending = ""
+        shapes = []
+        end = len(text)
+        for match in _TOKEN.finditer(text):
+            token = match.group()
+            if match.end() == end and token not in "[]{}":
+                # Might continue in the next chunk (a number, word or string).
+                self._pending = text[match.start():]
+                break
+            if match.lastgroup == "tuple":
+                self._tuple(match, shapes)
+            else:
+                self._token(token, shapes)
+            if self._done:
+                break
+        return shapes
+
+    def finish(self):
+        """End of text: the shape still open at the end, if it is complete enough."""
+        shapes = []
+        if self._pending and not self._done:
+            pending, self._pending = self._pending, ""
+            # A token that reaches the end of the text is complete only if
+            # nothing is left open around it.
+            if len(self._stack) <= 1:
+                for match in _TOKEN.finditer(pending):
+                    if match.lastgroup == "tuple":
+                        self._tuple(match, shapes)
+                    else:
+                        self._token(match.group(), shapes)
+                    if self._done:
+                        break
+        if len(self._stack) > 1:
+            # Close everything inside the truncated entry and keep it if usable.
+            while len(self._stack) > 2:
+                self._close(shapes)
+            shape = shape_from_wire(self._stack.pop(), partial=True)
+            self._keys.pop()
+            if shape is not None:
+                self._emitted += 1
+                shapes.append(shape)
+        return shapes
+
+    def _token(self, token, shapes):
+        if token == "[" or token == "{":
+            if not self._stack:
+                if token == "{":
+                    return  # an object outside the array: prose, not a shape
+                self._started = True
+            self._stack.append([] if token == "[" else {})
+            self._keys.append(None)
+        elif token == "]" or token == "}":
+            if self._stack:
+                self._close(shapes)
+        elif self._stack:
+            self._add(_scalar(token))
+
+    def _tuple(self, match, shapes):
+        if len(self._stack) != 1:
+            # Not directly inside the shape array: take it token by token.
+            for token in _SCALAR_TOKEN.findall(match.group()):
+                self._token(token, shapes)
+            return
+        numbers = [float(n) if "." in n else int(n)
+                   for n in _NUMBER.findall(match.group(), match.end("code") - match.start())]
+        shape = _tuple_shape(match.group("code"), numbers)
+        if shape is not None:
+            self._emitted += 1
+            shapes.append(shape)
+
+    def _add(self, value):
+        container = self._stack[-1]
+        if isinstance(container, list):
+            container.append(value)
+        elif self._keys[-1] is None and isinstance(value, str):
+            self._keys[-1] = value
+        elif self._keys[-1] is not None:
+            container[self._keys[-1]] = value
+            self._keys[-1] = None
+
+    def _close(self, shapes):
+        value = self._stack.pop()
+        self._keys.pop()
+        if self._stack:
+            if len(self._stack) == 1:
+                # A finished element of the shape array.
+                shape = shape_from_wire(value)
+                if shape is not None:
+                    self._emitted += 1
+                    shapes.append(shape)
+            else:
+                self._add(value)
+        elif self._emitted:
+            self._done = True
+        elif value and all(isinstance(v, (int, float, str)) for v in value):
+            # "[like this]" in leading prose: not the shape array, keep looking.
+            self._started = False
+        else:
+            self._done = True
+
+    def full_text(self):
+        return "".join(self._chunks)
+
+
+def parse_shapes(text):
+    """Shape dicts from a complete model response in either format."""
+    if not text:
+        raise ValueError("Model returned empty response.")
+    # A well-formed array (the usual case) goes through the C JSON decoder;
+    # only text it rejects needs the tolerant token-by-token parser.
+    start, end = text.find("["), text.rfind("]")
+    if start != -1 and end > start:
+        try:
+            value = json.loads(text[start:end + 1])
+        except ValueError:
+            value = None
+        if isinstance(value, list) and value and all(isinstance(item, (list, dict)) for item in value):
+            return [shape for shape in map(_decoded_shape, value) if shape is not None]
+    parser = WireParser()
+    shapes = parser.feed(text)
+    shapes += parser.finish()
+    if not parser.started:
+        raise ValueError("Expected a list of shapes from the model.")
+    return shapes
+
+
+def _number(value):
+    return int(value) if float(value).is_integer() else round(float(value), 2)
+
+
+def encode_shapes(shapes):
+    """Compact wire text for shape dicts (the format the compact prompt asks for)."""
+    rows = []
+    for shape in shapes:
+        name = shape.get("shape")
+        code = SHAPE_CODES.get(name, name)
+        if shape.get("points") is not None:
+            numbers = [_number(v) for point in shape["points"] for v in point]
+        else:
+            numbers = [_number(shape[key]) for key in BOX_KEYS]
+        rows.append(json.dumps([code] + numbers, separators=(",", ":")))
+    return "[" + ",\n".join(rows) + "]"
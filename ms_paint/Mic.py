@@ -2,44 +2,241 @@ import speech_recognition as sr
 import time # Added for the break time
 
 # Mic.py
-# Simple microphone-to-text using the SpeechRecognition package and Google Web Speech API.
+# Simple microphone-to-text using the SpeechRecognition package. Recognition is
+# done by a pluggable backend from recognizers.py (Google Web Speech API by
+# default, SPEECH_BACKEND=vosk for an offline model).
 # Install dependencies:
 # pip install SpeechRecognition
 # pip install PyAudio or pipwin install pyaudio
 
 
-def transcribe_from_mic(timeout=None, phrase_time_limit=None, adjust_for_ambient=True):
+import json
+import os
+import queue
+import threading
+
+from .recognizers import backend_from_env
+
+MIC_CALIBRATION_FILE = "mic_calibration.json"
+
+
+class MicSession:
+    """Reusable microphone with a cached ambient-noise calibration.
+
+    - One sr.Recognizer and one audio source for the whole session; pass
+      source=sr.AudioFile(path) to run against a recorded WAV instead.
+    - The energy threshold is calibrated once, persisted to
+      mic_calibration.json and reused by later runs. It is re-measured only
+      when drift shows up: the recognizer's dynamic threshold has moved far
+      from the stored value, or several listens in a row heard nothing usable.
+    - start_background() keeps capturing into a bounded queue, recognizing
+      each phrase as soon as it ends, so get_utterance() just pops text.
+    - backend: a recognizers.SpeechBackend (SPEECH_BACKEND env var by default).
+      Streaming backends get audio while the user is still speaking and report
+      partial hypotheses to listen_once(on_partial=...).
     """
-    Listen to the default microphone and return the transcribed text (Google Web Speech API).
+
+    def __init__(self, source=None, backend=None, threshold_path=MIC_CALIBRATION_FILE,
+                 max_queue=8, drift_ratio=1.5, max_misses=3):
+        self.recognizer = sr.Recognizer()
+        self.source = source
+        self.backend = backend or backend_from_env()
+        self.threshold_path = threshold_path
+        self.drift_ratio = drift_ratio
+        self.max_misses = max_misses
+        self.utterances = queue.Queue(maxsize=max_queue)
+        self.calibrated = False
+        self._stored_threshold = None
+        self._misses = 0
+        self._stop_background = None
+        self._lock = threading.Lock()
+        self._load_threshold()
+
+    # --- calibration ---
+
+    def _get_source(self):
+        if self.source is None:
+            self.source = sr.Microphone()  # uses default system microphone
+        return self.source
+
+    def _load_threshold(self):
+        if not self.threshold_path:
+            return
+        try:
+            with open(self.threshold_path, "r") as f:
+                threshold = float(json.load(f)["energy_threshold"])
+        except (FileNotFoundError, json.JSONDecodeError, KeyError, TypeError, ValueError):
+            return
+        self.recognizer.energy_threshold = threshold
+        self._stored_threshold = threshold
+        self.calibrated = True
+
+    def _save_threshold(self):
+        threshold = self.recognizer.energy_threshold
+        self._stored_threshold = threshold
+        if not self.threshold_path:
+            return
+        tmp_path = f"{self.threshold_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"energy_threshold": threshold}, f)
+        os.replace(tmp_path, self.threshold_path)
+
+    def calibrate(self, source, duration=0.8):
+        """Measure ambient noise on an already-open source and persist it."""
+        # listen for `duration` seconds to calibrate energy threshold for ambient noise
+        self.recognizer.adjust_for_ambient_noise(source, duration=duration)
+        self.calibrated = True
+        self._misses = 0
+        self._save_threshold()
+
+    def _drifted(self):
+        stored = self._stored_threshold
+        current = self.recognizer.energy_threshold
+        if not stored or not current:
+            return False
+        ratio = current / stored
+        return ratio > self.drift_ratio or ratio < 1 / self.drift_ratio
+
+    def _note_result(self, heard):
+        """Track misses and persist the dynamic threshold once it has drifted."""
+        self._misses = 0 if heard else self._misses + 1
+        if heard and self._drifted():
+            self._save_threshold()
+
+    # --- recognition ---
+
+    def _transcribe(self, audio):
+        try:
+            text = self.backend.recognize(self.recognizer, audio)
+        except (sr.UnknownValueError, sr.RequestError) as e:
+            return self._recognition_failed(e)
+        self._note_result(True)
+        return text
+
+    def _recognition_failed(self, error):
+        if isinstance(error, sr.UnknownValueError):
+            print("Speech was unintelligible.")
+        else:
+            print(f"Could not request results from the {self.backend.name} speech recognizer; {error}")
+        self._note_result(False)
+        return None
+
+    def _listen_streaming(self, source, timeout, phrase_time_limit, on_partial):
+        """Feed audio to the backend chunk by chunk while the phrase is recorded."""
+        stream = self.backend.start_stream(on_partial)
+        for chunk in self.recognizer.listen(source, timeout=timeout,
+                                            phrase_time_limit=phrase_time_limit, stream=True):
+            stream.feed(chunk)
+        try:
+            text = stream.finish()
+        except (sr.UnknownValueError, sr.RequestError) as e:
+            return self._recognition_failed(e)
+        self._note_result(True)
+        return text
+
+    def listen_once(self, timeout=None, phrase_time_limit=None, adjust_for_ambient=True, on_partial=None):
+        """Capture and transcribe one phrase; returns text or None.
+
+        on_partial(text) is called with interim hypotheses when the backend streams.
+        """
+        with self._lock:
+            with self._get_source() as source:
+                if adjust_for_ambient and (not self.calibrated or self._misses >= self.max_misses):
+                    self.calibrate(source)
+
+                print("Please speak now...")
+                try:
+                    if on_partial and self.backend.supports_streaming:
+                        return self._listen_streaming(source, timeout, phrase_time_limit, on_partial)
+                    audio = self.recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
+                except sr.WaitTimeoutError:
+                    print("No speech detected (timeout).")
+                    self._note_result(False)
+                    return None
+        return self._transcribe(audio)
+
+    # --- background capture ---
+
+    def _on_phrase(self, recognizer, audio):
+        text = self._transcribe(audio)
+        if not text:
+            return
+        try:
+            self.utterances.put_nowait(text)
+        except queue.Full:
+            # Keep the newest command; drop the oldest unread one.
+            try:
+                self.utterances.get_nowait()
+            except queue.Empty:
+                pass
+            self.utterances.put_nowait(text)
+
+    def start_background(self, phrase_time_limit=None):
+        """Start continuous capture; recognized text lands in self.utterances."""
+        if self._stop_background is not None:
+            return
+        source = self._get_source()
+        if not self.calibrated:
+            with source:
+                self.calibrate(source)
+        self._stop_background = self.recognizer.listen_in_background(
+            source, self._on_phrase, phrase_time_limit=phrase_time_limit
+        )
+
+    def stop_background(self, wait=True):
+        if self._stop_background is not None:
+            self._stop_background(wait_for_stop=wait)
+            self._stop_background = None
+
+    def get_utterance(self, timeout=None):
+        """Next recognized command from background capture, or None on timeout."""
+        try:
+            return self.utterances.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def transcribe_file(self, path, phrase_time_limit=None):
+        """Transcribe every phrase in a WAV/AIFF/FLAC fixture, in order."""
+        results = []
+        with sr.AudioFile(path) as source:
+            while True:
+                audio = self.recognizer.listen(source, phrase_time_limit=phrase_time_limit)
+                if not audio.frame_data:
+                    break
+                text = self._transcribe(audio)
+                if text:
+                    results.append(text)
+                if source.audio_reader.tell() >= source.FRAME_COUNT:
+                    break
+        return results
+
+
+_default_session = None
+
+
+def get_mic_session():
+    """Process-wide MicSession, so repeated commands reuse one microphone."""
+    global _default_session
+    if _default_session is None:
+        _default_session = MicSession()
+    return _default_session
+
+
+def transcribe_from_mic(timeout=None, phrase_time_limit=None, adjust_for_ambient=True, on_partial=None):
+    """
+    Listen to the default microphone and return the transcribed text
+    (Google Web Speech API unless SPEECH_BACKEND selects another backend).
     - timeout: maximum seconds to wait for phrase to start (None = wait indefinitely)
     - phrase_time_limit: maximum seconds for a single phrase (None = unlimited)
-    - adjust_for_ambient: whether to auto-adjust for ambient noise before listening
+    - adjust_for_ambient: calibrate for ambient noise if no calibration is cached yet
+      (or the cached one has drifted)
+    - on_partial: callback for interim hypotheses (streaming backends only)
     Returns the recognized string or None on failure.
     """
-    r = sr.Recognizer()
-    mic = sr.Microphone()  # uses default system microphone
-
-    with mic as source:
-        if adjust_for_ambient:
-            # listen for 0.8s to calibrate energy threshold for ambient noise
-            r.adjust_for_ambient_noise(source, duration=0.8)
-        
-        print("Please speak now...")    
-        try:
-            audio = r.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
-        except sr.WaitTimeoutError:
-            print("No speech detected (timeout).")
-            return None
-
-    try:
-        # Uses Google Web Speech API (requires internet).
-        text = r.recognize_google(audio)
-        return text
-    except sr.UnknownValueError:
-        print("Speech was unintelligible.")
-    except sr.RequestError as e:
-        print(f"Could not request results from Google Speech Recognition service; {e}")
-    return None
+    return get_mic_session().listen_once(
+        timeout=timeout, phrase_time_limit=phrase_time_limit,
+        adjust_for_ambient=adjust_for_ambient, on_partial=on_partial,
+    )
 
 # if __name__ == "__main__":
 #     # Define a time break after the transcription finishes
@@ -1,7 +1,21 @@
-from .draw_shapes import draw_shapes
-from .mspaintdrawer_v2 import ms_paint_tool
-from .calibration import calibrate_tools, calibrate_canvas, load_calibration, automated_calibration	
-from .Mic import transcribe_from_mic	
+import importlib
+import sys
+import types
+
+# Public names are resolved on first access, so importing the package (or a
+# light submodule such as ms_paint.raster) does not pull in pyautogui, OpenCV
+# or speech_recognition until something actually needs them.
+_LAZY_ATTRS = {
+	"draw_shapes": ".draw_shapes",
+	"ms_paint_tool": ".mspaintdrawer_v2",
+	"calibrate_tools": ".calibration",
+	"calibrate_canvas": ".calibration",
+	"load_calibration": ".calibration",
+	"automated_calibration": ".calibration",
+	"get_calibration": ".calibration",
+	"Calibration": ".calibration",
+	"transcribe_from_mic": ".Mic",
+}
 
 __all__ = [
 	"draw_shapes",
@@ -10,6 +24,32 @@ __all__ = [
 	"calibrate_canvas",
 	"load_calibration",
 	"automated_calibration",
-    "transcribe_from_mic",	
+	"get_calibration",
+	"Calibration",
+	"transcribe_from_mic",
 ]
 
+
+def __getattr__(name):
+	module_name = _LAZY_ATTRS.get(name)
+	if module_name is None:
+		raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+	value = getattr(importlib.import_module(module_name, __name__), name)
+	globals()[name] = value
+	return value
+
+
+def __dir__():
+	return sorted(set(globals()) | set(__all__))
+
+
+class _Package(types.ModuleType):
+	def __setattr__(self, name, value):
+		# Importing the ms_paint.draw_shapes submodule must not replace the
+		# draw_shapes function the package exports under the same name.
+		if name in _LAZY_ATTRS and isinstance(value, types.ModuleType):
+			return
+		super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _Package
@@ -1,12 +1,17 @@
 import json
-import pyautogui
-import subprocess
+import tempfile
+import threading
 import time	
 import os
 
-def load_calibration():
+from .driver import get_driver
+
+CALIBRATION_FILE = 'paint_calibration.json'
+
+
+def load_calibration(path=CALIBRATION_FILE):
     try:
-        with open('paint_calibration.json', 'r') as f:
+        with open(path, 'r') as f:
             data = json.load(f)
         return data
     except (FileNotFoundError, json.JSONDecodeError):
@@ -14,6 +19,130 @@ def load_calibration():
         return {}
 
 
+def _write_calibration(data, path=CALIBRATION_FILE):
+	"""Atomically replace the calibration file.
+
+	Writes to a temp file in the same directory, fsyncs it and renames it over
+	the target, so a concurrent reader sees either the old or the new file,
+	never a half-written one.
+	"""
+	directory = os.path.dirname(os.path.abspath(path))
+	fd, tmp_path = tempfile.mkstemp(prefix=".paint_calibration.", suffix=".tmp", dir=directory)
+	try:
+		with os.fdopen(fd, 'w') as f:
+			json.dump(data, f, indent=2)
+			f.flush()
+			os.fsync(f.fileno())
+		os.replace(tmp_path, path)
+	except BaseException:
+		if os.path.exists(tmp_path):
+			os.remove(tmp_path)
+		raise
+	invalidate_calibration_cache()
+
+
+def _save_calibration(tools=None, canvas=None, path=CALIBRATION_FILE):
+	"""Merge new tool positions and/or canvas bounds into the stored file."""
+	existing = load_calibration(path)
+	if isinstance(existing, dict) and ("tools" in existing or "canvas" in existing):
+		to_write = existing
+	elif isinstance(existing, dict) and existing and tools is None:
+		# Legacy file was a flat dict of tools; keep them under "tools"
+		to_write = {"tools": existing}
+	else:
+		# Legacy (or empty) file; migrate to structured format
+		to_write = {}
+	if tools is not None:
+		to_write["tools"] = tools
+	if canvas is not None:
+		to_write["canvas"] = canvas
+	_write_calibration(to_write, path)
+	return to_write
+
+
+# --- Cached, validated calibration ---
+
+def _as_point(value):
+	if isinstance(value, (list, tuple)) and len(value) == 2 and all(isinstance(v, (int, float)) for v in value):
+		return (int(value[0]), int(value[1]))
+	return None
+
+
+class Calibration:
+	"""Validated view of paint_calibration.json with precomputed lookups.
+
+	- tools: {tool_name: (x, y)} screen positions, or None if not calibrated
+	- canvas: the raw {"top_left", "bottom_right"} dict, or None
+	- canvas_bounds: (left, top, right, bottom), or None
+	"""
+
+	__slots__ = ("tools", "canvas", "canvas_bounds", "mtime_ns", "path")
+
+	def __init__(self, tools, canvas, canvas_bounds, mtime_ns=None, path=CALIBRATION_FILE):
+		self.tools = tools
+		self.canvas = canvas
+		self.canvas_bounds = canvas_bounds
+		self.mtime_ns = mtime_ns
+		self.path = path
+
+	@classmethod
+	def from_data(cls, data, mtime_ns=None, path=CALIBRATION_FILE):
+		raw_tools, raw_canvas = _extract_tools_and_canvas(data or None)
+
+		tools = None
+		if isinstance(raw_tools, dict):
+			tools = {}
+			for name, pos in raw_tools.items():
+				point = _as_point(pos)
+				if point is None:
+					print(f"⚠️ Ignoring invalid calibration for tool '{name}': {pos!r}")
+					continue
+				tools[name] = point
+
+		canvas = None
+		bounds = None
+		if isinstance(raw_canvas, dict):
+			tl = _as_point(raw_canvas.get("top_left"))
+			br = _as_point(raw_canvas.get("bottom_right"))
+			if tl and br:
+				canvas = {"top_left": list(tl), "bottom_right": list(br)}
+				bounds = (min(tl[0], br[0]), min(tl[1], br[1]), max(tl[0], br[0]), max(tl[1], br[1]))
+			else:
+				print(f"⚠️ Ignoring invalid canvas calibration: {raw_canvas!r}")
+
+		return cls(tools, canvas, bounds, mtime_ns, path)
+
+
+_calibration_cache = {}
+_calibration_lock = threading.Lock()
+
+
+def get_calibration(path=CALIBRATION_FILE):
+	"""Return the cached Calibration for `path`, reloading only if the file changed."""
+	key = os.path.abspath(path)
+	try:
+		stat = os.stat(path)
+		stamp = (stat.st_mtime_ns, stat.st_size)
+	except FileNotFoundError:
+		stamp = None
+
+	with _calibration_lock:
+		cached = _calibration_cache.get(key)
+		if cached is not None and cached[0] == stamp:
+			return cached[1]
+
+	data = load_calibration(path) if stamp is not None else {}
+	calib = Calibration.from_data(data, stamp[0] if stamp else None, path)
+	with _calibration_lock:
+		_calibration_cache[key] = (stamp, calib)
+	return calib
+
+
+def invalidate_calibration_cache():
+	with _calibration_lock:
+		_calibration_cache.clear()
+
+
 def _extract_tools_and_canvas(calibration_data):
 	"""Return (tools_dict, canvas_dict_or_None) from loaded calibration data.
 
@@ -26,6 +155,12 @@ def _extract_tools_and_canvas(calibration_data):
 	return calibration_data, None
 
 
+def _record_signatures(driver=None):
+	"""Paint is on screen and matches the file: retake the drift signatures."""
+	from .drift import DriftMonitor
+	DriftMonitor(driver).record(get_calibration(), driver)
+
+
 def calibrate_tools():
 	"""
 	Interactive calibration tool to find exact positions of Paint tools.
@@ -53,21 +188,13 @@ def calibrate_tools():
 			print(f"Skipped {tool}")
 			continue
 		
-		pos = pyautogui.position()
-		calibrated_positions[tool] = (pos.x, pos.y)
-		print(f"  → {tool}: {pos.x}, {pos.y}")
+		x, y = get_driver().position()
+		calibrated_positions[tool] = (x, y)
+		print(f"  → {tool}: {x}, {y}")
 	
 	# Save to file (merge with existing, store under "tools")
-	existing = load_calibration()
-	if isinstance(existing, dict) and ("tools" in existing or "canvas" in existing):
-		existing["tools"] = calibrated_positions
-		to_write = existing
-	else:
-		# Legacy file was a flat dict of tools; migrate to structured format
-		to_write = {"tools": calibrated_positions}
-		
-	with open('paint_calibration.json', 'w') as f:
-		json.dump(to_write, f, indent=2)
+	_save_calibration(tools=calibrated_positions)
+	_record_signatures()
 	
 	print("\n✓ Calibration saved to 'paint_calibration.json'")
 	print("The script will now use these positions automatically.")
@@ -86,26 +213,17 @@ def calibrate_canvas():
 	input("Press Enter when Paint is open and ready...")
 
 	input("Hover at TOP-LEFT inside canvas and press Enter...")
-	tl = pyautogui.position()
-	print(f"  → top_left: {tl.x}, {tl.y}")
+	tl = get_driver().position()
+	print(f"  → top_left: {tl[0]}, {tl[1]}")
 
 	input("Hover at BOTTOM-RIGHT inside canvas and press Enter...")
-	br = pyautogui.position()
-	print(f"  → bottom_right: {br.x}, {br.y}")
+	br = get_driver().position()
+	print(f"  → bottom_right: {br[0]}, {br[1]}")
 
-	canvas = {"top_left": [tl.x, tl.y], "bottom_right": [br.x, br.y]}
+	canvas = {"top_left": [tl[0], tl[1]], "bottom_right": [br[0], br[1]]}
 
-	existing = load_calibration()
-	if isinstance(existing, dict) and ("tools" in existing or "canvas" in existing):
-		existing["canvas"] = canvas
-		to_write = existing
-	elif isinstance(existing, dict):
-		to_write = {"tools": existing, "canvas": canvas}
-	else:
-		to_write = {"canvas": canvas}
-
-	with open('paint_calibration.json', 'w') as f:
-		json.dump(to_write, f, indent=2)
+	_save_calibration(canvas=canvas)
+	_record_signatures()
 
 	print("\n✓ Canvas calibration saved to 'paint_calibration.json'")
 	return canvas
@@ -123,11 +241,11 @@ def get_tool_coordinates(image_file):
     try:
         # Locate the image and return the Box object
         # confidence=0.85 allows for minor visual differences
-        location = pyautogui.locateOnScreen(image_file, confidence=0.85)
+        center = get_driver().locate_on_screen(image_file, confidence=0.85)
         
-        if location:
+        if center:
             # Return the coordinates of the center of the found image
-            return pyautogui.center(location)
+            return center
         else:
             print(f"Tool '{image_file}' not found on screen.")
             return None
@@ -144,7 +262,7 @@ def automated_calibration():
     print("This will help you find the exact positions of Paint tools on your screen.")
     print("\nInstructions:")
     print("1. The script will open MS Paint automatically.")
-    print("2. It will then attempt to locate and click each tool based on provided images.")
+    print("2. It will then attempt to locate each tool based on provided images.")
     print("3. Ensure that the tool images are clear and visible on the screen.\n")
     
     input("Press Enter to start the automated calibration...")
@@ -152,45 +270,42 @@ def automated_calibration():
     # 2. OPEN MS PAINT
     print("Attempting to open MS Paint...")
     try:
-        subprocess.Popen('mspaint')
-        time.sleep(3)
+        driver = get_driver()
+        driver.launch('mspaint')
+        driver.sleep(3)
         print("MS Paint opened. Proceeding to locate the Pencil tool.")
     except FileNotFoundError:
         print("ERROR: 'mspaint' command not found. Ensure you are on a Windows machine or adjust the command for your OS.")
         exit()
 
-    # 3. LOCATE AND CLICK EACH TOOL
+    # 3. LOCATE EVERY TOOL AND CANVAS CORNER IN ONE SCREENSHOT
+    from .locate import locate_from_store
+
     tools_to_calibrate = [
         "pencil", "brush", "fill",       # paint tools
         "line", "rectangle", "triangle", "circle",  # basic shapes
         "diamond", "right_triangle", "polygon"      # advanced shapes
     ]
+    # Canvas corners come from Tool_PNG/Top_left.png and Bottom_right.png
+    names = tools_to_calibrate + ["top_left", "bottom_right"]
+
+    started = time.perf_counter()
+    found = locate_from_store(names)
+    print(f"Searched {len(names)} templates in {time.perf_counter() - started:.2f}s")
 
     calibrated_positions = {}
     Failed_Tools = []
 
     for tool in tools_to_calibrate:
-        IMAGE_FILE = f'./Tool_PNG/{tool}.png'
-        coords = get_tool_coordinates(IMAGE_FILE)
+        coords = found.get(tool)
         if coords:
-            pyautogui.click(coords)
-            print(f"✅ Success! {tool.capitalize()} clicked at: {coords}")
-            calibrated_positions[tool] = (int(coords.x), int(coords.y))
-            time.sleep(1)  # Brief pause between clicks
+            print(f"✅ Success! {tool.capitalize()} found at: {coords}")
+            calibrated_positions[tool] = coords
         else:
             Failed_Tools.append(tool)
 
     # 4. SAVE CALIBRATION
-    existing = load_calibration()
-    if isinstance(existing, dict) and ("tools" in existing or "canvas" in existing):
-        existing["tools"] = calibrated_positions
-        to_write = existing
-    else:
-        # Legacy file was a flat dict of tools; migrate to structured format
-        to_write = {"tools": calibrated_positions}
-		
-    with open('paint_calibration.json', 'w') as f:
-        json.dump(to_write, f, indent=2)
+    _save_calibration(tools=calibrated_positions)
 
     print("\n✓ Calibration saved to 'paint_calibration.json'")
     print("The script will now use these positions automatically.")
@@ -203,28 +318,16 @@ def automated_calibration():
           print("\nAll tools were calibrated successfully!")
     print("\n=== MS PAINT CANVAS CALIBRATION ===")
     print("This will record the drawing page bounds so shapes stay inside it.")
-    TOP_LEFT_IMAGE = './Tool_PNG/Top_left.png'
-    BOTTOM_RIGHT_IMAGE = './Tool_PNG/Bottom_right.png'
 
-    print("Locating Top-Left corner of canvas...")
-    tl = get_tool_coordinates(TOP_LEFT_IMAGE)
-    
-    print("Locating Bottom-Right corner of canvas...")
-    br = get_tool_coordinates(BOTTOM_RIGHT_IMAGE)
-    # tl=int(top_left_coords.x), int(top_left_coords.y)
-    # br=int(bottom_right_coords.x), int(bottom_right_coords.y)		
+    tl = found.get("top_left")
+    br = found.get("bottom_right")
 
     if tl and br:
-        canvas = {"top_left": [int(tl.x), int(tl.y)], "bottom_right": [int(br.x), int(br.y)]}
-        existing = load_calibration()
-        if isinstance(existing, dict) and ("tools" in existing or "canvas" in existing):
-            existing["canvas"] = canvas
-            to_write = existing
-        elif isinstance(existing, dict):
-            to_write = {"tools": existing, "canvas": canvas}
-        else:
-            to_write = {"canvas": canvas}
-        with open('paint_calibration.json', 'w') as f:
-            json.dump(to_write, f, indent=2)
+        canvas = {"top_left": list(tl), "bottom_right": list(br)}
+        _save_calibration(canvas=canvas)
         print(f"Canvas corners located in {canvas} and saved.")
-        print("\n✓ Canvas calibration saved to 'paint_calibration.json'")
\ No newline at end of file
+        print("\n✓ Canvas calibration saved to 'paint_calibration.json'")
+    else:
+        print("⚠️ Canvas corners could not be located. Run the canvas calibration manually.")
+
+    _record_signatures(driver)
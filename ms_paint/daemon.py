@@ -0,0 +1,401 @@
+import argparse
+import heapq
+import itertools
+import json
+import math
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .calibration import get_calibration
+
+# daemon.py
+# Resident drawing service. Every draw_shapes call used to launch Paint,
+# focus it by title and wait ~3 s before the first stroke. The daemon owns one
+# Paint window (reused if already open), one loaded calibration and one
+# backend, whose active tool carries over between scenes, and draws shape-list
+# jobs from a local HTTP endpoint in priority order on a single drawing thread
+# (pyautogui is not thread-safe):
+#
+#   POST   /jobs          {"shapes": [...], "priority": 0, "verify": false, "label": "..."}
+#   GET    /jobs          every job, newest first
+#   GET    /jobs/<id>     status and timing; ?wait=SECONDS (at most 60) blocks until it ends
+#   DELETE /jobs/<id>     cancel (a running job stops before its next shape)
+#   GET    /status        queue length, current job, totals
+#
+#   python -m ms_paint.daemon [--port 8765] [--backend paint|raster]
+#
+# Clients (main.py --daemon, batch --backend daemon) use DaemonClient. Scenes
+# are drawn onto the same canvas, as in a session; the daemon does not clear it.
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DAEMON_ENV = "PAINT_DAEMON"    # URL of a running daemon, for clients
+# Finished jobs kept for status queries before the oldest are forgotten.
+MAX_FINISHED_JOBS = 1000
+# Longest ?wait= a request may block a handler thread; clients poll for more.
+MAX_WAIT = 60.0
+FINAL_STATES = ("done", "failed", "cancelled")
+
+
+def default_url():
+    return os.getenv(DAEMON_ENV, "").strip() or f"http://{DEFAULT_HOST}:{DEFAULT_PORT}"
+
+
+class Job:
+    """One queued scene and its status / timing."""
+
+    def __init__(self, job_id, shapes, priority=0, verify=False, label=None):
+        self.id = job_id
+        self.shapes = shapes
+        self.priority = priority
+        self.verify = verify
+        self.label = label
+        self.status = "queued"
+        self.error = None
+        self.output = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.cancel_event = threading.Event()
+        self.ended = threading.Event()
+
+    def to_dict(self):
+        now = time.time()
+        started = self.started or (None if self.status == "queued" else self.finished)
+        row = {
+            "id": self.id, "label": self.label, "status": self.status, "priority": self.priority,
+            "shape_count": len(self.shapes), "verify": self.verify,
+            "queued_s": round((started or now) - self.submitted, 3),
+        }
+        if self.started is not None:
+            row["draw_s"] = round((self.finished or now) - self.started, 3)
+        if self.finished is not None:
+            row["total_s"] = round(self.finished - self.submitted, 3)
+        if self.error:
+            row["error"] = self.error
+        if self.output:
+            row["output"] = self.output
+        return row
+
+
+class DrawingDaemon:
+    """Priority job queue in front of one drawing backend.
+
+    - backend: "paint" (one persistent PaintBackend) or "raster" (a PNG per
+      job in output_dir, for machines without a display)
+    - calibration: a calibration.Calibration (default: paint_calibration.json,
+      reloaded only when the file changes)
+    Higher priorities are drawn first; equal priorities in submission order.
+    """
+
+    def __init__(self, backend="paint", calibration=None, output_dir="daemon_output", pacer=None):
+        self.backend_name = backend
+        self.output_dir = output_dir
+        self._calibration = calibration
+        self._backend = None
+        self._pacer = pacer
+        self._jobs = {}
+        self._heap = []
+        self._ids = itertools.count(1)
+        self._order = itertools.count()
+        self._current = None
+        self._counts = {"done": 0, "failed": 0, "cancelled": 0}
+        self._busy_s = 0.0
+        self._started = time.time()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._stopping = False
+        self._worker = None
+
+    # --- drawing side ---
+
+    def calibration(self):
+        calib = self._calibration or get_calibration()
+        if calib.tools is None or calib.canvas_bounds is None:
+            raise ValueError("No calibration found. Calibrate tool positions and canvas bounds first.")
+        return calib
+
+    def _make_backend(self):
+        if self.backend_name == "raster":
+            from .raster import RasterBackend
+            return RasterBackend()
+        if self._backend is None:
+            from .draw_shapes import PaintBackend
+            from .drift import DriftMonitor
+            self._backend = PaintBackend(pacer=self._pacer, drift=DriftMonitor())
+        return self._backend
+
+    def _run(self, job):
+        from .draw_shapes import draw_shapes
+
+        backend = self._make_backend()
+        ok = draw_shapes(job.shapes, backend=backend, calibration=self.calibration(),
+                         cancel_event=job.cancel_event, verify=job.verify)
+        if self.backend_name == "raster" and ok:
+            os.makedirs(self.output_dir, exist_ok=True)
+            job.output = os.path.join(self.output_dir, f"job_{job.id}.png")
+            backend.save(job.output)
+        return ok
+
+    def _next_job(self):
+        with self._wakeup:
+            while not self._stopping:
+                while self._heap:
+                    _, _, job = heapq.heappop(self._heap)
+                    if job.status == "queued":
+                        job.status = "drawing"
+                        job.started = time.time()
+                        self._current = job
+                        return job
+                self._wakeup.wait()
+            return None
+
+    def _work(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            try:
+                ok = self._run(job)
+                status = "cancelled" if job.cancel_event.is_set() else ("done" if ok else "failed")
+                if status == "failed":
+                    job.error = "drawing failed (see the daemon log)"
+            except Exception as e:
+                status, job.error = "failed", f"{type(e).__name__}: {e}"
+            with self._lock:
+                job.status = status
+                job.finished = time.time()
+                self._counts[status] += 1
+                self._busy_s += job.finished - job.started
+                self._current = None
+                self._forget_old()
+            job.ended.set()
+            print(f"Job {job.id} {status} in {job.finished - job.started:.1f}s "
+                  f"({len(job.shapes)} shapes, queued {job.started - job.submitted:.1f}s).")
+
+    def _forget_old(self):
+        finished = [job for job in self._jobs.values() if job.status in FINAL_STATES]
+        for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job.id]
+
+    def start(self):
+        """Start the drawing thread (serve() does this itself)."""
+        if self._worker is None:
+            self.calibration()  # fail at startup, not on the first job
+            self._worker = threading.Thread(target=self._work, name="drawing-daemon", daemon=True)
+            self._worker.start()
+        return self
+
+    def stop(self, wait=True):
+        with self._wakeup:
+            self._stopping = True
+            if self._current is not None:
+                self._current.cancel_event.set()
+            self._wakeup.notify_all()
+        if wait and self._worker is not None:
+            self._worker.join()
+
+    # --- job API (thread-safe; used by the HTTP handler) ---
+
+    def submit(self, shapes, priority=0, verify=False, label=None):
+        if not isinstance(shapes, list):
+            raise ValueError("'shapes' must be a list of shape objects.")
+        with self._wakeup:
+            job = Job(next(self._ids), shapes, int(priority), bool(verify), label)
+            self._jobs[job.id] = job
+            heapq.heappush(self._heap, (-job.priority, next(self._order), job))
+            self._wakeup.notify()
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINAL_STATES:
+                return job
+            job.cancel_event.set()
+            if job.status == "queued":
+                job.status = "cancelled"
+                job.finished = time.time()
+                self._counts["cancelled"] += 1
+                job.ended.set()
+        return job
+
+    def jobs(self):
+        with self._lock:
+            return [job.to_dict() for job in sorted(self._jobs.values(), key=lambda j: j.id, reverse=True)]
+
+    def status(self):
+        with self._lock:
+            queued = sum(1 for job in self._jobs.values() if job.status == "queued")
+            current = self._current.to_dict() if self._current is not None else None
+            return {
+                "backend": self.backend_name, "queued": queued, "current": current,
+                "uptime_s": round(time.time() - self._started, 1), "busy_s": round(self._busy_s, 1),
+                **self._counts,
+            }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "PaintDaemon/1"
+
+    @property
+    def drawing(self):
+        return self.server.drawing
+
+    def log_message(self, format, *args):
+        pass  # one line per job is printed by the drawing thread instead
+
+    def _send(self, code, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _job_path(self):
+        """(job id, query) for /jobs/<id>[?query], else (None, query)."""
+        path, _, query = self.path.partition("?")
+        parts = [p for p in path.split("/") if p]
+        if len(parts) == 2 and parts[0] == "jobs" and parts[1].isdigit():
+            return int(parts[1]), dict(p.partition("=")[::2] for p in query.split("&") if p)
+        return None, {}
+
+    def do_GET(self):
+        path = self.path.partition("?")[0].rstrip("/")
+        if path == "/status":
+            return self._send(200, self.drawing.status())
+        if path == "/jobs":
+            return self._send(200, self.drawing.jobs())
+        job_id, query = self._job_path()
+        job = self.drawing.get(job_id) if job_id is not None else None
+        if job is None:
+            return self._send(404, {"error": "no such job"})
+        if "wait" in query:
+            try:
+                wait = float(query["wait"] or 0)
+            except ValueError:
+                wait = math.nan
+            if not math.isfinite(wait) or wait < 0:
+                return self._send(400, {"error": f"wait must be a number of seconds, got {query['wait']!r}"})
+            job.ended.wait(min(wait, MAX_WAIT))
+        self._send(200, job.to_dict())
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/jobs":
+            return self._send(404, {"error": "not found"})
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            job = self.drawing.submit(body.get("shapes"), body.get("priority", 0),
+                                     body.get("verify", False), body.get("label"))
+        except (ValueError, TypeError, AttributeError) as e:
+            return self._send(400, {"error": str(e)})
+        self._send(202, job.to_dict())
+
+    def do_DELETE(self):
+        job_id, _ = self._job_path()
+        job = self.drawing.cancel(job_id) if job_id is not None else None
+        if job is None:
+            return self._send(404, {"error": "no such job"})
+        self._send(200, job.to_dict())
+
+
+def make_server(daemon, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """HTTP server for `daemon` (port 0 picks a free port); call serve_forever()."""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.drawing = daemon
+    return server
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, backend="paint", output_dir="daemon_output"):
+    daemon = DrawingDaemon(backend=backend, output_dir=output_dir).start()
+    server = make_server(daemon, host, port)
+    print(f"Drawing daemon ({backend}) listening on http://{host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping the drawing daemon.")
+    finally:
+        server.server_close()
+        daemon.stop()
+
+
+class DaemonClient:
+    """Submits shape lists to a running daemon (default: $PAINT_DAEMON or localhost:8765)."""
+
+    def __init__(self, url=None, timeout=10.0):
+        self.url = (url or default_url()).rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, method, path, body=None, timeout=None):
+        data = None if body is None else json.dumps(body).encode("utf-8")
+        request = urllib.request.Request(self.url + path, data=data, method=method,
+                                         headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=timeout or self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            detail = json.loads(e.read() or b"{}").get("error", e.reason)
+            raise ValueError(f"Drawing daemon: {detail}") from None
+
+    def available(self):
+        try:
+            self.status()
+            return True
+        except (OSError, ValueError):
+            return False
+
+    def status(self):
+        return self._request("GET", "/status")
+
+    def submit(self, shapes, priority=0, verify=False, label=None):
+        """Queue `shapes`; returns the job's status dict (with its "id")."""
+        return self._request("POST", "/jobs", {"shapes": shapes, "priority": priority,
+                                               "verify": verify, "label": label})
+
+    def job(self, job_id):
+        return self._request("GET", f"/jobs/{job_id}")
+
+    def cancel(self, job_id):
+        return self._request("DELETE", f"/jobs/{job_id}")
+
+    def wait(self, job_id, timeout=None, poll=30.0):
+        """Block until the job ends (or `timeout` seconds pass); returns its status."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            step = poll if deadline is None else max(0.0, min(poll, deadline - time.monotonic()))
+            job = self._request("GET", f"/jobs/{job_id}?wait={step:g}", timeout=step + self.timeout)
+            if job["status"] in FINAL_STATES or (deadline is not None and time.monotonic() >= deadline):
+                return job
+
+    def draw(self, shapes, priority=0, verify=False, label=None, timeout=None):
+        """Submit and wait; True if the job was drawn. Stands in for draw_shapes()."""
+        job = self.wait(self.submit(shapes, priority, verify, label)["id"], timeout)
+        if job["status"] != "done":
+            print(f"Daemon job {job['id']} {job['status']}: {job.get('error', '')}".rstrip(": "))
+        return job["status"] == "done"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident drawing service for MS Paint.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--backend", choices=["paint", "raster"], default="paint",
+                        help="draw in MS Paint, or render each job to a PNG")
+    parser.add_argument("--output-dir", default="daemon_output", help="where --backend raster writes PNGs")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.backend, args.output_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,33 @@
-import time
-import pyautogui
+import queue
+import threading
+
+import numpy as np
 
 # NOTE: Assuming these imports work correctly in your environment
-from .calibration import load_calibration, _extract_tools_and_canvas 
-from .paint import open_ms_paint, focus_paint_window, click_tool
+from .calibration import get_calibration
+from .driver import get_driver
+from .drift import DriftMonitor
+from .paint import ensure_paint_window, click_tool
+from .planner import plan_strokes, describe_plan, tool_for
+from .optimize import optimize_scene, describe_optimization
+from .metrics import span, timed, progress
+from .transform import (
+    CoordinateTransform, TransformedScene, transform_shapes, drawable_only, describe_flags, flag_names, SKIP_MASK,
+)
+from .simplify import simplify_path, simplify_scene, DEFAULT_TOLERANCE
+from .verify import REPAIR_ROUNDS, capture_canvas, scene_shapes, verify_scene
+
+# Consecutive polygon clicks closer than this (pixels) can register as a
+# double-click, which closes the polygon early; such vertices are skipped.
+POLYGON_MIN_SPACING = 4
 
 
 def _get_canvas_bounds(canvas):
     if not canvas:
         return None
+    if isinstance(canvas, tuple) and len(canvas) == 4:
+        # Already precomputed, e.g. Calibration.canvas_bounds
+        return canvas
     try:
         x1, y1 = canvas["top_left"]
         x2, y2 = canvas["bottom_right"]
@@ -19,129 +38,296 @@ def _get_canvas_bounds(canvas):
         return None
 
 
-def _clamp_point(x, y, canvas_bounds):
-    if not canvas_bounds:
-        return int(x), int(y)
-    x1, y1, x2, y2 = canvas_bounds
-    # Coordinates in the JSON are 0-1000 and 0-500. 
-    # They are CLAMPED RELATIVE to the canvas top_left corner (x1, y1).
-    print(f"Clamping point: {x}, {y} to canvas bounds: {x1}, {y1}, {x2}, {y2}")
-
-    # Calculate the actual screen coordinate
-    # For now, we will simply use the relative calculation as defined in the original code,
-    # assuming the AI's coordinates (0-1000) need to be mapped/scaled, but the
-    # original code only adds the top_left offset. This is kept for consistency.
-    cx = x1 + x
-    cy = y1 + y
-    
-    # Ensure point is within the *actual* canvas screen bounds
-    cx = max(x1, min(cx, x2))
-    cy = max(y1, min(cy, y2))
-
-
-    return cx, cy
-
-
-def _moveTo_clamped(x, y, canvas_bounds):
-    cx, cy = _clamp_point(x, y, canvas_bounds)
-    print(f"Moving to: {cx}, {cy}")
-    pyautogui.moveTo(cx, cy)
-    return cx, cy
-
-
-def _drag_from_current_to_clamped(start_x, start_y, end_x, end_y, canvas_bounds, move_duration=0.3, button='left'):
+def _drag_from_current_to_clamped(start_x, start_y, end_x, end_y, canvas_bounds, move_duration=0.3, button='left', focus=True, driver=None):
     """
     Works reliably for all shape tools in MS Paint.
     Ensures:
-      - Canvas is focused
+      - Canvas is focused (skip with focus=False when it already is)
       - Drawing starts & ends inside canvas
       - Final click commits the shape
     """
 
     # 1. Ensure Paint window is focused (Clicking a point inside the canvas)
     # The original code's approach to focus is used here.
-    pyautogui.click(canvas_bounds[0] + 10, canvas_bounds[1] + 10)
-    time.sleep(0.2)  # allow Paint to focus
+    driver = driver or get_driver()
+    if focus:
+        driver.click(canvas_bounds[0] + 10, canvas_bounds[1] + 10)
+        driver.sleep(0.2)  # allow Paint to focus
 
     # 2. Move to starting point (inside canvas)
     # The original code moves *to* the point, which is fine before mouseDown.
-    pyautogui.moveTo(start_x, start_y)
-    time.sleep(0.1)
+    driver.move_to(start_x, start_y)
+    driver.sleep(0.1)
 
     # 3. Press and drag
-    pyautogui.mouseDown(button=button)
-    pyautogui.moveTo(end_x, end_y, duration=move_duration)
-    pyautogui.mouseUp(button=button)
-    time.sleep(0.2)
+    driver.mouse_down(button=button)
+    driver.move_to(end_x, end_y, duration=move_duration)
+    driver.mouse_up(button=button)
+    driver.sleep(0.2)
 
     # 4. Finalize shape with a click inside it
     # This step is crucial for most MS Paint shapes to commit the drawing.
     mid_x = (start_x + end_x) // 2
     mid_y = (start_y + end_y) // 2
-    pyautogui.moveTo(mid_x, mid_y)
-    pyautogui.click()
-    time.sleep(0.2)
+    driver.move_to(mid_x, mid_y)
+    driver.click()
+    driver.sleep(0.2)
+
+
+# --- DRAWING BACKENDS ---
+
+class PaintBackend:
+    """Draws into a live MS Paint window through the input driver (pyautogui).
+
+    Tracks the active tool so repeated shapes of the same kind skip the
+    toolbar click, and only refocuses the canvas after a tool switch. Pass a
+    pacing.Pacer to confirm each step on screen instead of fixed sleeps, and a
+    drift.DriftMonitor to check the calibration against the screen before
+    each scene.
+    """
+
+    def __init__(self, pacer=None, driver=None, drift=None):
+        self.pacer = pacer
+        self.driver = driver or (pacer.driver if pacer is not None else get_driver())
+        self.drift = drift
+        self.active_tool = None
+        self._needs_focus = True
+
+    def prepare(self, canvas_bounds):
+        # Reuse an open Paint window; launch Paint only when there is none.
+        if ensure_paint_window(self.driver) is None:
+            print("Please click on the Paint window and run again")
+            return False
+        self._needs_focus = True
+
+        print("Starting to draw shapes...")
+        return True
+
+    def check_calibration(self, calibration):
+        """The calibration to draw with, re-located if Paint has moved."""
+        if self.drift is None:
+            return calibration
+        return self.drift.check(calibration, self.driver)
+
+    def select_tool(self, tool_name, positions):
+        if tool_name == self.active_tool:
+            return
+        if click_tool(tool_name, positions, pacer=self.pacer, driver=self.driver):
+            self.active_tool = tool_name
+            self._needs_focus = True
+        if self.pacer is None:
+            self.driver.sleep(0.1)
+
+    def drag(self, tool_name, start, end, canvas_bounds=None):
+        if self.pacer is not None:
+            self.pacer.drag(start, end, canvas_bounds, focus=self._needs_focus)
+            self._needs_focus = False
+            return
+        start_cx, start_cy = start
+        end_cx, end_cy = end
+        # Move to starting point (needed before drag)
+        self.driver.move_to(start_cx, start_cy)
+        _drag_from_current_to_clamped(
+            start_cx, start_cy, end_cx, end_cy, canvas_bounds,
+            move_duration=0.4, focus=self._needs_focus, driver=self.driver,
+        )
+        self._needs_focus = False
+
+    def stroke(self, tool_name, points, canvas_bounds=None):
+        """Freehand stroke through screen `points` (pencil / brush).
+
+        Pressing the button on the canvas focuses it, and a focus click would
+        leave a dot with these tools, so none is made; nothing needs committing.
+        """
+        self._needs_focus = False
+        if self.pacer is not None:
+            self.pacer.stroke(points, canvas_bounds)
+            return
+        driver = self.driver
+        driver.move_to(*points[0])
+        driver.sleep(0.1)
+        driver.mouse_down()
+        for x, y in points[1:]:
+            driver.move_to(x, y)
+        driver.mouse_up()
+        driver.sleep(0.2)
+
+    def polygon(self, tool_name, points, canvas_bounds=None):
+        """Polygon tool: drag the first edge, click each further vertex, then
+        click the first vertex again to close the outline."""
+        points = _spaced_vertices(points)
+        if self.pacer is not None:
+            self.pacer.polygon(points, canvas_bounds, focus=self._needs_focus)
+            self._needs_focus = False
+            return
+        driver = self.driver
+        if self._needs_focus:
+            driver.click(canvas_bounds[0] + 10, canvas_bounds[1] + 10)
+            driver.sleep(0.2)
+        self._needs_focus = False
+        driver.move_to(*points[0])
+        driver.sleep(0.1)
+        driver.mouse_down()
+        driver.move_to(*points[1], duration=0.2)
+        driver.mouse_up()
+        driver.sleep(0.2)
+        for x, y in points[2:]:
+            driver.click(x, y)
+        driver.click(*points[0])
+        driver.sleep(0.2)
+
+    def capture(self, canvas_bounds):
+        """Screenshot of the canvas region only, for verification."""
+        return capture_canvas(self.driver, canvas_bounds)
+
+    def finish(self):
+        if self.pacer is not None:
+            self.pacer.save()
+        return True
+
+
+def _default_backend():
+    return PaintBackend(drift=DriftMonitor())
 
 
 # --- NEW HELPER FUNCTION TO SIMPLIFY DRAWING ---
 
-def _draw_bounding_box_shape(tool_name, start_x, start_y, end_x, end_y, positions, canvas):
+def _draw_bounding_box_shape(tool_name, start_x, start_y, end_x, end_y, positions, canvas, backend=None):
     """Generic function to draw any shape defined by a bounding box drag."""
-    
-    click_tool(tool_name, positions)
-    time.sleep(0.1)
+    if backend is None:
+        backend = _default_backend()
+
     bounds = _get_canvas_bounds(canvas)
 
-    # Calculate screen coordinates for start and end
-    # Note: The original _moveTo_clamped is used to get the screen coordinates
-    # and also move the mouse to the start point (which is unnecessary but kept for consistency).
-    start_cx, start_cy = _clamp_point(start_x, start_y, bounds)
-    end_cx, end_cy = _clamp_point(end_x, end_y, bounds)
-    
-    # Move to starting point (needed before drag)
-    pyautogui.moveTo(start_cx, start_cy) 
+    # Calculate screen coordinates for start and end (model space -> canvas)
+    if bounds:
+        transform = CoordinateTransform(bounds)
+        start = transform.point(start_x, start_y)
+        end = transform.point(end_x, end_y)
+    else:
+        start, end = (int(start_x), int(start_y)), (int(end_x), int(end_y))
 
-    print(f"Drawing {tool_name} from ({start_cx}, {start_cy}) to ({end_cx}, {end_cy})")
+    _draw_mapped(tool_name, start, end, positions, bounds, backend)
 
-    _drag_from_current_to_clamped(start_cx, start_cy, end_cx, end_cy, bounds, move_duration=0.4)
+
+def _draw_mapped(tool_name, start, end, positions, bounds, backend):
+    """Select the tool and drag between screen points that are already mapped."""
+    start = (int(start[0]), int(start[1]))
+    end = (int(end[0]), int(end[1]))
+    backend.select_tool(tool_name, positions)
+    progress(f"Drawing {tool_name} from {start} to {end}")
+    with span("drag", tool=tool_name):
+        backend.drag(tool_name, start, end, bounds)
+
+
+def _spaced_vertices(points, spacing=POLYGON_MIN_SPACING):
+    """Drop polygon vertices too close to the previous one to click separately."""
+    kept = [points[0]]
+    for x, y in points[1:]:
+        if max(abs(x - kept[-1][0]), abs(y - kept[-1][1])) >= spacing:
+            kept.append((x, y))
+    if len(kept) < 2:
+        kept.append(points[-1])
+    return kept
+
+
+def _stroke_mapped(shape_name, points, positions, bounds, backend):
+    """Select the shape's tool and draw a path through mapped screen points.
+
+    Vertex polygons are clicked out with the polygon tool; every other path
+    is one freehand stroke with its tool (pencil, brush).
+    """
+    tool_name = tool_for(shape_name)
+    points = [(int(x), int(y)) for x, y in points]
+    backend.select_tool(tool_name, positions)
+    progress(f"Drawing {shape_name} through {len(points)} points with the {tool_name}")
+    with span("stroke", tool=tool_name):
+        if shape_name == "polygon":
+            backend.polygon(tool_name, points, bounds)
+        else:
+            backend.stroke(tool_name, points, bounds)
+
+
+def _draw_path_shape(shape_name, points, positions, canvas, backend, tolerance=DEFAULT_TOLERANCE):
+    """Map model-space `points` to the canvas, simplify them and draw the path."""
+    if backend is None:
+        backend = _default_backend()
+    bounds = _get_canvas_bounds(canvas)
+    if bounds:
+        points = CoordinateTransform(bounds).apply_points(points)
+    points = simplify_path(points, tolerance, closed=shape_name == "polygon").round()
+    _stroke_mapped(shape_name, points, positions, bounds, backend)
+
+
+def _draw_scene_shape(scene, i, positions, bounds, backend):
+    if scene.paths[i] is not None:
+        _stroke_mapped(scene.tools[i], scene.paths[i], positions, bounds, backend)
+    else:
+        _draw_mapped(scene.tools[i], scene.screen[i, :2], scene.screen[i, 2:], positions, bounds, backend)
 
 
 # --- PUBLIC DRAWING FUNCTIONS (Using the new helper) ---
 
 # Existing functions redefined to use the helper
-def draw_line(start_x, start_y, end_x, end_y, positions, canvas=None):
-    _draw_bounding_box_shape("line", start_x, start_y, end_x, end_y, positions, canvas)
+def draw_line(start_x, start_y, end_x, end_y, positions, canvas=None, backend=None):
+    _draw_bounding_box_shape("line", start_x, start_y, end_x, end_y, positions, canvas, backend)
 
-def draw_rectangle(start_x, start_y, end_x, end_y, positions, canvas=None):
-    _draw_bounding_box_shape("rectangle", start_x, start_y, end_x, end_y, positions, canvas)
+def draw_rectangle(start_x, start_y, end_x, end_y, positions, canvas=None, backend=None):
+    _draw_bounding_box_shape("rectangle", start_x, start_y, end_x, end_y, positions, canvas, backend)
 
 
 # NEW FUNCTIONS for all other calibrated shapes
-def draw_triangle(start_x, start_y, end_x, end_y, positions, canvas=None):
-    _draw_bounding_box_shape("triangle", start_x, start_y, end_x, end_y, positions, canvas)
+def draw_triangle(start_x, start_y, end_x, end_y, positions, canvas=None, backend=None):
+    _draw_bounding_box_shape("triangle", start_x, start_y, end_x, end_y, positions, canvas, backend)
+
+def draw_circle(start_x, start_y, end_x, end_y, positions, canvas=None, backend=None):
+    _draw_bounding_box_shape("circle", start_x, start_y, end_x, end_y, positions, canvas, backend)
 
-def draw_circle(start_x, start_y, end_x, end_y, positions, canvas=None):
-    _draw_bounding_box_shape("circle", start_x, start_y, end_x, end_y, positions, canvas)
+def draw_diamond(start_x, start_y, end_x, end_y, positions, canvas=None, backend=None):
+    _draw_bounding_box_shape("diamond", start_x, start_y, end_x, end_y, positions, canvas, backend)
 
-def draw_diamond(start_x, start_y, end_x, end_y, positions, canvas=None):
-    _draw_bounding_box_shape("diamond", start_x, start_y, end_x, end_y, positions, canvas)
+def draw_right_triangle(start_x, start_y, end_x, end_y, positions, canvas=None, backend=None):
+    _draw_bounding_box_shape("right_triangle", start_x, start_y, end_x, end_y, positions, canvas, backend)
 
-def draw_right_triangle(start_x, start_y, end_x, end_y, positions, canvas=None):
-    _draw_bounding_box_shape("right_triangle", start_x, start_y, end_x, end_y, positions, canvas)
+def draw_polygon(start_x, start_y, end_x, end_y, positions, canvas=None, backend=None):
+    # A bounding-box drag with the polygon tool only lays down the first edge.
+    # Shapes that give the polygon as "points" are clicked out vertex by
+    # vertex instead (draw_shapes routes them through the mapped path).
+    _draw_bounding_box_shape("polygon", start_x, start_y, end_x, end_y, positions, canvas, backend)
+
+
+# Vertex-list shapes: [[x, y], ...] in model space, simplified before drawing.
+def draw_polyline(points, positions, canvas=None, backend=None):
+    _draw_path_shape("polyline", points, positions, canvas, backend)
+
+def draw_pencil(points, positions, canvas=None, backend=None):
+    _draw_path_shape("pencil", points, positions, canvas, backend)
+
+def draw_brush(points, positions, canvas=None, backend=None):
+    _draw_path_shape("brush", points, positions, canvas, backend)
+
+# Map shape names to their drawing functions
+draw_function_map = {
+    "line": draw_line,
+    "rectangle": draw_rectangle,
+    "triangle": draw_triangle,
+    "circle": draw_circle,
+    "diamond": draw_diamond,
+    "right_triangle": draw_right_triangle,
+    "polygon": draw_polygon,
+    # Vertex-list shapes, drawn freehand (polyline uses the pencil).
+    "polyline": draw_polyline,
+    "pencil": draw_pencil,
+    "brush": draw_brush,
+}
 
-def draw_polygon(start_x, start_y, end_x, end_y, positions, canvas=None):
-    # Note: MS Paint's polygon tool requires more clicks to define vertices, 
-    # but based on your previous JSON, the AI assumes a bounding box drag is sufficient.
-    # The drag operation will start the shape, but may require manual input/a different logic 
-    # for the polygon tool to be completed correctly. We use the same bounding box draw for consistency.
-    _draw_bounding_box_shape("polygon", start_x, start_y, end_x, end_y, positions, canvas)
 
 # --- MAIN DRAW SHAPES FUNCTION (UPDATED) ---
 
-def draw_shapes(shapes_list):
-    # Load or use default calibration
-    calib = load_calibration()
-    positions, canvas = _extract_tools_and_canvas(calib)
+def _load_positions_and_canvas(calibration=None):
+    # Load (or reuse the cached) calibration unless one was passed in
+    calib = calibration or get_calibration()
+    positions, canvas = calib.tools, calib.canvas_bounds
     if positions is None:
         print("No calibration found. Using default positions.")
         print("Run calibrate_tools() first for better accuracy.")
@@ -153,52 +339,305 @@ def draw_shapes(shapes_list):
         print("Using calibrated canvas bounds.")
     else:
         raise ValueError("No canvas calibration found. Set Calibrate canvas bounds first.")
+    return positions, canvas
 
-    # Open MS Paint
-    if not open_ms_paint():
-        return False
 
-    # Focus the Paint window
-    if not focus_paint_window():
-        print("Please click on the Paint window and run again")
+def _reversed_shape(shape):
+    """`shape` drawn from its other end, as planner._order_group flips it."""
+    if "points" in shape:
+        shape = dict(shape, points=list(reversed(shape["points"])))
+    else:
+        shape = dict(shape)
+    for a, b in (("start_x", "end_x"), ("start_y", "end_y")):
+        if a in shape and b in shape:
+            shape[a], shape[b] = shape[b], shape[a]
+    return shape
+
+
+def _plan_scene(scene, positions, active_tool=None):
+    """Plan strokes on the mapped screen coordinates -> (StrokePlan, planned scene).
+
+    The planner sees the same pixels that are drawn and the toolbar positions
+    they are measured against, whatever the transform's fit. Its output is
+    screen-space already, so the scene is rearranged rather than mapped again;
+    shapes it flipped are flipped in the model list too.
+    """
+    proxies = scene_shapes(scene)
+    for i, proxy in enumerate(proxies):
+        proxy["_index"] = i
+    stroke_plan = plan_strokes(proxies, positions, origin=(0, 0), active_tool=active_tool)
+
+    order = [proxy["_index"] for proxy in stroke_plan.shapes]
+    shapes, screen, paths = [], scene.screen[order].copy(), []
+    for row, proxy in enumerate(stroke_plan.shapes):
+        i = proxy["_index"]
+        flipped = proxy is not proxies[i]
+        shapes.append(_reversed_shape(scene.shapes[i]) if flipped else scene.shapes[i])
+        if scene.paths[i] is not None:
+            paths.append(np.asarray(proxy["points"], dtype=np.int64).reshape(-1, 2))
+            screen[row] = (*paths[-1][0], *paths[-1][-1])
+        else:
+            paths.append(None)
+            screen[row] = (proxy["start_x"], proxy["start_y"], proxy["end_x"], proxy["end_y"])
+    planned = TransformedScene(shapes, [scene.tools[i] for i in order], screen, scene.flags[order], paths)
+    return stroke_plan, planned
+
+
+def _check_calibration(backend, calibration, positions, canvas):
+    """Positions and canvas bounds after the backend's drift check, if it has one."""
+    if not hasattr(backend, "check_calibration"):
+        return positions, canvas
+    with span("check_calibration"):
+        checked = backend.check_calibration(calibration)
+    if checked is calibration:
+        return positions, canvas
+    return _load_positions_and_canvas(checked)
+
+
+def _draw_one(i, shape_data, positions, canvas, transform, backend, total="?", simplify=DEFAULT_TOLERANCE,
+              drawn=None):
+    """Map and draw a single shape (streaming path, where shapes arrive one by one).
+
+    Returns False if the shape failed to draw; a shape skipped by validation
+    is not a failure. Mapped drawable shapes are appended to `drawn` (a
+    list), for verification once the stream ends.
+    """
+    scene = transform_shapes([shape_data], canvas, transform, known_tools=draw_function_map)
+    if simplify:
+        scene, _ = simplify_scene(scene, simplify)
+    shape_type = scene.tools[0]
+
+    progress(f"Drawing shape {i+1}/{total}: {shape_type}")
+
+    if scene.flags[0] & SKIP_MASK:
+        print(f"Warning: Skipping shape {i+1} ('{shape_type}'): {flag_names(scene.flags[0])}.")
+        return True
+    if drawn is not None:
+        drawn.append(scene)
+    try:
+        _draw_scene_shape(scene, 0, positions, canvas, backend)
+    except Exception as e:
+        print(f"Error drawing {shape_type}: {e}")
         return False
+    return True
+
 
-    print("Starting to draw shapes...")
-    time.sleep(1)
-    
-    # Map shape names to their new drawing functions
-    draw_function_map = {
-        "line": draw_line,
-        "rectangle": draw_rectangle,
-        "triangle": draw_triangle,
-        "circle": draw_circle,
-        "diamond": draw_diamond,
-        "right_triangle": draw_right_triangle,
-        "polygon": draw_polygon,
-        # Note: pencil and brush are usually single-click/freehand, not bounding box.
-    }
-
-
-    for i, shape_data in enumerate(shapes_list):
-        shape_type = shape_data.get("shape", "").lower()
-        
-        print(f"Drawing shape {i+1}/{len(shapes_list)}: {shape_type}")
-
-        # Check if the shape type is supported and has a function
-        draw_func = draw_function_map.get(shape_type)
-        
-        if draw_func:
+def _join_scenes(scenes):
+    """One TransformedScene from single-shape scenes, in order."""
+    return TransformedScene(
+        [shape for scene in scenes for shape in scene.shapes],
+        [tool for scene in scenes for tool in scene.tools],
+        np.concatenate([scene.screen for scene in scenes]).reshape(-1, 4),
+        np.concatenate([scene.flags for scene in scenes]),
+        [path for scene in scenes for path in scene.paths],
+    )
+
+
+def _verify_and_repair(scene, positions, bounds, backend, cancel_event=None, rounds=REPAIR_ROUNDS):
+    """Check the canvas against the expected rendering; redraw missing shapes only.
+
+    Returns True once every shape is found on the canvas.
+    """
+    total = len(scene.tools)
+    for attempt in range(rounds + 1):
+        with span("verify"):
+            report = verify_scene(backend.capture(bounds), scene, bounds)
+        missing = report.missing
+        if len(missing) == 0:
+            print(f"Verified {total} shapes on the canvas.")
+            return True
+        if attempt == rounds:
+            break
+        print(f"Verification: {len(missing)} of {total} shapes missing; redrawing them.")
+        for i in missing:
+            if _cancelled(cancel_event):
+                return False
             try:
-                draw_func(
-                    shape_data["start_x"], shape_data["start_y"], 
-                    shape_data["end_x"], shape_data["end_y"], 
-                    positions, canvas
-                )
-            except KeyError:
-                print(f"Error: Missing coordinate for shape '{shape_type}' at index {i}.")
+                with span("repair", tool=scene.tools[i]):
+                    _draw_scene_shape(scene, i, positions, bounds, backend)
             except Exception as e:
-                print(f"Error drawing {shape_type}: {e}")
-        else:
-            print(f"Warning: No drawing function found for shape type '{shape_type}'. Skipping.")
+                print(f"Error redrawing {scene.tools[i]}: {e}")
+    names = ", ".join(f"{i+1} ({scene.tools[i]})" for i in missing[:10])
+    print(f"Verification failed: {len(missing)} shapes still missing after {rounds} repair rounds: {names}")
+    return False
+
+
+def _cancelled(cancel_event):
+    if cancel_event is not None and cancel_event.is_set():
+        print("Drawing cancelled.")
+        return True
+    return False
+
+
+@timed("draw_shapes")
+def draw_shapes(shapes_list, backend=None, plan=True, cancel_event=None, transform=None, calibration=None,
+                optimize=True, simplify=DEFAULT_TOLERANCE, verify=False):
+    """Draw model shapes through `backend` (MS Paint via pyautogui by default).
+
+    Pass a `raster.RasterBackend` to render offscreen instead, e.g. on a
+    machine without a display. With optimize=True duplicate, degenerate and
+    hidden shapes are dropped first and line chains become single pencil
+    strokes (see optimize.py). With plan=True the shapes are first grouped by
+    tool and reordered to cut toolbar trips and cursor travel. Every shape is
+    then mapped to screen coordinates in one pass (`transform`, a
+    transform.CoordinateTransform, defaults to an aspect-preserving fit of the
+    0-1000 x 0-500 model space); degenerate and invalid shapes are skipped.
+    Vertex-list shapes (polygon with "points", pencil, brush) are simplified
+    to within `simplify` screen pixels (None keeps every vertex).
+    With verify=True the canvas is captured afterwards and compared with the
+    expected rendering, and only the shapes found missing are redrawn (see
+    verify.py). Returns False if a shape failed to draw (or is still missing).
+    Setting `cancel_event` (a threading.Event) stops drawing before the next shape.
+    `calibration` (a calibration.Calibration) replaces paint_calibration.json.
+    """
+    if backend is None:
+        backend = _default_backend()
+
+    calibration = calibration or get_calibration()
+    positions, canvas = _load_positions_and_canvas(calibration)
+
+    # Paint has to be on screen before its calibration can be checked.
+    with span("prepare"):
+        if not backend.prepare(canvas):
+            return False
+    positions, canvas = _check_calibration(backend, calibration, positions, canvas)
+
+    bounds = canvas
+    if optimize:
+        with span("optimize"):
+            shapes_list, report = optimize_scene(shapes_list, polygons="polygon" in positions)
+        print(describe_optimization(report))
+
+    # Screen coordinates for the whole scene, before any mouse movement.
+    with span("transform"):
+        scene = transform_shapes(shapes_list, bounds, transform, known_tools=draw_function_map)
+    print(describe_flags(scene))
+    scene = drawable_only(scene)
+
+    if plan:
+        with span("plan"):
+            stroke_plan, scene = _plan_scene(scene, positions, getattr(backend, "active_tool", None))
+        print(describe_plan(stroke_plan))
+
+    if simplify:
+        with span("simplify"):
+            scene, (before, after) = simplify_scene(scene, simplify)
+        if before:
+            print(f"Simplified paths: {before} -> {after} points ({simplify:g}px tolerance).")
+
+    total = len(scene.shapes)
+    failed = []
+    for i, tool_name in enumerate(scene.tools):
+        if _cancelled(cancel_event):
+            backend.finish()
+            return False
+        progress(f"Drawing shape {i+1}/{total}: {tool_name}")
+        try:
+            _draw_scene_shape(scene, i, positions, bounds, backend)
+        except Exception as e:
+            print(f"Error drawing {tool_name}: {e}")
+            failed.append(i)
+
+    if verify and hasattr(backend, "capture"):
+        drawn = _verify_and_repair(scene, positions, bounds, backend, cancel_event)
+    else:
+        if verify:
+            print(f"{type(backend).__name__} cannot capture the canvas; skipping verification.")
+        drawn = not failed
+        if failed:
+            print(f"{len(failed)} of {total} shapes failed to draw.")
+
+    with span("finish"):
+        return backend.finish() and drawn
 
-    return True
\ No newline at end of file
+
+_STREAM_END = object()
+
+
+@timed("draw_shapes_streaming")
+def draw_shapes_streaming(shapes_iterable, backend=None, queue_size=64, cancel_event=None, transform=None,
+                          calibration=None, simplify=DEFAULT_TOLERANCE, verify=False):
+    """Draw shapes while they are still being produced.
+
+    `shapes_iterable` (e.g. models.gemini.generate_stream) is consumed on a
+    producer thread and handed over through a bounded queue, so shape 1 is
+    drawn while the model is still emitting later ones. Shapes are drawn in
+    arrival order; the backend still skips redundant tool clicks. An error
+    raised by the producer is re-raised here once the queue has drained.
+    Setting `cancel_event` stops drawing before the next shape. With
+    verify=True the canvas is checked once the stream ends and missing shapes
+    are redrawn, as in draw_shapes. Returns False if a shape failed to draw
+    (or is still missing).
+    """
+    if backend is None:
+        backend = _default_backend()
+
+    calibration = calibration or get_calibration()
+    positions, canvas = _load_positions_and_canvas(calibration)
+
+    shape_queue = queue.Queue(maxsize=queue_size)
+    failure = []
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for shape_data in shapes_iterable:
+                if stop.is_set() or (cancel_event is not None and cancel_event.is_set()):
+                    break
+                shape_queue.put(shape_data)
+        except Exception as e:
+            failure.append(e)
+        finally:
+            shape_queue.put(_STREAM_END)
+
+    def abandon():
+        # Stop the producer and free a slot in case it is blocked on a full queue.
+        stop.set()
+        while not shape_queue.empty():
+            shape_queue.get_nowait()
+
+    producer = threading.Thread(target=produce, name="shape-producer", daemon=True)
+    producer.start()
+
+    # Open Paint while the model is still thinking.
+    try:
+        with span("prepare"):
+            if not backend.prepare(canvas):
+                abandon()
+                return False
+        positions, canvas = _check_calibration(backend, calibration, positions, canvas)
+    except BaseException:
+        abandon()
+        raise
+    if transform is None:
+        transform = CoordinateTransform(canvas)
+
+    i = 0
+    failed = []
+    drawn = []
+    while True:
+        shape_data = shape_queue.get()
+        if shape_data is _STREAM_END:
+            break
+        if _cancelled(cancel_event):
+            abandon()
+            backend.finish()
+            return False
+        if not _draw_one(i, shape_data, positions, canvas, transform, backend, simplify=simplify, drawn=drawn):
+            failed.append(i)
+        i += 1
+
+    producer.join()
+    if failure:
+        backend.finish()
+        raise failure[0]
+    if verify and hasattr(backend, "capture") and drawn:
+        ok = _verify_and_repair(_join_scenes(drawn), positions, canvas, backend, cancel_event)
+    else:
+        if verify and drawn:
+            print(f"{type(backend).__name__} cannot capture the canvas; skipping verification.")
+        ok = not failed
+        if failed:
+            print(f"{len(failed)} of {i} shapes failed to draw.")
+    with span("finish"):
+        return backend.finish() and ok
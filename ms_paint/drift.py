@@ -0,0 +1,311 @@
+import base64
+import json
+import os
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from .calibration import Calibration, _save_calibration
+from .driver import get_driver
+from .metrics import span
+
+# drift.py
+# Cheap check that paint_calibration.json still matches the screen. When Paint
+# moves or resizes, every stored tool and canvas position is wrong, and the
+# only fix used to be a full calibration. The DriftMonitor keeps a small
+# grayscale patch (a "signature") around each calibrated point. Before a scene
+# it grabs the toolbar strip and a small region at each canvas corner and
+# compares each patch with its signature, which takes a few milliseconds.
+# Canvas corners are sampled just outside the canvas, so shapes drawn near a
+# corner never look like drift. Points that no longer match are searched for
+# only in a neighbourhood around their old position (one more small grab per
+# group, one small template match each), and the positions that moved are
+# written back to the calibration file. Every calibration records fresh
+# signatures (record()); a point checked without one gets it then. They
+# persist in paint_signatures.json.
+
+SIGNATURE_FILE = "paint_signatures.json"
+PATCH_RADIUS = 8            # signature is a (2r+1)^2 grayscale patch
+SEARCH_RADIUS = 160         # how far a drifted point is searched for, in pixels
+MATCH_THRESHOLD = 0.8       # patch similarity that counts as unchanged / found
+# Patches flatter than this (gray-level std) carry no shape to correlate;
+# only their brightness is compared, and they cannot be searched for.
+FLAT_STD = 3.0
+CANVAS_POINTS = ("top_left", "bottom_right")
+# Canvas corners are sampled this far outward (diagonally), so their patch
+# lies entirely outside the drawable area.
+CORNER_OFFSETS = {
+    "top_left": (-(PATCH_RADIUS + 1), -(PATCH_RADIUS + 1)),
+    "bottom_right": (PATCH_RADIUS + 1, PATCH_RADIUS + 1),
+}
+
+DriftReport = namedtuple(
+    "DriftReport",
+    [
+        "checked",    # points compared with a stored signature
+        "recorded",   # points whose signature was recorded by this check
+        "moved",      # {name: (old (x, y), new (x, y))}, re-located and saved
+        "lost",       # names that changed but were not found nearby
+        "seconds",
+    ],
+)
+
+
+def _gray(pixels):
+    pixels = np.asarray(pixels)
+    if pixels.ndim == 2:
+        return pixels.astype(np.float32)
+    return pixels[..., :3].astype(np.float32) @ np.float32([0.299, 0.587, 0.114])
+
+
+def patch_similarity(a, b):
+    """Normalized cross-correlation of two patches (1.0 = same picture).
+
+    Flat patches are compared by mean brightness instead, so a tool button that
+    gets Paint's "selected" highlight still matches its signature.
+    """
+    if a.shape != b.shape:
+        return -1.0
+    sa, sb = float(a.std()), float(b.std())
+    if sa < FLAT_STD or sb < FLAT_STD:
+        if sa < FLAT_STD and sb < FLAT_STD:
+            return 1.0 - min(abs(float(a.mean()) - float(b.mean())) / 32.0, 2.0)
+        return 0.0
+    return float(((a - a.mean()) * (b - b.mean())).mean() / (sa * sb))
+
+
+def calibration_points(calibration):
+    """{name: (x, y)} for every calibrated tool and canvas corner."""
+    points = dict(calibration.tools or {})
+    if calibration.canvas:
+        for corner in CANVAS_POINTS:
+            points[corner] = tuple(calibration.canvas[corner])
+    return points
+
+
+def _sample_point(name, pos):
+    """Screen position whose patch is the signature of calibrated point `name`."""
+    dx, dy = CORNER_OFFSETS.get(name, (0, 0))
+    return (pos[0] + dx, pos[1] + dy)
+
+
+def _calibrated_point(name, sample):
+    """Inverse of _sample_point."""
+    dx, dy = CORNER_OFFSETS.get(name, (0, 0))
+    return (sample[0] - dx, sample[1] - dy)
+
+
+def _union_region(points, radius):
+    """(left, top, width, height) covering a radius-`radius` box around every point."""
+    xs = [x for x, _ in points]
+    ys = [y for _, y in points]
+    left, top = max(min(xs) - radius, 0), max(min(ys) - radius, 0)
+    right, bottom = max(xs) + radius, max(ys) + radius
+    return (left, top, right - left + 1, bottom - top + 1)
+
+
+def _grab_groups(driver, samples, radius):
+    """Grab the toolbar points as one strip and each canvas corner on its own.
+
+    `samples` is {name: (x, y)}; yields (region, gray image, names) so no grab
+    spans the canvas between the toolbar and the far corner.
+    """
+    tools = [name for name in samples if name not in CANVAS_POINTS]
+    groups = [tools] + [[corner] for corner in CANVAS_POINTS if corner in samples]
+    for names in groups:
+        if names:
+            region = _union_region([samples[name] for name in names], radius)
+            yield region, _gray(driver.grab(region)), names
+
+
+def _crop(image, region, x, y, radius):
+    """The (2r+1)^2 patch around screen (x, y) from `image` grabbed at `region`;
+    None if it is not fully inside."""
+    left, top = x - region[0] - radius, y - region[1] - radius
+    size = 2 * radius + 1
+    if left < 0 or top < 0 or top + size > image.shape[0] or left + size > image.shape[1]:
+        return None
+    return image[top:top + size, left:left + size]
+
+
+def _search(image, region, signature, x, y, radius):
+    """Best match for `signature` within `radius` of (x, y) -> ((x, y), score) or None."""
+    if float(signature.std()) < FLAT_STD:
+        return None
+    import cv2
+
+    r = PATCH_RADIUS
+    left, top = max(x - radius - r - region[0], 0), max(y - radius - r - region[1], 0)
+    window = image[top:y + radius + r + 1 - region[1], left:x + radius + r + 1 - region[0]]
+    if window.shape[0] < signature.shape[0] or window.shape[1] < signature.shape[1]:
+        return None
+    result = cv2.matchTemplate(window, signature, cv2.TM_CCOEFF_NORMED)
+    _, score, _, (bx, by) = cv2.minMaxLoc(result)
+    return (region[0] + left + bx + r, region[1] + top + by + r), float(score)
+
+
+class DriftMonitor:
+    """Signatures of the calibrated points, and the check that uses them.
+
+    - path: where signatures persist between runs (None keeps them in memory)
+    - save: write re-located positions back to the calibration's file
+    check() returns the calibration to draw with; last_report describes it.
+    """
+
+    def __init__(self, driver=None, path=SIGNATURE_FILE, save=True):
+        self.driver = driver
+        self.path = path
+        self.save = save
+        self.signatures = {}    # name -> {"pos": (x, y), "patch": float32 array}
+        self.last_report = None
+        if path:
+            self.load()
+
+    # --- persistence ---
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                stored = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        size = 2 * PATCH_RADIUS + 1
+        for name, entry in stored.items():
+            try:
+                patch = np.frombuffer(base64.b64decode(entry["patch"]), dtype=np.uint8).reshape(size, size)
+                self.signatures[name] = {"pos": tuple(entry["pos"]), "patch": patch.astype(np.float32)}
+            except (KeyError, TypeError, ValueError):
+                continue
+
+    def persist(self):
+        if not self.path:
+            return
+        stored = {
+            name: {"pos": list(sig["pos"]),
+                   "patch": base64.b64encode(np.clip(sig["patch"], 0, 255).astype(np.uint8).tobytes()).decode()}
+            for name, sig in self.signatures.items()
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(stored, f)
+        os.replace(tmp_path, self.path)
+
+    # --- checking ---
+
+    def record(self, calibration, driver=None):
+        """Replace every signature with the patch now at each calibrated point.
+
+        Called after calibration, when Paint is known to match the file;
+        signatures of an earlier layout are dropped rather than compared with.
+        """
+        driver = driver or self.driver or get_driver()
+        points = calibration_points(calibration)
+        samples = {name: _sample_point(name, pos) for name, pos in points.items()}
+        self.signatures = {}
+        for region, screen, names in _grab_groups(driver, samples, PATCH_RADIUS):
+            for name in names:
+                patch = _crop(screen, region, *samples[name], PATCH_RADIUS)
+                if patch is not None:
+                    self.signatures[name] = {"pos": points[name], "patch": patch.copy()}
+        self.persist()
+        return len(self.signatures)
+
+    def check(self, calibration, driver=None):
+        """Compare the screen with the signatures; re-locate only what moved.
+
+        Returns `calibration` unchanged when nothing moved, else a new
+        Calibration with the re-located positions (also saved to its file
+        unless save=False). Signatures are compared wherever they were taken,
+        so a stale in-memory calibration is re-located too instead of being
+        mistaken for a recalibration.
+        """
+        driver = driver or self.driver or get_driver()
+        started = time.perf_counter()
+        points = calibration_points(calibration)
+        if not points:
+            self.last_report = DriftReport(0, 0, {}, [], 0.0)
+            return calibration
+
+        with span("drift_check"):
+            samples = {name: _sample_point(name, pos) for name, pos in points.items()}
+            checked, recorded, suspects, patches = 0, 0, [], {}
+            for region, screen, names in _grab_groups(driver, samples, PATCH_RADIUS):
+                for name in names:
+                    patch = _crop(screen, region, *samples[name], PATCH_RADIUS)
+                    if patch is None:
+                        continue
+                    sig = self.signatures.get(name)
+                    if sig is None:
+                        self.signatures[name] = {"pos": points[name], "patch": patch.copy()}
+                        recorded += 1
+                        continue
+                    checked += 1
+                    if patch_similarity(patch, sig["patch"]) >= MATCH_THRESHOLD:
+                        if sig["pos"] != points[name]:
+                            # Recalibrated onto the same picture.
+                            sig["pos"] = points[name]
+                            recorded += 1
+                        continue
+                    suspects.append(name)
+                    patches[name] = patch
+
+            moved, lost = {}, []
+            if suspects:
+                moved, lost, renewed = self._relocate(driver, points, suspects, patches)
+                recorded += renewed
+
+        if recorded or moved:
+            self.persist()
+        if moved:
+            calibration = self._apply(calibration, moved)
+        self.last_report = DriftReport(checked, recorded, moved, lost, time.perf_counter() - started)
+        if moved or lost:
+            print(describe_drift(self.last_report))
+        return calibration
+
+    def _relocate(self, driver, points, names, patches):
+        """Search a neighbourhood of each drifted point (one grab per group).
+
+        A point whose calibrated position differs from the one its signature
+        was taken at, and whose signature is not found, was recalibrated onto
+        something new: the calibration wins and the signature is re-recorded.
+        """
+        with span("drift_relocate", points=len(names)):
+            samples = {name: _sample_point(name, points[name]) for name in names}
+            moved, lost, renewed = {}, [], 0
+            for region, screen, group in _grab_groups(driver, samples, SEARCH_RADIUS + PATCH_RADIUS):
+                for name in group:
+                    pos = points[name]
+                    sig = self.signatures[name]
+                    hit = _search(screen, region, sig["patch"], *samples[name], SEARCH_RADIUS)
+                    if hit is not None and hit[1] >= MATCH_THRESHOLD:
+                        found = _calibrated_point(name, hit[0])
+                        moved[name] = (pos, found)
+                        sig["pos"] = found
+                    elif sig["pos"] != pos:
+                        self.signatures[name] = {"pos": pos, "patch": patches[name].copy()}
+                        renewed += 1
+                    else:
+                        lost.append(name)
+        return moved, lost, renewed
+
+    def _apply(self, calibration, moved):
+        tools = {name: list(pos) for name, pos in (calibration.tools or {}).items()}
+        canvas = {corner: list(pos) for corner, pos in (calibration.canvas or {}).items()}
+        for name, (_, new) in moved.items():
+            (canvas if name in CANVAS_POINTS else tools)[name] = list(new)
+        data = {"tools": tools, "canvas": canvas or None}
+        if self.save and calibration.path:
+            _save_calibration(tools=tools, canvas=canvas or None, path=calibration.path)
+        return Calibration.from_data(data, path=calibration.path)
+
+
+def describe_drift(report):
+    parts = [f"Calibration check: {report.checked} points in {report.seconds * 1000:.0f} ms"]
+    if report.moved:
+        moves = ", ".join(f"{name} {old}->{new}" for name, (old, new) in report.moved.items())
+        parts.append(f"re-located {len(report.moved)} ({moves})")
+    if report.lost:
+        parts.append(f"could not find {', '.join(report.lost)} nearby; run calibration again")
+    return "; ".join(parts) + "."
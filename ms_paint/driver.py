@@ -0,0 +1,240 @@
+import os
+import subprocess
+import threading
+import time
+
+import numpy as np
+
+try:
+    import pyautogui
+except Exception:  # no display available; only the fake driver can be used
+    pyautogui = None
+
+# driver.py
+# Input/screen layer for everything that touches the desktop: draw_shapes,
+# paint (launch, focus, tool clicks), calibration and pacing. PyAutoGUIDriver
+# talks to the real desktop; FakeDriver simulates a screen that reacts to
+# clicks and drags after a configurable lag, on its own clock, and records
+# every call, so the whole drawing pipeline runs on a machine without a
+# display. get_driver() / set_driver() hold the process-wide driver.
+
+# Input calls (moves, clicks, button presses); screen reads are not counted.
+INPUT_EVENTS = {"move_to", "click", "mouse_down", "mouse_up"}
+
+
+class PyAutoGUIDriver:
+    """Real mouse and screen, via pyautogui."""
+
+    def move_to(self, x, y, duration=0.0):
+        pyautogui.moveTo(x, y, duration=duration)
+
+    def click(self, x=None, y=None):
+        pyautogui.click(x=x, y=y)
+
+    def mouse_down(self, button="left"):
+        pyautogui.mouseDown(button=button)
+
+    def mouse_up(self, button="left"):
+        pyautogui.mouseUp(button=button)
+
+    def position(self):
+        pos = pyautogui.position()
+        return (pos.x, pos.y)
+
+    def grab(self, region):
+        """Return the (left, top, width, height) screen region as an RGB array."""
+        return np.asarray(pyautogui.screenshot(region=region).convert("RGB"))
+
+    def screenshot(self):
+        """The whole screen as an RGB array."""
+        return np.asarray(pyautogui.screenshot().convert("RGB"))
+
+    def locate_on_screen(self, image, confidence=0.85):
+        """Centre of `image` on screen, or None."""
+        box = pyautogui.locateOnScreen(image, confidence=confidence)
+        if not box:
+            return None
+        center = pyautogui.center(box)
+        return (center.x, center.y)
+
+    def launch(self, command):
+        subprocess.Popen(command)
+
+    def activate_window(self, title):
+        """Bring the first window whose title contains `title` to the front."""
+        windows = pyautogui.getWindowsWithTitle(title)
+        if not windows:
+            return False
+        windows[0].activate()
+        return True
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def now(self):
+        return time.perf_counter()
+
+
+class FakeDriver:
+    """Simulated, recording desktop for running the pipeline without a display.
+
+    Every click and every completed drag flips a small patch of pixels at the
+    affected points, but only `lag` seconds later on the fake clock, the way a
+    busy Paint window repaints late. `sleep` and drag durations advance the
+    clock instead of blocking; `pause` adds pyautogui's per-call PAUSE to every
+    input call. Each call is appended to `events` as (clock, name, *args).
+
+    - windows: titles reported as open (activate_window matches substrings)
+    - locations: {template name or path: (x, y)} answers for locate_on_screen
+    - positions: scripted answers for position(), used by manual calibration
+    """
+
+    def __init__(self, width=1920, height=1080, lag=0.05, pause=0.0,
+                 windows=("Untitled - Paint",), locations=None, positions=()):
+        self.screen = np.full((height, width, 3), 255, dtype=np.uint8)
+        self.lag = lag
+        self.pause = pause
+        self.clock = 0.0
+        self.slept = 0.0        # seconds spent in sleep() and PAUSE
+        self.moving = 0.0       # seconds spent in timed moves (drags)
+        self.position_xy = (0, 0)
+        self.windows = list(windows)
+        self.locations = dict(locations or {})
+        self.events = []
+        self._positions = list(positions)
+        self._down_at = None
+        self._scheduled = []
+
+    def _record(self, name, *args):
+        self.events.append((self.clock, name) + args)
+        if self.pause and name in INPUT_EVENTS:
+            self.clock += self.pause
+            self.slept += self.pause
+
+    def _schedule(self, points):
+        self._scheduled.append((self.clock + self.lag, points))
+
+    def _apply_due(self):
+        due = [points for at, points in self._scheduled if at <= self.clock]
+        self._scheduled = [(at, p) for at, p in self._scheduled if at > self.clock]
+        for points in due:
+            for x, y in points:
+                x, y = int(x), int(y)
+                patch = self.screen[max(y - 1, 0):y + 2, max(x - 1, 0):x + 2]
+                patch[...] = 255 - patch
+
+    # --- input ---
+
+    def move_to(self, x, y, duration=0.0):
+        self.clock += duration
+        self.moving += duration
+        self.position_xy = (x, y)
+        self._record("move_to", x, y, duration)
+
+    def click(self, x=None, y=None):
+        if x is not None and y is not None:
+            self.position_xy = (x, y)
+        self._schedule([self.position_xy])
+        self._record("click", *self.position_xy)
+
+    def mouse_down(self, button="left"):
+        self._down_at = self.position_xy
+        self._record("mouse_down", button)
+
+    def mouse_up(self, button="left"):
+        if self._down_at is not None:
+            self._schedule([self._down_at, self.position_xy])
+        self._down_at = None
+        self._record("mouse_up", button)
+
+    def position(self):
+        self._record("position")
+        if self._positions:
+            return tuple(self._positions.pop(0))
+        return self.position_xy
+
+    # --- screen ---
+
+    def grab(self, region):
+        self._apply_due()
+        self._record("grab", region)
+        left, top, width, height = region
+        return self.screen[top:top + height, left:left + width].copy()
+
+    def screenshot(self):
+        self._apply_due()
+        self._record("screenshot")
+        return self.screen.copy()
+
+    def locate_on_screen(self, image, confidence=0.85):
+        self._record("locate_on_screen", image)
+        name = os.path.splitext(os.path.basename(str(image)))[0]
+        found = self.locations.get(image, self.locations.get(name))
+        return tuple(found) if found else None
+
+    # --- windows ---
+
+    def launch(self, command):
+        self._record("launch", command)
+
+    def activate_window(self, title):
+        self._record("activate_window", title)
+        return any(title in window for window in self.windows)
+
+    # --- time ---
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.clock += seconds
+            self.slept += seconds
+            self._record("sleep", seconds)
+
+    def now(self):
+        return self.clock
+
+    # --- reporting ---
+
+    def count(self, *names):
+        names = set(names) or INPUT_EVENTS
+        return sum(1 for event in self.events if event[1] in names)
+
+    def stats(self):
+        counts = {}
+        for event in self.events:
+            counts[event[1]] = counts.get(event[1], 0) + 1
+        return {
+            "clock_s": self.clock,
+            "slept_s": self.slept,
+            "moving_s": self.moving,
+            "input_events": self.count(),
+            "counts": counts,
+        }
+
+    def reset(self):
+        """Forget recorded events and timings, keeping the simulated screen."""
+        self.events = []
+        self.clock = self.slept = self.moving = 0.0
+        self._scheduled = []
+
+
+_driver = None
+_driver_lock = threading.Lock()
+
+
+def get_driver():
+    """Process-wide driver (PyAutoGUIDriver unless set_driver() replaced it)."""
+    global _driver
+    if _driver is None:
+        with _driver_lock:
+            if _driver is None:
+                _driver = PyAutoGUIDriver()
+    return _driver
+
+
+def set_driver(driver):
+    """Install `driver` for everything that talks to the desktop; returns the old one."""
+    global _driver
+    with _driver_lock:
+        previous, _driver = _driver, driver
+    return previous
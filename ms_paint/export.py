@@ -0,0 +1,184 @@
+import argparse
+import json
+import os
+import struct
+import tempfile
+import time
+import zlib
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .draw_shapes import draw_function_map
+from .raster import BLACK, WHITE, rasterize_segments, shapes_to_segments
+from .simplify import simplify_scene
+from .transform import CoordinateTransform, describe_flags, drawable_only, transform_shapes
+from .verify import scene_shapes
+
+# export.py
+# Poster-size offscreen rendering. The Paint canvas limits live drawing to
+# about 1046x607 pixels, but the same shape lists can be exported at any
+# size. The target canvas is split into tiles; each tile is rasterized by a
+# worker process that receives only the segments of shapes overlapping it,
+# and writes straight into a memory-mapped RGB buffer on disk. The buffer is
+# then streamed out as raw RGB or as a PNG, band by band, so a 20k x 20k
+# export never holds the whole image (1.2 GB) in memory.
+#
+#   python -m ms_paint.export scene.json poster.png --size 20000 10000
+
+DEFAULT_TILE = 2048
+# Rows compressed per PNG write; bounds the memory used while encoding.
+PNG_BAND_ROWS = 256
+FORMATS = ("png", "raw")
+
+ExportResult = namedtuple("ExportResult", ["path", "width", "height", "tiles", "shapes", "seconds"])
+
+
+def _tiles(width, height, tile):
+    """(left, top, right, bottom) inclusive boxes covering the canvas, row by row."""
+    return [(x, y, min(x + tile, width) - 1, min(y + tile, height) - 1)
+            for y in range(0, height, tile) for x in range(0, width, tile)]
+
+
+def _segments_by_tile(segments, tiles):
+    """The segments that can touch each tile, by bounding box.
+
+    A segment can touch the pixels next to its box after rounding, so boxes
+    are widened by one pixel.
+    """
+    lo = np.floor(np.minimum(segments[:, :2], segments[:, 2:])) - 1
+    hi = np.ceil(np.maximum(segments[:, :2], segments[:, 2:])) + 1
+    for left, top, right, bottom in tiles:
+        hit = (lo[:, 0] <= right) & (hi[:, 0] >= left) & (lo[:, 1] <= bottom) & (hi[:, 1] >= top)
+        yield segments[hit]
+
+
+def _render_tile(buffer_path, size, box, segments, background, color):
+    """Worker: rasterize one tile and write it into the shared memory map."""
+    width, height = size
+    left, top, right, bottom = box
+    pixels = np.empty((bottom - top + 1, right - left + 1, 3), dtype=np.uint8)
+    pixels[...] = background
+    rasterize_segments(pixels, segments, color, origin=(left, top))
+    out = np.memmap(buffer_path, dtype=np.uint8, mode="r+", shape=(height, width, 3))
+    out[top:bottom + 1, left:right + 1] = pixels
+    out.flush()
+    del out
+    return box
+
+
+def _png_chunk(f, kind, data):
+    f.write(struct.pack(">I", len(data)))
+    f.write(kind)
+    f.write(data)
+    f.write(struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+
+def _file_bands(path, width, height, band_rows=PNG_BAND_ROWS):
+    """Read a raw RGB file back in bands of rows.
+
+    Plain reads rather than the memory map, so rows already encoded do not
+    stay resident.
+    """
+    with open(path, "rb") as f:
+        for y in range(0, height, band_rows):
+            rows = min(band_rows, height - y)
+            yield np.fromfile(f, dtype=np.uint8, count=rows * width * 3).reshape(rows, width, 3)
+
+
+def write_png(path, bands, width, height, compress_level=6):
+    """Stream RGB row bands ((rows, width, 3) uint8 arrays, top to bottom) into a PNG."""
+    compressor = zlib.compressobj(compress_level)
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        _png_chunk(f, b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        for band in bands:
+            rows = len(band)
+            scanlines = np.zeros((rows, 1 + width * 3), dtype=np.uint8)   # column 0: filter "none"
+            scanlines[:, 1:] = band.reshape(rows, -1)
+            data = compressor.compress(scanlines.tobytes())
+            if data:
+                _png_chunk(f, b"IDAT", data)
+        _png_chunk(f, b"IDAT", compressor.flush())
+        _png_chunk(f, b"IEND", b"")
+    return path
+
+
+def _format_for(path, fmt):
+    fmt = fmt or ("raw" if path.lower().endswith((".raw", ".rgb")) else "png")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'. Expected one of {FORMATS}.")
+    return fmt
+
+
+def export_scene(shapes, path, width, height, tile=DEFAULT_TILE, workers=None, fmt=None,
+                 fit="contain", background=WHITE, color=BLACK, compress_level=6):
+    """Render model shapes to a `width` x `height` image file without Paint.
+
+    - shapes: model-space shape dicts (any type in draw_shapes.draw_function_map)
+    - tile: tile edge in pixels; each worker holds one tile in memory
+    - workers: process count (default: all cores); 1 renders in this process
+    - fmt: "png" or "raw" (headerless RGB rows); from the extension by default
+    - fit: how the 0-1000 x 0-500 model space maps onto the image (see transform.py)
+    Returns an ExportResult.
+    """
+    started = time.perf_counter()
+    fmt = _format_for(path, fmt)
+    bounds = (0, 0, width - 1, height - 1)
+    scene = transform_shapes(shapes, bounds, CoordinateTransform(bounds, fit=fit), known_tools=draw_function_map)
+    print(describe_flags(scene))
+    scene, _ = simplify_scene(drawable_only(scene))
+    segments = shapes_to_segments(scene_shapes(scene))
+
+    tiles = _tiles(width, height, tile)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    # Raw exports render straight into the destination file.
+    if fmt == "raw":
+        buffer_path = path
+    else:
+        fd, buffer_path = tempfile.mkstemp(dir=directory, suffix=".rgb")
+        os.close(fd)
+    try:
+        with open(buffer_path, "wb") as f:
+            f.truncate(width * height * 3)
+
+        jobs = [(buffer_path, (width, height), box, tile_segments, background, color)
+                for box, tile_segments in zip(tiles, _segments_by_tile(segments, tiles))]
+        if workers == 1 or len(jobs) == 1:
+            for job in jobs:
+                _render_tile(*job)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for future in [pool.submit(_render_tile, *job) for job in jobs]:
+                    future.result()
+
+        if fmt == "png":
+            write_png(path, _file_bands(buffer_path, width, height), width, height, compress_level)
+    finally:
+        if buffer_path != path and os.path.exists(buffer_path):
+            os.remove(buffer_path)
+
+    return ExportResult(path, width, height, len(tiles), len(scene.tools), time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a JSON shape list to a large PNG or raw RGB file.")
+    parser.add_argument("shapes", help="JSON file with a list of model-space shapes")
+    parser.add_argument("output", help="output path (.png, or .raw / .rgb for headerless RGB)")
+    parser.add_argument("--size", type=int, nargs=2, metavar=("WIDTH", "HEIGHT"), default=(20000, 10000))
+    parser.add_argument("--tile", type=int, default=DEFAULT_TILE)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--fit", choices=["contain", "stretch"], default="contain")
+    args = parser.parse_args()
+
+    with open(args.shapes, "r", encoding="utf-8") as f:
+        shapes = json.load(f)
+    result = export_scene(shapes, args.output, *args.size, tile=args.tile, workers=args.workers, fit=args.fit)
+    print(f"Wrote {result.path}: {result.width}x{result.height}, {result.shapes} shapes, "
+          f"{result.tiles} tiles in {result.seconds:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from .driver import get_driver
+from .metrics import span
+
+# locate.py
+# Finds every Tool_PNG template in a single screenshot. The screen is captured
+# once, converted to grayscale and downscaled; each template is matched first
+# on the small image inside the region where it is expected (toolbar or canvas
+# corner), then refined at full resolution in a small window. OpenCV releases
+# the GIL while matching, so templates are searched in parallel threads.
+
+TOOL_PNG_DIR = './Tool_PNG'
+
+# Where each template is expected, as (left, top, right, bottom) fractions of
+# the screen. Anything not listed is searched across the whole screen.
+TOOLBAR_REGION = (0.0, 0.0, 1.0, 0.35)
+DEFAULT_REGIONS = {
+    "top_left": (0.0, 0.0, 0.7, 0.7),
+    "bottom_right": (0.3, 0.3, 1.0, 1.0),
+}
+
+PYRAMID_FACTOR = 2      # coarse search runs at 1/PYRAMID_FACTOR resolution
+MIN_COARSE_SIDE = 12    # templates smaller than this (once shrunk) skip the coarse pass
+COARSE_CANDIDATES = 5   # coarse peaks refined at full resolution; thin icons
+                        # lose detail when shrunk, so the true hit is not always first
+HINT_RADIUS = 150       # search window around a previously calibrated position
+
+
+def to_gray(image):
+    """PIL image, RGB/RGBA/gray array or file path -> uint8 grayscale array."""
+    if isinstance(image, str):
+        gray = cv2.imread(image, cv2.IMREAD_GRAYSCALE)
+        if gray is None:
+            raise FileNotFoundError(image)
+        return gray
+    arr = np.asarray(image)
+    if arr.ndim == 2:
+        return arr.astype(np.uint8, copy=False)
+    if arr.shape[2] == 4:
+        return cv2.cvtColor(arr, cv2.COLOR_RGBA2GRAY)
+    return cv2.cvtColor(arr, cv2.COLOR_RGB2GRAY)
+
+
+def grab_screen():
+    """One full-screen capture as a grayscale array."""
+    return to_gray(get_driver().screenshot())
+
+
+def _fraction_region(fractions, shape):
+    h, w = shape[:2]
+    l, t, r, b = fractions
+    return (int(l * w), int(t * h), int(r * w), int(b * h))
+
+
+def _hint_region(hint, shape, radius=HINT_RADIUS):
+    h, w = shape[:2]
+    x, y = hint
+    return (max(int(x) - radius, 0), max(int(y) - radius, 0), min(int(x) + radius, w), min(int(y) + radius, h))
+
+
+def _region_for(name, shape, hints):
+    if hints and name in hints and hints[name] is not None:
+        return _hint_region(hints[name], shape)
+    fractions = DEFAULT_REGIONS.get(name.lower(), TOOLBAR_REGION)
+    return _fraction_region(fractions, shape)
+
+
+def _best_peaks(result, template_shape, count):
+    """Up to `count` strongest, non-overlapping peaks of a matchTemplate result."""
+    result = result.copy()
+    th, tw = template_shape[:2]
+    peaks = []
+    for _ in range(count):
+        _, score, _, (x, y) = cv2.minMaxLoc(result)
+        if not np.isfinite(score):
+            break
+        peaks.append((score, x, y))
+        result[max(y - th // 2, 0):y + th // 2 + 1, max(x - tw // 2, 0):x + tw // 2 + 1] = -np.inf
+    return peaks
+
+
+def _match_in(screen, template, region):
+    """Best full-resolution match of `template` within region -> (score, x, y)."""
+    l, t, r, b = region
+    th, tw = template.shape[:2]
+    window = screen[t:b, l:r]
+    if window.shape[0] < th or window.shape[1] < tw:
+        return None
+    result = cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED)
+    _, score, _, (x, y) = cv2.minMaxLoc(result)
+    return score, l + x, t + y
+
+
+def match_template(screen, screen_small, template, region, confidence=0.85, factor=PYRAMID_FACTOR):
+    """Locate one grayscale template; returns ((center_x, center_y), score) or None."""
+    th, tw = template.shape[:2]
+    l, t, r, b = region
+
+    small_template = None
+    if screen_small is not None and min(th, tw) // factor >= MIN_COARSE_SIDE:
+        small_template = cv2.resize(template, (tw // factor, th // factor), interpolation=cv2.INTER_AREA)
+
+    best = None
+    if small_template is None:
+        best = _match_in(screen, template, region)
+    else:
+        window = screen_small[t // factor:b // factor, l // factor:r // factor]
+        sh, sw = small_template.shape[:2]
+        if window.shape[0] >= sh and window.shape[1] >= sw:
+            result = cv2.matchTemplate(window, small_template, cv2.TM_CCOEFF_NORMED)
+            for _, x, y in _best_peaks(result, small_template.shape, COARSE_CANDIDATES):
+                # Refine around the coarse hit at full resolution.
+                fx, fy = l + x * factor, t + y * factor
+                pad = factor + 2
+                refine = (max(fx - pad, 0), max(fy - pad, 0), fx + tw + pad, fy + th + pad)
+                found = _match_in(screen, template, refine)
+                if found and (best is None or found[0] > best[0]):
+                    best = found
+        if best is None or best[0] < confidence:
+            # Coarse pass missed it; fall back to a full-resolution search.
+            best = _match_in(screen, template, region)
+
+    if best is None or best[0] < confidence:
+        return None
+    score, x, y = best
+    return (int(x + tw // 2), int(y + th // 2)), float(score)
+
+
+def locate_templates(templates, screen=None, hints=None, confidence=0.85, workers=None):
+    """Find many templates in one screenshot.
+
+    - templates: {name: path or grayscale array}
+    - screen: screenshot (path, PIL image or array); captured once if omitted
+    - hints: {name: (x, y)} previous positions, searched first in a small window
+    Returns {name: (x, y) or None}. A template missing from its expected
+    region is retried across the whole screen before giving up.
+    """
+    if screen is None:
+        with span("screenshot"):
+            screen = grab_screen()
+    else:
+        screen = to_gray(screen)
+    h, w = screen.shape[:2]
+    screen_small = cv2.resize(screen, (w // PYRAMID_FACTOR, h // PYRAMID_FACTOR), interpolation=cv2.INTER_AREA)
+    full = (0, 0, screen.shape[1], screen.shape[0])
+
+    def find(item):
+        name, template = item
+        template = to_gray(template)
+        region = _region_for(name, screen.shape, hints)
+        with span("template_search", template=name):
+            hit = match_template(screen, screen_small, template, region, confidence)
+            if hit is None and region != full:
+                hit = match_template(screen, screen_small, template, full, confidence)
+        return name, hit[0] if hit else None
+
+    items = list(templates.items())
+    workers = workers or min(len(items), os.cpu_count() or 1) or 1
+    with span("locate_templates"), ThreadPoolExecutor(max_workers=workers) as pool:
+        return dict(pool.map(find, items))
+
+
+def tool_template_paths(names, directory=TOOL_PNG_DIR):
+    return {name: os.path.join(directory, f"{name}.png") for name in names}
+
+
+def detect_scale(screen, store, reference="pencil"):
+    """Pick the display scaling whose variant of `reference` matches best."""
+    screen = to_gray(screen)
+    region = _region_for(reference, screen.shape, None)
+    best_score, best_scale = -1.0, 1.0
+    for scale in store.scales:
+        hit = _match_in(screen, store.get(reference, scale), region)
+        if hit and hit[0] > best_score:
+            best_score, best_scale = hit[0], scale
+    return best_scale
+
+
+def locate_from_store(names, screen=None, hints=None, confidence=0.85, store=None):
+    """locate_templates using the cached TemplateStore, at the detected DPI scale.
+
+    The scale is detected once per store and reused by later calls.
+    """
+    from .templates import get_template_store
+
+    store = store or get_template_store()
+    screen = grab_screen() if screen is None else to_gray(screen)
+    if store.scale is None:
+        with span("detect_scale"):
+            store.scale = detect_scale(screen, store)
+    return locate_templates(store.templates(names), screen=screen, hints=hints, confidence=confidence)
@@ -0,0 +1,231 @@
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+# metrics.py
+# Timing spans for the slow parts of a scene: model calls, opening/focusing
+# Paint, tool clicks, drags and calibration template searches. Spans are
+# aggregated in memory (count / sum / min / max / histogram per name+labels)
+# and exported either as JSON lines (one line per span, appended as they
+# finish) or as a Prometheus text file rewritten on flush().
+#
+# Configure with configure(path, fmt, quiet) or the environment:
+#   PAINT_METRICS=metrics.jsonl         JSON lines
+#   PAINT_METRICS=prom:metrics.prom     Prometheus text format
+#   PAINT_QUIET=1                       no per-shape / per-step printing
+# Hot-loop messages go through progress(), which quiet mode silences.
+
+METRICS_ENV = "PAINT_METRICS"
+QUIET_ENV = "PAINT_QUIET"
+FORMATS = ("jsonl", "prom")
+
+# Histogram bucket upper bounds, in seconds.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _Series:
+    __slots__ = ("count", "total", "min", "max", "errors", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.errors = 0
+        self.buckets = [0] * len(BUCKETS)
+
+    def add(self, seconds, ok):
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        if not ok:
+            self.errors += 1
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _prom_labels(pairs):
+    escaped = ((k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in pairs)
+    return ",".join(f'{k}="{v}"' for k, v in escaped)
+
+
+class Metrics:
+    """Span recorder with JSON lines / Prometheus export.
+
+    - span(name, **labels): context manager timing the block
+    - record(name, seconds, **labels): add a measurement taken elsewhere
+    - summary() / describe(): where the seconds went, largest total first
+    """
+
+    def __init__(self, path=None, fmt="jsonl", quiet=False):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown metrics format '{fmt}'. Expected one of {FORMATS}.")
+        self.path = path
+        self.fmt = fmt
+        self.quiet = quiet
+        self._series = {}
+        self._lock = threading.Lock()
+        self._file = None
+
+    @contextmanager
+    def span(self, name, **labels):
+        started = time.perf_counter()
+        ok = True
+        try:
+            yield
+        except BaseException:
+            ok = False
+            raise
+        finally:
+            self.record(name, time.perf_counter() - started, ok=ok, **labels)
+
+    def record(self, name, seconds, ok=True, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series()
+            series.add(seconds, ok)
+            if self.path and self.fmt == "jsonl":
+                if self._file is None:
+                    self._file = open(self.path, "a", encoding="utf-8")
+                self._file.write(json.dumps({
+                    "ts": round(time.time(), 6), "span": name, "labels": dict(key[1]),
+                    "seconds": round(seconds, 6), "ok": ok,
+                }) + "\n")
+
+    def summary(self):
+        with self._lock:
+            rows = [
+                {"span": name, "labels": dict(labels), "count": s.count, "total_s": s.total,
+                 "mean_s": s.total / s.count, "min_s": s.min, "max_s": s.max, "errors": s.errors}
+                for (name, labels), s in self._series.items()
+            ]
+        rows.sort(key=lambda row: row["total_s"], reverse=True)
+        return rows
+
+    def describe(self, top=20):
+        rows = self.summary()
+        if not rows:
+            return "No timing spans recorded."
+        lines = [f"{'total s':>9} {'count':>6} {'mean ms':>9} {'max ms':>9}  span"]
+        for row in rows[:top]:
+            labels = " ".join(f"{k}={v}" for k, v in row["labels"].items())
+            lines.append(f"{row['total_s']:>9.3f} {row['count']:>6} {row['mean_s'] * 1000:>9.1f} "
+                         f"{row['max_s'] * 1000:>9.1f}  {row['span']} {labels}".rstrip())
+        return "\n".join(lines)
+
+    def to_prometheus(self):
+        lines = [
+            "# HELP paint_span_seconds Time spent in instrumented MS Paint agent steps.",
+            "# TYPE paint_span_seconds histogram",
+        ]
+        errors = []
+        with self._lock:
+            items = sorted(self._series.items())
+        for (name, labels), s in items:
+            pairs = (("span", name),) + labels
+            cumulative = 0
+            for bound, count in zip(BUCKETS, s.buckets):
+                cumulative += count
+                lines.append(f"paint_span_seconds_bucket{{{_prom_labels(pairs + (('le', repr(bound)),))}}} {cumulative}")
+            lines.append(f"paint_span_seconds_bucket{{{_prom_labels(pairs + (('le', '+Inf'),))}}} {s.count}")
+            lines.append(f"paint_span_seconds_sum{{{_prom_labels(pairs)}}} {s.total:.6f}")
+            lines.append(f"paint_span_seconds_count{{{_prom_labels(pairs)}}} {s.count}")
+            errors.append(f"paint_span_errors_total{{{_prom_labels(pairs)}}} {s.errors}")
+        lines += ["# HELP paint_span_errors_total Spans that ended with an exception.",
+                  "# TYPE paint_span_errors_total counter"] + errors
+        return "\n".join(lines) + "\n"
+
+    def flush(self):
+        """Write pending JSON lines, or rewrite the Prometheus file."""
+        if not self.path:
+            return
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+        if self.fmt == "prom":
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(self.to_prometheus())
+            os.replace(tmp_path, self.path)
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def _from_env():
+    spec = os.getenv(METRICS_ENV, "").strip()
+    fmt, path = "jsonl", spec or None
+    if spec.startswith(("jsonl:", "prom:")):
+        fmt, path = spec.split(":", 1)
+    elif spec.endswith(".prom"):
+        fmt = "prom"
+    quiet = os.getenv(QUIET_ENV, "").strip().lower() in ("1", "true", "yes")
+    return Metrics(path=path, fmt=fmt, quiet=quiet)
+
+
+def get_metrics():
+    """Process-wide recorder, configured from the environment on first use."""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = _from_env()
+                atexit.register(lambda: _metrics.flush())
+    return _metrics
+
+
+def configure(path=None, fmt=None, quiet=None):
+    """Change the export target and/or quiet mode of the process-wide recorder."""
+    metrics = get_metrics()
+    with metrics._lock:
+        if fmt is not None:
+            if fmt not in FORMATS:
+                raise ValueError(f"Unknown metrics format '{fmt}'. Expected one of {FORMATS}.")
+            metrics.fmt = fmt
+        if path is not None:
+            if metrics._file is not None:
+                metrics._file.close()
+                metrics._file = None
+            metrics.path = path
+        if quiet is not None:
+            metrics.quiet = quiet
+    return metrics
+
+
+def span(name, **labels):
+    return get_metrics().span(name, **labels)
+
+
+def timed(name):
+    """Decorator form of span() for whole functions."""
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with get_metrics().span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def progress(message):
+    """print() for messages inside drawing loops; silenced in quiet mode."""
+    if not get_metrics().quiet:
+        print(message)
@@ -4,6 +4,73 @@ import time
 from .calibration import calibrate_tools, calibrate_canvas,automated_calibration
 from .draw_shapes import draw_shapes
 
+# Scene drawn by option 3 (a two-storey house); also used by benchmarks/bench_drawing.py.
+TEST_SHAPES = [
+    {
+        "shape": "rectangle",
+        "start_x": 200,
+        "start_y": 300,
+        "end_x": 600,
+        "end_y": 500
+    },
+    {
+        "shape": "rectangle",
+        "start_x": 200,
+        "start_y": 100,
+        "end_x": 600,
+        "end_y": 300
+    },
+    {
+        "shape": "line",
+        "start_x": 200,
+        "start_y": 100,
+        "end_x": 400,
+        "end_y": 0
+    },
+    {
+        "shape": "line",
+        "start_x": 400,
+        "start_y": 0,
+        "end_x": 600,
+        "end_y": 100
+    },
+    {
+        "shape": "rectangle",
+        "start_x": 250,
+        "start_y": 400,
+        "end_x": 350,
+        "end_y": 450
+    },
+    {
+        "shape": "rectangle",
+        "start_x": 450,
+        "start_y": 400,
+        "end_x": 550,
+        "end_y": 450
+    },
+    {
+        "shape": "rectangle",
+        "start_x": 250,
+        "start_y": 150,
+        "end_x": 350,
+        "end_y": 200
+    },
+    {
+        "shape": "rectangle",
+        "start_x": 450,
+        "start_y": 150,
+        "end_x": 550,
+        "end_y": 200
+    },
+    {
+        "shape": "rectangle",
+        "start_x": 350,
+        "start_y": 450,
+        "end_x": 450,
+        "end_y": 500
+    }
+]
+
 
 def ms_paint_tool(shapes):
     if sys.platform != "win32":
@@ -38,71 +105,7 @@ if __name__ == "__main__":
         calibrate_canvas()
 
     elif choice == "3":
-        test_shapes = [
-            {
-                "shape": "rectangle",
-                "start_x": 200,
-                "start_y": 300,
-                "end_x": 600,
-                "end_y": 500
-            },
-            {
-                "shape": "rectangle",
-                "start_x": 200,
-                "start_y": 100,
-                "end_x": 600,
-                "end_y": 300
-            },
-            {
-                "shape": "line",
-                "start_x": 200,
-                "start_y": 100,
-                "end_x": 400,
-                "end_y": 0
-            },
-            {
-                "shape": "line",
-                "start_x": 400,
-                "start_y": 0,
-                "end_x": 600,
-                "end_y": 100
-            },
-            {
-                "shape": "rectangle",
-                "start_x": 250,
-                "start_y": 400,
-                "end_x": 350,
-                "end_y": 450
-            },
-            {
-                "shape": "rectangle",
-                "start_x": 450,
-                "start_y": 400,
-                "end_x": 550,
-                "end_y": 450
-            },
-            {
-                "shape": "rectangle",
-                "start_x": 250,
-                "start_y": 150,
-                "end_x": 350,
-                "end_y": 200
-            },
-            {
-                "shape": "rectangle",
-                "start_x": 450,
-                "start_y": 150,
-                "end_x": 550,
-                "end_y": 200
-            },
-            {
-                "shape": "rectangle",
-                "start_x": 350,
-                "start_y": 450,
-                "end_x": 450,
-                "end_y": 500
-            }
-        ]
+        test_shapes = TEST_SHAPES
 
         print("\nThis will open MS Paint and draw shapes.")
         input("Press Enter to continue...")
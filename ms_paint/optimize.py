@@ -0,0 +1,450 @@
+import itertools
+import math
+from collections import namedtuple
+
+import numpy as np
+
+from .planner import tool_for
+from .raster import SEGMENT_BUILDERS
+from .transform import is_path_shape
+
+# optimize.py
+# Scene clean-up before drawing, in model coordinates. Models often repeat a
+# shape, emit zero-area boxes, or describe one outline as several lines that
+# meet end to end. Every shape costs a tool click plus a drag in Paint, so:
+#   - exact and near duplicates are removed (same type, every coordinate
+#     within `tolerance`); Paint draws outlines only, so the copy adds nothing
+#   - zero-width / zero-height boxes and zero-length lines are culled
+#   - lines lying on a longer collinear line or on an edge of another shape
+#     are dropped as hidden
+#   - overlapping or touching collinear lines are merged into one line
+#   - lines that close a loop end to end are chained into one vertex
+#     "polygon", clicked out with the polygon tool (needs it calibrated); it
+#     draws the same outline as the line tool. Open chains stay lines, where
+#     the saving is the tool click grouping already gives them.
+# The report estimates the UI operations (input events) saved.
+
+# Coordinates closer than this (model units, ~1 px at the default fit) are equal.
+DEFAULT_TOLERANCE = 2.0
+# Boxes thinner than this and lines shorter than this draw nothing.
+MIN_EXTENT = 0.5
+
+# Drawn as a drag between two points rather than a bounding box.
+_SEGMENT_SHAPES = {"line", "polygon"}
+# Symmetric outlines: the drag direction does not change the picture.
+_BOX_SYMMETRIC = {"rectangle", "circle", "diamond"}
+# Shapes whose outline edges can hide a line drawn on top of them.
+_EDGE_SHAPES = ("rectangle", "triangle", "diamond", "right_triangle", "polygon")
+
+# Input events per shape in the Paint backend: move to start, move, press,
+# drag, release, move to the middle, commit click; a tool switch is a move
+# and a click, plus a canvas focus click for drag tools.
+DRAG_EVENTS = 7
+TOOL_SWITCH_EVENTS = 2
+FOCUS_EVENTS = 1
+
+OptimizeReport = namedtuple(
+    "OptimizeReport",
+    [
+        "shapes_in",
+        "shapes_out",
+        "duplicates",       # exact or near copies removed
+        "degenerate",       # zero-area / zero-length shapes culled
+        "hidden",           # lines lying on another line or outline edge
+        "merged_lines",     # collinear lines folded into a neighbour
+        "polygons",         # vertex polygons built from closed line chains
+        "chained_lines",    # lines replaced by those polygons
+        "ui_ops_before",    # estimated input events, see estimate_ui_operations
+        "ui_ops_after",
+    ],
+)
+
+
+def estimate_ui_operations(shapes):
+    """Input events needed to draw `shapes` with the Paint backend, tools grouped.
+
+    A drag shape costs DRAG_EVENTS; a path of K points costs K + 2 (move to
+    the first point, press, K - 1 moves, release). Every distinct tool costs
+    one toolbar click, plus a focus click for drag tools.
+    """
+    events = 0
+    tools = {}
+    for shape in shapes:
+        if not isinstance(shape, dict):
+            continue
+        if is_path_shape(str(shape.get("shape", "")).lower(), shape):
+            events += len(shape.get("points") or ()) + 2
+            tools[tool_for(shape.get("shape", ""))] = 0
+        else:
+            events += DRAG_EVENTS
+            tools[tool_for(shape.get("shape", ""))] = FOCUS_EVENTS
+    return events + sum(TOOL_SWITCH_EVENTS + focus for focus in tools.values())
+
+
+def _box(shape):
+    try:
+        box = tuple(float(shape[k]) for k in ("start_x", "start_y", "end_x", "end_y"))
+    except (KeyError, TypeError, ValueError):
+        return None
+    return box if all(math.isfinite(v) for v in box) else None
+
+
+def _canonical(kind, box):
+    """Key that is equal for shapes that draw the same outline."""
+    x0, y0, x1, y1 = box
+    if kind in _SEGMENT_SHAPES:
+        # A segment is the same either way round.
+        return min((x0, y0, x1, y1), (x1, y1, x0, y0))
+    if kind in _BOX_SYMMETRIC:
+        return (min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
+    return box
+
+
+def _is_degenerate(kind, box):
+    x0, y0, x1, y1 = box
+    if kind in _SEGMENT_SHAPES:
+        return math.hypot(x1 - x0, y1 - y0) < MIN_EXTENT
+    return abs(x1 - x0) < MIN_EXTENT or abs(y1 - y0) < MIN_EXTENT
+
+
+class _NearIndex:
+    """Grid of 4-number keys; finds a stored key within `tolerance` on every axis.
+
+    Cells are twice the tolerance wide, so a match can only sit in the key's
+    own cell or the neighbour on the side its offset points to: 16 lookups.
+    """
+
+    def __init__(self, tolerance):
+        self.tolerance = tolerance
+        self.size = 2.0 * tolerance
+        self.cells = {}
+
+    def _cell(self, key):
+        return tuple(math.floor(v / self.size) for v in key)
+
+    def find(self, kind, key):
+        if self.tolerance <= 0:
+            return key in self.cells.get((kind,) + key, ())
+        axes = []
+        for v in key:
+            c = math.floor(v / self.size)
+            axes.append((c, c - 1 if v - c * self.size < self.tolerance else c + 1))
+        for cell in itertools.product(*axes):
+            for other in self.cells.get((kind,) + cell, ()):
+                if max(abs(a - b) for a, b in zip(key, other)) <= self.tolerance:
+                    return True
+        return False
+
+    def add(self, kind, key):
+        cell = key if self.tolerance <= 0 else self._cell(key)
+        self.cells.setdefault((kind,) + tuple(cell), []).append(key)
+
+
+def _point_segment_distance(points, segments):
+    """Distance from each (x, y) row of `points` to the matching row of `segments`."""
+    a, b = segments[:, :2], segments[:, 2:]
+    ab = b - a
+    denom = np.maximum((ab ** 2).sum(axis=1), 1e-12)
+    t = np.clip(((points - a) * ab).sum(axis=1) / denom, 0.0, 1.0)
+    return np.hypot(*(points - (a + ab * t[:, None])).T)
+
+
+def _hidden_lines(lines, others, tolerance, chunk=256):
+    """Indices of `lines` whose both endpoints lie within tolerance of one edge.
+
+    `others` are (kind, box) shapes that stay in the scene; their outline
+    edges come from the raster backend's segment builders. Only edges whose
+    padded bounding box contains the line are measured.
+    """
+    if not lines or not others:
+        return set()
+    grouped = {}
+    for kind, box in others:
+        grouped.setdefault(kind, []).append(box)
+    edges = np.concatenate([SEGMENT_BUILDERS[kind](np.asarray(boxes, dtype=np.float64))
+                            for kind, boxes in grouped.items()])
+    e_lo = np.minimum(edges[:, :2], edges[:, 2:]) - tolerance
+    e_hi = np.maximum(edges[:, :2], edges[:, 2:]) + tolerance
+    boxes = np.asarray(lines, dtype=np.float64)
+    l_lo = np.minimum(boxes[:, :2], boxes[:, 2:])
+    l_hi = np.maximum(boxes[:, :2], boxes[:, 2:])
+
+    hidden = set()
+    for lo in range(0, len(boxes), chunk):
+        part_lo, part_hi = l_lo[lo:lo + chunk], l_hi[lo:lo + chunk]
+        inside = ((part_lo[:, None, 0] >= e_lo[:, 0]) & (part_lo[:, None, 1] >= e_lo[:, 1])
+                  & (part_hi[:, None, 0] <= e_hi[:, 0]) & (part_hi[:, None, 1] <= e_hi[:, 1]))
+        li, ei = np.nonzero(inside)
+        if len(li) == 0:
+            continue
+        li += lo
+        covered = ((_point_segment_distance(boxes[li, :2], edges[ei]) <= tolerance)
+                   & (_point_segment_distance(boxes[li, 2:], edges[ei]) <= tolerance))
+        hidden.update(int(i) for i in li[covered])
+    return hidden
+
+
+def _line_key(x0, y0, x1, y1, angle_bins, rho_size):
+    """(angle bin, offset bin) of the infinite line through a segment."""
+    theta = math.atan2(y1 - y0, x1 - x0) % math.pi
+    rho = -math.sin(theta) * x0 + math.cos(theta) * y0
+    return min(int(theta / math.pi * angle_bins), angle_bins - 1), math.floor(rho / rho_size)
+
+
+def _merge_collinear(lines, tolerance, angle_bins=64):
+    """Fold overlapping or touching collinear lines together.
+
+    Returns [(box, members)] where members are indices into `lines`, plus the
+    number of lines that were entirely inside another (hidden) and the number
+    merged with a neighbour. Candidate groups are found by binning each line's
+    angle and offset; membership is then checked exactly (both endpoints
+    within tolerance of the group's line).
+    """
+    rho_size = max(4.0 * tolerance, 1e-9)
+    groups = []        # [anchor (x, y), direction (ux, uy), [indices]]
+    bins = {}
+    for i, (x0, y0, x1, y1) in enumerate(lines):
+        tb, rb = _line_key(x0, y0, x1, y1, angle_bins, rho_size)
+        candidates = []
+        for dt in (-1, 0, 1):
+            # Angles wrap at 180 degrees, where the offset changes sign.
+            t, r = tb + dt, rb
+            if not 0 <= t < angle_bins:
+                t, r = t % angle_bins, -rb - 1
+            for dr in (-1, 0, 1):
+                candidates.extend(bins.get((t, r + dr), ()))
+        for g in sorted(candidates):
+            anchor, (gx, gy), members = groups[g]
+            if (abs((x0 - anchor[0]) * gy - (y0 - anchor[1]) * gx) <= tolerance
+                    and abs((x1 - anchor[0]) * gy - (y1 - anchor[1]) * gx) <= tolerance):
+                members.append(i)
+                break
+        else:
+            length = math.hypot(x1 - x0, y1 - y0)
+            bins.setdefault((tb, rb), []).append(len(groups))
+            groups.append([(x0, y0), ((x1 - x0) / length, (y1 - y0) / length), [i]])
+
+    merged = []
+    hidden = absorbed = 0
+    for anchor, (gx, gy), members in groups:
+        spans = []
+        for i in members:
+            x0, y0, x1, y1 = lines[i]
+            t0 = (x0 - anchor[0]) * gx + (y0 - anchor[1]) * gy
+            t1 = (x1 - anchor[0]) * gx + (y1 - anchor[1]) * gy
+            lo, hi = ((t0, (x0, y0)), (t1, (x1, y1))) if t0 <= t1 else ((t1, (x1, y1)), (t0, (x0, y0)))
+            spans.append((lo, hi, i))
+        spans.sort(key=lambda s: s[0][0])
+
+        current = None
+        for lo, hi, i in spans:
+            if current is not None and lo[0] <= current[1][0] + tolerance:
+                if hi[0] <= current[1][0] + tolerance:
+                    hidden += 1
+                else:
+                    absorbed += 1
+                    current[1] = hi
+                current[2].append(i)
+                continue
+            if current is not None:
+                merged.append(current)
+            current = [lo, hi, [i]]
+        merged.append(current)
+
+    out = [((lo[1][0], lo[1][1], hi[1][0], hi[1][1]), members) for lo, hi, members in merged]
+    return out, hidden, absorbed
+
+
+def _snap_nodes(endpoints, tolerance):
+    """Cluster endpoints closer than `tolerance`; returns node ids and positions."""
+    size = max(tolerance, 1e-9)
+    cells = {}
+    positions = []
+    ids = []
+    for x, y in endpoints:
+        cx, cy = math.floor(x / size), math.floor(y / size)
+        found = None
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for node in cells.get((cx + dx, cy + dy), ()):
+                    px, py = positions[node]
+                    if math.hypot(px - x, py - y) <= tolerance:
+                        found = node
+                        break
+                if found is not None:
+                    break
+            if found is not None:
+                break
+        if found is None:
+            found = len(positions)
+            positions.append((x, y))
+            cells.setdefault((cx, cy), []).append(found)
+        ids.append(found)
+    return ids, positions
+
+
+def _chain_lines(lines, tolerance):
+    """Split the line graph into trails; returns (node positions, member lines).
+
+    Greedy trail decomposition: walks start at odd-degree nodes (where a trail
+    must begin or end) and follow unused edges, so a connected outline with
+    2k odd nodes becomes k strokes, and a closed one becomes one.
+    """
+    endpoints = [p for x0, y0, x1, y1 in lines for p in ((x0, y0), (x1, y1))]
+    ids, positions = _snap_nodes(endpoints, tolerance)
+    adjacency = {}
+    edges = []
+    for e in range(len(lines)):
+        a, b = ids[2 * e], ids[2 * e + 1]
+        edges.append((a, b))
+        adjacency.setdefault(a, []).append(e)
+        adjacency.setdefault(b, []).append(e)
+
+    used = [False] * len(edges)
+    remaining = {node: len(incident) for node, incident in adjacency.items()}
+
+    def walk(node):
+        trail = [node]
+        members = []
+        while True:
+            nxt = next((e for e in adjacency[node] if not used[e]), None)
+            if nxt is None:
+                return trail, members
+            used[nxt] = True
+            a, b = edges[nxt]
+            remaining[a] -= 1
+            remaining[b] -= 1
+            node = b if a == node else a
+            trail.append(node)
+            members.append(nxt)
+
+    trails = []
+    starts = [n for n in adjacency if len(adjacency[n]) % 2 == 1] + list(adjacency)
+    for node in starts:
+        while remaining[node] > 0:
+            trails.append(walk(node))
+    return [([positions[n] for n in trail], members) for trail, members in trails]
+
+
+def _drop_straight_vertices(points, tolerance):
+    """Remove vertices that lie on the segment between their neighbours."""
+    kept = [points[0]]
+    for i in range(1, len(points) - 1):
+        (ax, ay), (bx, by), (cx, cy) = kept[-1], points[i], points[i + 1]
+        length = math.hypot(cx - ax, cy - ay)
+        if length > 0:
+            off = abs((bx - ax) * (cy - ay) - (by - ay) * (cx - ax)) / length
+            between = (bx - ax) * (cx - ax) + (by - ay) * (cy - ay)
+            if off <= tolerance / 2 and 0 <= between <= length ** 2:
+                continue
+        kept.append(points[i])
+    kept.append(points[-1])
+    return kept
+
+
+def vertex_polygon(points):
+    """Shape dict for a closed polygon-tool outline through model-space `points`."""
+    points = [[round(float(x), 3), round(float(y), 3)] for x, y in points]
+    return {
+        "shape": "polygon", "points": points,
+        "start_x": points[0][0], "start_y": points[0][1],
+        "end_x": points[-1][0], "end_y": points[-1][1],
+    }
+
+
+def _line_shape(box):
+    x0, y0, x1, y1 = box
+    return {"shape": "line", "start_x": x0, "start_y": y0, "end_x": x1, "end_y": y1}
+
+
+def optimize_scene(shapes, tolerance=DEFAULT_TOLERANCE, polygons=True):
+    """Return (shapes, OptimizeReport) with redundant drawing work removed.
+
+    Shapes that cannot be read (unknown layout, missing coordinates) are kept
+    as they are so draw_shapes can still report them. Output keeps the input
+    order; a merged line or chained polygon takes the place of its first
+    line. With polygons=False (no calibrated polygon tool) closed chains are
+    left as lines.
+    """
+    shapes = list(shapes)
+    kept = []          # (order, shape dict)
+    lines = []         # (order, box)
+    others = []        # (kind, box) of kept drag shapes, for the hidden-line test
+    near = _NearIndex(tolerance)
+    duplicates = degenerate = 0
+    exact = set()
+
+    for order, shape in enumerate(shapes):
+        kind = str(shape.get("shape", "")).lower() if isinstance(shape, dict) else ""
+        if is_path_shape(kind, shape):
+            key = (kind, repr(shape.get("points")))
+            if key in exact:
+                duplicates += 1
+                continue
+            exact.add(key)
+            kept.append((order, shape))
+            continue
+        box = _box(shape) if kind else None
+        if box is None or kind not in SEGMENT_BUILDERS:
+            kept.append((order, shape))
+            continue
+        if _is_degenerate(kind, box):
+            degenerate += 1
+            continue
+        key = _canonical(kind, box)
+        if near.find(kind, key):
+            duplicates += 1
+            continue
+        near.add(kind, key)
+        if kind == "line":
+            lines.append((order, box))
+        else:
+            kept.append((order, shape))
+            if kind in _EDGE_SHAPES:
+                others.append((kind, box))
+
+    # Lines already drawn by a shape's outline.
+    hidden_idx = _hidden_lines([box for _, box in lines], others, tolerance)
+    hidden = len(hidden_idx)
+    lines = [line for i, line in enumerate(lines) if i not in hidden_idx]
+
+    merged, covered, absorbed = _merge_collinear([box for _, box in lines], tolerance)
+    hidden += covered
+    segments = [(min(lines[i][0] for i in members), box) for box, members in merged]
+
+    outlines = chained = 0
+    if polygons and segments:
+        for points, members in _chain_lines([box for _, box in segments], tolerance):
+            # Only a loop becomes a polygon; the polygon tool always closes
+            # its outline, so an open chain would gain an extra edge.
+            if len(members) < 3 or points[0] != points[-1]:
+                kept.extend((segments[e][0], _line_shape(segments[e][1])) for e in members)
+                continue
+            vertices = _drop_straight_vertices(points, tolerance)[:-1]
+            order = min(segments[e][0] for e in members)
+            kept.append((order, vertex_polygon(vertices)))
+            outlines += 1
+            chained += len(members)
+    else:
+        kept.extend((order, _line_shape(box)) for order, box in segments)
+
+    kept.sort(key=lambda item: item[0])
+    result = [shape for _, shape in kept]
+    report = OptimizeReport(
+        shapes_in=len(shapes), shapes_out=len(result), duplicates=duplicates,
+        degenerate=degenerate, hidden=hidden, merged_lines=absorbed,
+        polygons=outlines, chained_lines=chained,
+        ui_ops_before=estimate_ui_operations(shapes), ui_ops_after=estimate_ui_operations(result),
+    )
+    return result, report
+
+
+def describe_optimization(report):
+    saved = report.ui_ops_before - report.ui_ops_after
+    return (
+        f"Scene optimizer: {report.shapes_out} shapes (was {report.shapes_in}); "
+        f"removed {report.duplicates} duplicate, {report.degenerate} degenerate, {report.hidden} hidden; "
+        f"merged {report.merged_lines} collinear lines; "
+        f"{report.chained_lines} lines chained into {report.polygons} polygons; "
+        f"~{saved} UI operations saved ({report.ui_ops_before} -> {report.ui_ops_after})"
+    )
@@ -0,0 +1,231 @@
+import json
+import os
+
+import numpy as np
+
+from .driver import get_driver
+
+# pacing.py
+# Adaptive replacement for the fixed sleeps in the Paint drag path. Instead of
+# waiting a worst-case 0.1-0.3 s after every step, the Pacer watches a small
+# screen region (the stroke's bounding box, or the tool button) and moves on as
+# soon as Paint has repainted it. Every wait has a timeout that falls back to
+# the original fixed delay. Observed latencies are learned per machine and
+# persisted to paint_pacing.json.
+
+PACING_FILE = "paint_pacing.json"
+
+# The fixed delays used by draw_shapes / click_tool before pacing existed.
+FIXED_DELAYS = {
+    "focus": 0.2,          # after the canvas focus click
+    "tool": 0.3,           # after clicking a toolbar button
+    "stroke": 0.2,         # after mouseUp at the end of a drag
+    "commit": 0.2,         # after the commit click inside the shape
+    "move_duration": 0.4,  # duration of the drag itself
+}
+
+# Floors for the learned values; Paint needs at least a few move events per drag.
+MIN_DELAYS = {
+    "focus": 0.02,
+    "tool": 0.0,
+    "stroke": 0.0,
+    "commit": 0.0,
+    "move_duration": 0.05,
+}
+
+SAFETY_MARGIN = 1.5   # learned delay = observed latency * margin
+SMOOTHING = 0.3       # EWMA weight of the newest observation
+DECAY = 0.8           # shrink factor for delays we cannot observe directly
+
+
+def _region_around(x, y, radius, clip=None):
+    left, top = int(x) - radius, int(y) - radius
+    right, bottom = int(x) + radius, int(y) + radius
+    return _clip_region(left, top, right, bottom, clip)
+
+
+def _clip_region(left, top, right, bottom, clip=None):
+    if clip:
+        cl, ct, cr, cb = clip
+        left, top = max(left, cl), max(top, ct)
+        right, bottom = min(right, cr), min(bottom, cb)
+    left, top = max(left, 0), max(top, 0)
+    return (left, top, max(right - left + 1, 1), max(bottom - top + 1, 1))
+
+
+class Pacer:
+    """Confirms each UI step on screen instead of sleeping a fixed time.
+
+    - driver: input/screen layer (driver.get_driver() by default, FakeDriver in tests)
+    - timeout: longest wait for a confirmation before falling back
+    - confirm: watch the screen; when False, just sleep the learned delays
+      (useful once a machine has been profiled, or where screenshots are slow)
+    - path: where learned delays are persisted (None disables persistence)
+    """
+
+    def __init__(self, driver=None, timeout=1.0, poll=0.01, min_changed=3, confirm=True, path=PACING_FILE):
+        self.driver = driver or get_driver()
+        self.confirm = confirm
+        self.timeout = timeout
+        self.poll = poll
+        self.min_changed = min_changed
+        self.path = path
+        self.delays = dict(FIXED_DELAYS)
+        self.fallbacks = 0
+        if path:
+            self.load()
+
+    # --- persistence ---
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                stored = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        for step, value in stored.items():
+            if step in self.delays and isinstance(value, (int, float)):
+                self.delays[step] = max(float(value), MIN_DELAYS[step])
+
+    def save(self):
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.delays, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    # --- learning ---
+
+    def _learn(self, step, observed):
+        target = max(observed * SAFETY_MARGIN, MIN_DELAYS[step])
+        self.delays[step] = (1 - SMOOTHING) * self.delays[step] + SMOOTHING * target
+
+    def _decay(self, step):
+        self.delays[step] = max(self.delays[step] * DECAY, MIN_DELAYS[step])
+
+    def _reset(self, step):
+        self.delays[step] = FIXED_DELAYS[step]
+
+    # --- waiting ---
+
+    def _changed(self, before, after):
+        if before.shape != after.shape:
+            return True
+        diff = np.abs(before.astype(np.int16) - after.astype(np.int16)).max(axis=-1)
+        return int(np.count_nonzero(diff > 16)) >= self.min_changed
+
+    def wait_for_change(self, step, region, baseline, timeout=None):
+        """Poll `region` until it differs from `baseline`.
+
+        Returns True once a change is seen (and learns its latency). On timeout
+        it tops the wait up to the fixed delay for `step` and returns False.
+        """
+        if not self.confirm:
+            self.settle(step)
+            return True
+        driver = self.driver
+        timeout = self.timeout if timeout is None else timeout
+        started = driver.now()
+        while True:
+            if self._changed(baseline, driver.grab(region)):
+                self._learn(step, driver.now() - started)
+                return True
+            elapsed = driver.now() - started
+            if elapsed >= timeout:
+                break
+            driver.sleep(self.poll)
+        self.fallbacks += 1
+        self._reset(step)
+        driver.sleep(max(FIXED_DELAYS[step] - elapsed, 0))
+        return False
+
+    def settle(self, step):
+        """Wait the learned delay for a step that has no visible effect."""
+        self.driver.sleep(self.delays[step])
+
+    # --- paced UI actions ---
+
+    def click_tool(self, x, y, radius=12):
+        """Click a toolbar button and wait for its highlight to change."""
+        region = _region_around(x, y, radius)
+        baseline = self.driver.grab(region)
+        self.driver.move_to(x, y)
+        self.driver.click(x=x, y=y)
+        return self.wait_for_change("tool", region, baseline)
+
+    def drag(self, start, end, canvas_bounds, focus=True, button="left", pad=4):
+        """Paced version of draw_shapes._drag_from_current_to_clamped."""
+        driver = self.driver
+        (sx, sy), (ex, ey) = start, end
+
+        if focus:
+            driver.click(canvas_bounds[0] + 10, canvas_bounds[1] + 10)
+            self.settle("focus")
+
+        region = _clip_region(
+            min(sx, ex) - pad, min(sy, ey) - pad, max(sx, ex) + pad, max(sy, ey) + pad,
+            canvas_bounds,
+        )
+        baseline = driver.grab(region)
+
+        driver.move_to(sx, sy)
+        driver.mouse_down(button=button)
+        driver.move_to(ex, ey, duration=self.delays["move_duration"])
+        driver.mouse_up(button=button)
+        drawn = self.wait_for_change("stroke", region, baseline)
+
+        # Focus and drag speed cannot be observed directly: shrink them while
+        # strokes keep landing, restore the fixed values as soon as one misses.
+        if drawn:
+            self._decay("move_duration")
+            if focus:
+                self._decay("focus")
+        else:
+            self._reset("move_duration")
+            self._reset("focus")
+
+        after_stroke = driver.grab(region)
+        mid_x, mid_y = (sx + ex) // 2, (sy + ey) // 2
+        driver.move_to(mid_x, mid_y)
+        driver.click()
+        # Not every commit repaints the region, so never wait longer than the
+        # old fixed delay for it.
+        self.wait_for_change("commit", region, after_stroke, timeout=FIXED_DELAYS["commit"])
+        return drawn
+
+    def stroke(self, points, canvas_bounds, button="left", pad=4):
+        """Paced freehand stroke through `points`; no focus or commit click."""
+        driver = self.driver
+        xs = [x for x, _ in points]
+        ys = [y for _, y in points]
+        region = _clip_region(min(xs) - pad, min(ys) - pad, max(xs) + pad, max(ys) + pad, canvas_bounds)
+        baseline = driver.grab(region)
+
+        driver.move_to(*points[0])
+        driver.mouse_down(button=button)
+        for x, y in points[1:]:
+            driver.move_to(x, y)
+        driver.mouse_up(button=button)
+        return self.wait_for_change("stroke", region, baseline)
+
+    def polygon(self, points, canvas_bounds, focus=True, button="left", pad=4):
+        """Paced vertex polygon: drag the first edge, click the rest, close it."""
+        driver = self.driver
+        if focus:
+            driver.click(canvas_bounds[0] + 10, canvas_bounds[1] + 10)
+            self.settle("focus")
+
+        xs = [x for x, _ in points]
+        ys = [y for _, y in points]
+        region = _clip_region(min(xs) - pad, min(ys) - pad, max(xs) + pad, max(ys) + pad, canvas_bounds)
+        baseline = driver.grab(region)
+
+        driver.move_to(*points[0])
+        driver.mouse_down(button=button)
+        driver.move_to(*points[1], duration=self.delays["move_duration"])
+        driver.mouse_up(button=button)
+        for x, y in points[2:]:
+            driver.click(x, y)
+        driver.click(*points[0])
+        return self.wait_for_change("stroke", region, baseline)
@@ -1,43 +1,69 @@
-import subprocess
-import time
-import pyautogui
+from .driver import get_driver
+from .metrics import span, timed
 
 
-def open_ms_paint():
+@timed("open_ms_paint")
+def open_ms_paint(driver=None):
     """Opens Microsoft Paint on Windows."""
+    driver = driver or get_driver()
     try:
-        subprocess.Popen(['mspaint.exe'])
-        time.sleep(2)
+        driver.launch(['mspaint.exe'])
+        driver.sleep(2)
         return True
     except Exception as e:
         print(f"Failed to open MS Paint: {e}")
         return False
 
 
-def focus_paint_window():
+@timed("focus_paint_window")
+def focus_paint_window(driver=None, report_missing=True):
     """Brings MS Paint window to focus."""
+    driver = driver or get_driver()
     try:
-        paint_window = pyautogui.getWindowsWithTitle('Paint')
-        if paint_window:
-            paint_window[0].activate()
-            time.sleep(0.5)
+        if driver.activate_window('Paint'):
+            driver.sleep(0.5)
             return True
         else:
-            print("Paint window not found")
+            if report_missing:
+                print("Paint window not found")
             return False
     except Exception as e:
         print(f"Could not focus Paint window: {e}")
         return False
 
 
-def click_tool(tool_name, positions):
-    """Clicks on a specific tool in Paint."""
+def ensure_paint_window(driver=None):
+    """Focus an open Paint window, launching Paint only if there is none.
+
+    Returns "reused", "launched", or None when no window could be focused.
+    """
+    driver = driver or get_driver()
+    if focus_paint_window(driver, report_missing=False):
+        return "reused"
+    if open_ms_paint(driver) and focus_paint_window(driver):
+        # A fresh window needs a moment before it takes input.
+        driver.sleep(1)
+        return "launched"
+    return None
+
+
+def click_tool(tool_name, positions, pacer=None, driver=None):
+    """Clicks on a specific tool in Paint.
+
+    With a pacing.Pacer the fixed sleeps are replaced by waiting for the tool
+    button's highlight to change.
+    """
     if tool_name in positions:
         x, y = positions[tool_name]
-        pyautogui.moveTo(x, y)
-        time.sleep(0.3)
-        pyautogui.click(x=x, y=y)
-        time.sleep(0.3)
+        with span("click_tool", tool=tool_name):
+            if pacer is not None:
+                pacer.click_tool(x, y)
+                return True
+            driver = driver or get_driver()
+            driver.move_to(x, y)
+            driver.sleep(0.3)
+            driver.click(x=x, y=y)
+            driver.sleep(0.3)
         return True
     return False
 
@@ -0,0 +1,240 @@
+import math
+from collections import namedtuple
+
+import numpy as np
+
+from .transform import is_path_shape
+
+# planner.py
+# Orders a shape list before drawing so that each MS Paint tool is clicked once
+# per group and the cursor travels as little as possible between strokes.
+# Paint draws outlines only, so reordering never changes the final picture.
+
+# Rough cost of the fixed waits around a tool click in the Paint backend:
+# click_tool sleeps 0.3 + 0.3, the backend waits 0.1, and pyautogui adds its
+# default 0.1 s PAUSE after the moveTo and the click.
+TOOL_SWITCH_SECONDS = 0.9
+# Canvas focus click made after each tool switch (0.2 s sleep + PAUSE).
+FOCUS_CLICK_SECONDS = 0.3
+
+# 2-opt is O(n^2) per pass; above this group size nearest-neighbour is enough.
+TWO_OPT_MAX_GROUP = 150
+
+# Shapes drawn with a tool of a different name. A polyline is one freehand
+# pencil stroke through its points, with no commit click at the end.
+SHAPE_TOOLS = {"polyline": "pencil"}
+
+StrokePlan = namedtuple(
+    "StrokePlan",
+    [
+        "shapes",                   # reordered shape dicts, ready for draw_shapes
+        "tool_switches",            # tool clicks needed by the plan
+        "naive_tool_switches",      # tool clicks made when drawing in model order
+        "travel",                   # planned cursor travel, in pixels
+        "naive_travel",             # cursor travel in model order, in pixels
+        "estimated_seconds_saved",
+    ],
+)
+
+
+def tool_for(shape_name):
+    """Paint tool that draws `shape_name` (usually the tool of the same name)."""
+    shape_name = str(shape_name).lower()
+    return SHAPE_TOOLS.get(shape_name, shape_name)
+
+
+def _endpoints(shape, origin):
+    ox, oy = origin
+    if _has_points(shape):
+        (sx, sy), (ex, ey) = shape["points"][0], shape["points"][-1]
+        sx, sy, ex, ey = sx + ox, sy + oy, ex + ox, ey + oy
+        # Paths end where they stop (there is no commit click); a vertex
+        # polygon is closed by clicking its first vertex again.
+        if shape["shape"].lower() == "polygon":
+            return (sx, sy), (ex, ey), (sx, sy)
+        return (sx, sy), (ex, ey), (ex, ey)
+    sx, sy = shape["start_x"] + ox, shape["start_y"] + oy
+    ex, ey = shape["end_x"] + ox, shape["end_y"] + oy
+    return (sx, sy), (ex, ey), ((sx + ex) / 2.0, (sy + ey) / 2.0)
+
+
+def _has_points(shape):
+    return is_path_shape(str(shape.get("shape", "")).lower(), shape)
+
+
+def _dist(a, b):
+    return math.hypot(a[0] - b[0], a[1] - b[1])
+
+
+def _path_travel(shapes, positions, origin, active_tool=None, always_click=False):
+    """Cursor travel for drawing `shapes` in order, toolbar trips included.
+
+    Each stroke moves cursor -> start -> end, then clicks its midpoint to commit.
+    With always_click the tool is re-clicked before every shape, as draw_shapes
+    did before planning.
+    """
+    travel = 0.0
+    cursor = None
+    for shape in shapes:
+        tool = tool_for(shape["shape"])
+        if (always_click or tool != active_tool) and tool in positions:
+            button = tuple(positions[tool])
+            if cursor is not None:
+                travel += _dist(cursor, button)
+            cursor = button
+            active_tool = tool
+        start, end, mid = _endpoints(shape, origin)
+        if cursor is not None:
+            travel += _dist(cursor, start)
+        travel += _dist(start, end) + _dist(end, mid)
+        cursor = mid
+    return travel
+
+
+def _count_switches(shapes, active_tool=None):
+    switches = 0
+    for shape in shapes:
+        tool = tool_for(shape["shape"])
+        if tool != active_tool:
+            switches += 1
+            active_tool = tool
+    return switches
+
+
+def _nearest_neighbour(entries, exits, origin_point):
+    starts = np.asarray(entries, dtype=np.float64)
+    taken = np.zeros(len(entries), dtype=bool)
+    order = []
+    cursor = origin_point
+    for _ in range(len(entries)):
+        d = np.hypot(starts[:, 0] - cursor[0], starts[:, 1] - cursor[1])
+        d[taken] = np.inf
+        best = int(np.argmin(d))
+        taken[best] = True
+        order.append(best)
+        cursor = exits[best]
+    return order
+
+
+def _two_opt(order, entries, exits, origin_point):
+    """Improve an open route by segment reversals.
+
+    Costs are asymmetric (leave a stroke at its midpoint, enter at its start),
+    so the reversed interior is re-priced with prefix sums of the backward
+    costs instead of being assumed equal.
+    """
+    def cost(a, b):
+        src = origin_point if a is None else exits[a]
+        return _dist(src, entries[b])
+
+    def prefix_sums():
+        fwd = [0.0]
+        bwd = [0.0]
+        for k in range(n - 1):
+            fwd.append(fwd[-1] + cost(order[k], order[k + 1]))
+            bwd.append(bwd[-1] + cost(order[k + 1], order[k]))
+        return fwd, bwd
+
+    n = len(order)
+    improved = True
+    while improved:
+        improved = False
+        fwd, bwd = prefix_sums()
+        for i in range(n - 1):
+            for j in range(i + 1, n):
+                prev = order[i - 1] if i > 0 else None
+                nxt = order[j + 1] if j + 1 < n else None
+                before = cost(prev, order[i]) + (fwd[j] - fwd[i])
+                after = cost(prev, order[j]) + (bwd[j] - bwd[i])
+                if nxt is not None:
+                    before += cost(order[j], nxt)
+                    after += cost(order[i], nxt)
+                if after < before - 1e-9:
+                    order[i:j + 1] = reversed(order[i:j + 1])
+                    fwd, bwd = prefix_sums()
+                    improved = True
+    return order
+
+
+def _order_group(group, start_point, origin):
+    points = [_endpoints(shape, origin) for shape in group]
+    entries = [p[0] for p in points]
+    exits = [p[2] for p in points]
+    order = _nearest_neighbour(entries, exits, start_point)
+    if len(order) <= TWO_OPT_MAX_GROUP:
+        order = _two_opt(order, entries, exits, start_point)
+
+    ordered = []
+    cursor = start_point
+    for k in order:
+        shape = group[k]
+        start, end, mid = points[k]
+        # A line or open path looks the same drawn either way; start from the nearer end.
+        kind = shape["shape"].lower()
+        if _has_points(shape) and kind != "polygon":
+            if _dist(cursor, end) < _dist(cursor, start):
+                shape = dict(shape, points=list(reversed(shape["points"])))
+                for a, b in (("start_x", "end_x"), ("start_y", "end_y")):
+                    if a in shape and b in shape:
+                        shape[a], shape[b] = shape[b], shape[a]
+                start, end, mid = end, start, start
+        elif kind == "line" and _dist(cursor, end) < _dist(cursor, start):
+            shape = dict(shape, start_x=shape["end_x"], start_y=shape["end_y"],
+                         end_x=shape["start_x"], end_y=shape["start_y"])
+        ordered.append(shape)
+        cursor = mid
+    return ordered, cursor
+
+
+def plan_strokes(shapes_list, positions, origin=(0, 0), active_tool=None):
+    """Group shapes by tool and order each group to minimise cursor travel.
+
+    - positions: calibrated tool positions (screen coordinates)
+    - origin: screen position of the canvas top-left, added to shape coordinates
+    - active_tool: tool already selected in Paint, drawn first if present
+    Shapes without a known tool or coordinates are kept, in their original
+    order, at the end so draw_shapes can still report them.
+    """
+    groups = {}
+    plannable = []
+    leftovers = []
+    for shape in shapes_list:
+        tool = tool_for(shape.get("shape", ""))
+        if tool in positions and (_has_points(shape) or all(k in shape for k in ("start_x", "start_y", "end_x", "end_y"))):
+            groups.setdefault(tool, []).append(shape)
+            plannable.append(shape)
+        else:
+            leftovers.append(shape)
+
+    tool_order = list(groups)
+    if active_tool in groups:
+        tool_order.remove(active_tool)
+        tool_order.insert(0, active_tool)
+
+    planned = []
+    for tool in tool_order:
+        ordered, _ = _order_group(groups[tool], tuple(positions[tool]), origin)
+        planned.extend(ordered)
+
+    tool_switches = _count_switches(planned, active_tool)
+    naive_switches = len(plannable)
+    travel = _path_travel(planned, positions, origin, active_tool)
+    naive_travel = _path_travel(plannable, positions, origin, always_click=True)
+    saved = (naive_switches - tool_switches) * (TOOL_SWITCH_SECONDS + FOCUS_CLICK_SECONDS)
+
+    return StrokePlan(
+        shapes=planned + leftovers,
+        tool_switches=tool_switches,
+        naive_tool_switches=naive_switches,
+        travel=travel,
+        naive_travel=naive_travel,
+        estimated_seconds_saved=saved,
+    )
+
+
+def describe_plan(plan):
+    return (
+        f"Stroke plan: {plan.tool_switches} tool clicks (was {plan.naive_tool_switches}), "
+        f"cursor travel {plan.travel:.0f}px (was {plan.naive_travel:.0f}px), "
+        f"~{plan.estimated_seconds_saved:.1f}s saved"
+    )
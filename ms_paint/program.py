@@ -0,0 +1,331 @@
+import contextlib
+import hashlib
+import io
+import json
+import os
+import struct
+import tempfile
+import threading
+
+import numpy as np
+
+from .driver import get_driver
+from .metrics import span
+from .simplify import DEFAULT_TOLERANCE
+
+# program.py
+# Compiles a shape list + calibration into the exact input-event sequence the
+# Paint backend would produce (moves, clicks, button presses, sleeps), stored
+# as a compact NumPy record array. Programs are saved in a small binary format
+# under .cache/programs, keyed by a hash of the scene, and can be found again
+# by prompt, so redrawing a known scene skips generation, transform and
+# planning and just replays the events with tight, drift-free timing.
+
+PROGRAM_DIR = os.path.join(".cache", "programs")
+INDEX_FILE = "index.json"
+PROGRAM_VERSION = 2
+
+# Ops. MOVE uses x, y and duration; CLICK uses x, y; SLEEP uses duration.
+MOVE, CLICK, DOWN, UP, SLEEP = range(5)
+OP_NAMES = ("move", "click", "down", "up", "sleep")
+
+EVENT_DTYPE = np.dtype([("op", "<u1"), ("x", "<i4"), ("y", "<i4"), ("duration", "<f4")])
+
+# File layout: magic, version, event count, 32-byte scene hash, then the events.
+_MAGIC = b"PPRG"
+_HEADER = struct.Struct("<4sHI32s")
+
+
+class Program:
+    """Array-backed input-event program for one scene."""
+
+    __slots__ = ("events", "scene_hash")
+
+    def __init__(self, events, scene_hash):
+        self.events = np.asarray(events, dtype=EVENT_DTYPE)
+        self.scene_hash = scene_hash
+
+    def __len__(self):
+        return len(self.events)
+
+    @property
+    def duration(self):
+        """Seconds the program takes at speed 1.0 (sleeps + timed moves)."""
+        return float(self.events["duration"].sum())
+
+    def counts(self):
+        ops, counts = np.unique(self.events["op"], return_counts=True)
+        return {OP_NAMES[op]: int(n) for op, n in zip(ops, counts)}
+
+    # --- binary format ---
+
+    def to_bytes(self):
+        header = _HEADER.pack(_MAGIC, PROGRAM_VERSION, len(self.events), bytes.fromhex(self.scene_hash))
+        return header + self.events.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, count, digest = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != PROGRAM_VERSION:
+            raise ValueError("Not a compatible drawing program file.")
+        events = np.frombuffer(data, dtype=EVENT_DTYPE, count=count, offset=_HEADER.size)
+        return cls(events.copy(), digest.hex())
+
+    def save(self, path):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(self.to_bytes())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+class _Recorder:
+    """Driver stand-in that turns input calls into program events."""
+
+    def __init__(self):
+        self.events = []
+        self.position_xy = (0, 0)
+        self.clock = 0.0
+
+    def move_to(self, x, y, duration=0.0):
+        self.position_xy = (int(x), int(y))
+        self.events.append((MOVE, int(x), int(y), duration))
+        self.clock += duration
+
+    def click(self, x=None, y=None):
+        if x is not None and y is not None:
+            self.position_xy = (int(x), int(y))
+        self.events.append((CLICK,) + self.position_xy + (0.0,))
+
+    def mouse_down(self, button="left"):
+        self.events.append((DOWN,) + self.position_xy + (0.0,))
+
+    def mouse_up(self, button="left"):
+        self.events.append((UP,) + self.position_xy + (0.0,))
+
+    def sleep(self, seconds):
+        if seconds <= 0:
+            return
+        # Merge back-to-back sleeps into one event.
+        if self.events and self.events[-1][0] == SLEEP:
+            op, x, y, duration = self.events[-1]
+            self.events[-1] = (SLEEP, x, y, duration + seconds)
+        else:
+            self.events.append((SLEEP, 0, 0, seconds))
+        self.clock += seconds
+
+    def grab(self, region):
+        # Confirming pacers cannot be compiled; this only serves baselines.
+        left, top, width, height = region
+        return np.zeros((height, width, 3), dtype=np.uint8)
+
+    def now(self):
+        return self.clock
+
+
+def scene_hash(shapes, calibration, transform=None, plan=True, pacer=None, optimize=True,
+               simplify=DEFAULT_TOLERANCE):
+    """Stable hash of everything that determines a program."""
+    payload = {
+        "version": PROGRAM_VERSION,
+        "shapes": shapes,
+        "tools": calibration.tools,
+        "canvas": calibration.canvas_bounds,
+        "transform": None if transform is None else [transform.scale, transform.offset],
+        "plan": bool(plan),
+        "delays": None if pacer is None else sorted(pacer.delays.items()),
+        "optimize": bool(optimize),
+        "simplify": simplify or None,
+    }
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=list)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def compile_scene(shapes, calibration=None, transform=None, pacer=None, plan=True, optimize=True,
+                  simplify=DEFAULT_TOLERANCE):
+    """Lower `shapes` to a Program by running the Paint backend against a recorder.
+
+    Opening and focusing Paint are not part of the program (see replay). A
+    pacer must use confirm=False: learned delays compile, screen waits do not.
+    """
+    from .calibration import get_calibration
+    from .draw_shapes import PaintBackend, draw_shapes
+    from .pacing import Pacer
+
+    if pacer is not None and pacer.confirm:
+        raise ValueError("Only pacers with confirm=False can be compiled.")
+    calibration = calibration or get_calibration()
+    digest = scene_hash(shapes, calibration, transform, plan, pacer, optimize, simplify)
+    recorder = _Recorder()
+    if pacer is not None:
+        learned = pacer
+        pacer = Pacer(driver=recorder, confirm=False, path=None)
+        pacer.delays = dict(learned.delays)
+
+    class _CompileBackend(PaintBackend):
+        def prepare(self, canvas_bounds):
+            return True
+
+        def finish(self):
+            return True
+
+    with span("compile_scene"), contextlib.redirect_stdout(io.StringIO()):
+        draw_shapes(shapes, backend=_CompileBackend(pacer=pacer, driver=recorder),
+                    plan=plan, transform=transform, calibration=calibration, optimize=optimize,
+                    simplify=simplify)
+    return Program(recorder.events, digest)
+
+
+def replay(program, driver=None, speed=1.0, cancel_event=None):
+    """Execute `program` on `driver`; returns False if cancelled.
+
+    Every event has an absolute deadline on the driver's clock, so time lost
+    in one step is made up in the next sleep instead of accumulating. `speed`
+    scales all sleeps and move durations (2.0 = twice as fast).
+    """
+    driver = driver or get_driver()
+    scale = 1.0 / speed
+    ops = program.events["op"].tolist()
+    xs = program.events["x"].tolist()
+    ys = program.events["y"].tolist()
+    durations = (program.events["duration"].astype(np.float64) * scale).tolist()
+
+    with span("replay"):
+        deadline = driver.now()
+        for op, x, y, duration in zip(ops, xs, ys, durations):
+            if op == SLEEP:
+                deadline += duration
+                remaining = deadline - driver.now()
+                if remaining > 0:
+                    driver.sleep(remaining)
+                if cancel_event is not None and cancel_event.is_set():
+                    print("Replay cancelled.")
+                    return False
+            elif op == MOVE:
+                driver.move_to(x, y, duration=duration)
+                deadline = max(deadline + duration, driver.now())
+            elif op == CLICK:
+                driver.click(x, y)
+            elif op == DOWN:
+                driver.mouse_down()
+            elif op == UP:
+                driver.mouse_up()
+    return True
+
+
+def replay_in_paint(program, driver=None, speed=1.0, cancel_event=None, calibration=None, drift=None):
+    """Focus (or open) Paint as PaintBackend.prepare does, then replay.
+
+    With `drift` (a drift.DriftMonitor) and the `calibration` the program was
+    compiled for, the screen is checked first; if Paint has moved, nothing is
+    replayed and None is returned so the caller can draw the scene afresh.
+    """
+    from .paint import ensure_paint_window
+
+    driver = driver or get_driver()
+    if ensure_paint_window(driver) is None:
+        print("Please click on the Paint window and run again")
+        return False
+    if drift is not None and calibration is not None:
+        checked = drift.check(calibration, driver)
+        if checked is not calibration or drift.last_report.lost:
+            print("Paint has moved since this drawing was stored; drawing it again.")
+            return None
+    return replay(program, driver, speed=speed, cancel_event=cancel_event)
+
+
+class ProgramCache:
+    """Compiled programs on disk, by scene hash, plus a prompt -> scene index.
+
+    Index entries include the calibration, so moving Paint's toolbar or canvas
+    never replays a stale program.
+    """
+
+    def __init__(self, directory=PROGRAM_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._index = None
+
+    def _path(self, digest):
+        return os.path.join(self.directory, f"{digest}.pprog")
+
+    def _index_path(self):
+        return os.path.join(self.directory, INDEX_FILE)
+
+    def _load_index(self):
+        if self._index is None:
+            try:
+                with open(self._index_path(), "r", encoding="utf-8") as f:
+                    self._index = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError, OSError):
+                self._index = {}
+        return self._index
+
+    @staticmethod
+    def _alias(key, calibration):
+        raw = json.dumps([key, calibration.tools, calibration.canvas_bounds], sort_keys=True, default=list)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, digest):
+        try:
+            return Program.load(self._path(digest))
+        except (FileNotFoundError, ValueError, struct.error):
+            return None
+
+    def put(self, program, key=None, calibration=None):
+        """Store `program`; with `key` (e.g. a prompt cache key) also index it."""
+        program.save(self._path(program.scene_hash))
+        if key is not None:
+            self.link(key, calibration, program.scene_hash)
+        return program
+
+    def link(self, key, calibration, digest):
+        with self._lock:
+            index = self._load_index()
+            index[self._alias(key, calibration)] = digest
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(index, f)
+            os.replace(tmp_path, self._index_path())
+
+    def lookup(self, key, calibration):
+        """Program previously stored under `key` for this calibration, or None."""
+        with self._lock:
+            digest = self._load_index().get(self._alias(key, calibration))
+        return self.get(digest) if digest else None
+
+    def compile(self, shapes, calibration=None, key=None, **kwargs):
+        """Compiled program for `shapes`, reusing the stored one when the scene is known."""
+        from .calibration import get_calibration
+
+        calibration = calibration or get_calibration()
+        digest = scene_hash(shapes, calibration, **kwargs)
+        program = self.get(digest)
+        if program is None:
+            program = compile_scene(shapes, calibration, **kwargs)
+            self.put(program, key=key, calibration=calibration)
+        elif key is not None:
+            self.link(key, calibration, digest)
+        return program
+
+
+_program_cache = None
+
+
+def get_program_cache():
+    global _program_cache
+    if _program_cache is None:
+        _program_cache = ProgramCache()
+    return _program_cache
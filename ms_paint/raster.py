@@ -0,0 +1,322 @@
+import numpy as np
+from PIL import Image
+
+from .transform import is_path_shape
+
+# raster.py
+# Offscreen drawing backend: rasterizes the calibrated MS Paint primitives into
+# a NumPy canvas (no display, no pyautogui) and writes the result with Pillow.
+# Every primitive is lowered to straight segments and all segments of a batch
+# are rasterized in one vectorized pass, so thousands of shapes render in
+# milliseconds.
+
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+
+
+def _normalize_boxes(boxes):
+    """Return (left, top, right, bottom) columns for an (N, 4) array of drags."""
+    x0, y0, x1, y1 = boxes.T
+    return np.minimum(x0, x1), np.minimum(y0, y1), np.maximum(x0, x1), np.maximum(y0, y1)
+
+
+def _closed_segments(vertices):
+    """(N, K, 2) vertex rings -> (N*K, 4) segments, closing each ring."""
+    nxt = np.roll(vertices, -1, axis=1)
+    return np.concatenate([vertices, nxt], axis=2).reshape(-1, 4)
+
+
+def _ellipse_vertex_count(rx, ry):
+    """Vertices for each ellipse so the chord error stays under half a pixel.
+
+    Rounded up to a power of two, so ellipses of similar size share a count
+    and can be batched together (see shapes_to_segments).
+    """
+    r = np.fmax(np.fmax(rx, ry), 1.0)
+    step = np.arccos(np.maximum(1.0 - 0.5 / r, -1.0))
+    k = np.clip(np.ceil(np.pi / step), 16, 2048)
+    return np.exp2(np.ceil(np.log2(k))).astype(np.int64)
+
+
+def _segments_line(boxes):
+    return boxes.astype(np.float64)
+
+
+def _segments_rectangle(boxes):
+    l, t, r, b = _normalize_boxes(boxes)
+    ring = np.stack([np.stack([l, t], 1), np.stack([r, t], 1), np.stack([r, b], 1), np.stack([l, b], 1)], axis=1)
+    return _closed_segments(ring)
+
+
+def _segments_triangle(boxes):
+    # MS Paint's triangle: apex centred on the top edge, base along the bottom.
+    l, t, r, b = _normalize_boxes(boxes)
+    mx = (l + r) / 2.0
+    ring = np.stack([np.stack([mx, t], 1), np.stack([r, b], 1), np.stack([l, b], 1)], axis=1)
+    return _closed_segments(ring)
+
+
+def _segments_right_triangle(boxes):
+    # Right angle in the bottom-left corner, as MS Paint draws it.
+    l, t, r, b = _normalize_boxes(boxes)
+    ring = np.stack([np.stack([l, t], 1), np.stack([r, b], 1), np.stack([l, b], 1)], axis=1)
+    return _closed_segments(ring)
+
+
+def _segments_diamond(boxes):
+    l, t, r, b = _normalize_boxes(boxes)
+    mx, my = (l + r) / 2.0, (t + b) / 2.0
+    ring = np.stack([np.stack([mx, t], 1), np.stack([r, my], 1), np.stack([mx, b], 1), np.stack([l, my], 1)], axis=1)
+    return _closed_segments(ring)
+
+
+def _segments_circle(boxes):
+    # MS Paint's "circle" tool is an oval inscribed in the dragged box.
+    l, t, r, b = _normalize_boxes(boxes)
+    cx, cy = (l + r) / 2.0, (t + b) / 2.0
+    rx, ry = (r - l) / 2.0, (b - t) / 2.0
+    k = int(_ellipse_vertex_count(rx, ry).max(initial=16))
+    theta = np.linspace(0.0, 2.0 * np.pi, k, endpoint=False)
+    xs = cx[:, None] + rx[:, None] * np.cos(theta)[None, :]
+    ys = cy[:, None] + ry[:, None] * np.sin(theta)[None, :]
+    return _closed_segments(np.stack([xs, ys], axis=2))
+
+
+# A bounding-box drag with the polygon tool only lays down its first edge.
+_segments_polygon = _segments_line
+
+
+SEGMENT_BUILDERS = {
+    "line": _segments_line,
+    "rectangle": _segments_rectangle,
+    "triangle": _segments_triangle,
+    "circle": _segments_circle,
+    "diamond": _segments_diamond,
+    "right_triangle": _segments_right_triangle,
+    "polygon": _segments_polygon,
+}
+
+
+def _path_segments(points, closed=False):
+    """(K, 2) vertices of a path -> (K-1, 4) segments, or K for a closed ring."""
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    if closed:
+        points = np.concatenate([points, points[:1]])
+    return np.concatenate([points[:-1], points[1:]], axis=1)
+
+
+def _clip_steps(x0, y0, dx, dy, steps, clip):
+    """Range [k0, k1] of sample steps that can land inside `clip` (Liang-Barsky).
+
+    Samples keep the unclipped parametrization, so a clipped segment paints
+    exactly the pixels the whole one would paint inside the box.
+    """
+    left, top, right, bottom = clip
+    # One pixel of padding: samples just outside still round onto the edge.
+    t0 = np.zeros(len(x0))
+    t1 = np.ones(len(x0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for p, q in ((-dx, x0 - (left - 1)), (dx, (right + 1) - x0),
+                     (-dy, y0 - (top - 1)), (dy, (bottom + 1) - y0)):
+            r = q / p
+            t0 = np.where(p < 0, np.maximum(t0, r), t0)
+            t1 = np.where(p > 0, np.minimum(t1, r), t1)
+            # Parallel to this edge and outside it: nothing to draw.
+            t1 = np.where((p == 0) & (q < 0), -1.0, t1)
+    k0 = np.clip(np.floor(t0 * steps), 0, steps).astype(np.int64)
+    k1 = np.clip(np.ceil(t1 * steps), -1, steps).astype(np.int64)
+    k1[t1 < t0] = -1
+    return k0, np.maximum(k1, k0 - 1)
+
+
+def sample_segments(segments, clip=None):
+    """Pixel samples along every (x0, y0, x1, y1) row: (xs, ys, segment index).
+
+    With `clip` = (left, top, right, bottom), only the part of each segment
+    near that box is sampled, so long segments cost nothing outside it.
+    """
+    segments = np.asarray(segments, dtype=np.float64).reshape(-1, 4)
+    x0, y0, x1, y1 = segments.T
+    dx, dy = x1 - x0, y1 - y0
+    steps = np.maximum(np.abs(dx), np.abs(dy)).round().astype(np.int64)
+    if clip is None:
+        k0, k1 = np.zeros_like(steps), steps
+    else:
+        k0, k1 = _clip_steps(x0, y0, dx, dy, steps, clip)
+    counts = k1 - k0 + 1
+    total = int(counts.sum())
+
+    # Index of each sample within its own segment, without a Python loop.
+    seg = np.repeat(np.arange(len(segments)), counts)
+    starts = np.cumsum(counts) - counts
+    local = np.arange(total) - starts[seg] + k0[seg]
+    t = local / np.maximum(steps, 1)[seg]
+
+    xs = np.rint(x0[seg] + dx[seg] * t).astype(np.int64)
+    ys = np.rint(y0[seg] + dy[seg] * t).astype(np.int64)
+    return xs, ys, seg
+
+
+def rasterize_segments(pixels, segments, color=BLACK, origin=(0, 0)):
+    """Draw every (x0, y0, x1, y1) row of `segments` into `pixels` in one pass.
+
+    `origin` is the coordinate of pixels[0, 0], so a tile of a larger image
+    is drawn from the same samples (and roundings) as the whole image.
+    """
+    if len(segments) == 0:
+        return
+    h, w = pixels.shape[:2]
+    ox, oy = origin
+    xs, ys, _ = sample_segments(segments, clip=(ox, oy, ox + w - 1, oy + h - 1))
+    xs, ys = xs - ox, ys - oy
+    inside = (xs >= 0) & (xs < w) & (ys >= 0) & (ys < h)
+    pixels[ys[inside], xs[inside]] = color
+
+
+def _circle_bucket(box):
+    try:
+        rx, ry = abs(float(box[2]) - float(box[0])) / 2.0, abs(float(box[3]) - float(box[1])) / 2.0
+    except (TypeError, ValueError):
+        return 0
+    return int(_ellipse_vertex_count(np.float64(rx), np.float64(ry)))
+
+
+def shapes_to_segments(shapes, origin=(0, 0), owners=False):
+    """Lower model shape dicts to one (M, 4) segment array in canvas pixels.
+
+    `origin` is subtracted from every coordinate, so screen-space shapes can be
+    mapped onto a canvas whose top-left sits at that screen position. With
+    owners=True an (M,) array of the index of the shape each segment came
+    from is returned as well; unknown shapes simply own no segments.
+    """
+    grouped = {}
+    ox, oy = origin
+    parts = []
+    part_owners = []
+    for i, shape in enumerate(shapes):
+        shape_type = str(shape.get("shape", "")).lower()
+        if is_path_shape(shape_type, shape):
+            if len(shape.get("points", ())) >= 2:
+                closed = shape_type == "polygon"
+                parts.append(_path_segments(shape["points"], closed) - (ox, oy, ox, oy))
+                part_owners.append(np.full(len(parts[-1]), i))
+            continue
+        if shape_type not in SEGMENT_BUILDERS:
+            continue
+        try:
+            box = (shape["start_x"], shape["start_y"], shape["end_x"], shape["end_y"])
+        except KeyError:
+            continue
+        # Circles are batched by vertex count, so a small one is not drawn
+        # with as many vertices as the largest circle in the scene.
+        key = (shape_type, _circle_bucket(box) if shape_type == "circle" else 0)
+        grouped.setdefault(key, ([], []))
+        grouped[key][0].append(box)
+        grouped[key][1].append(i)
+
+    for (shape_type, _), (boxes, index) in grouped.items():
+        arr = np.asarray(boxes, dtype=np.float64) - (ox, oy, ox, oy)
+        parts.append(SEGMENT_BUILDERS[shape_type](arr))
+        # Builders emit the same number of segments for every box of a type.
+        part_owners.append(np.repeat(np.asarray(index), len(parts[-1]) // len(index)))
+    if not parts:
+        segments, owner = np.empty((0, 4), dtype=np.float64), np.empty(0, dtype=np.int64)
+    else:
+        segments, owner = np.concatenate(parts), np.concatenate(part_owners).astype(np.int64)
+    return (segments, owner) if owners else segments
+
+
+class RasterBackend:
+    """Headless drawing backend for `draw_shapes`.
+
+    Mirrors the MS Paint backend's interface (prepare / select_tool / drag /
+    finish) but draws into an in-memory canvas the size of the calibrated
+    Paint canvas. Use `render` to draw a whole shape list in one vectorized
+    call and `save` to write a PNG.
+    """
+
+    def __init__(self, width=None, height=None, background=WHITE, color=BLACK):
+        self.background = background
+        self.color = color
+        self.origin = (0, 0)
+        self.active_tool = None
+        self.pixels = None
+        self._pending = []
+        if width and height:
+            self.pixels = self._blank(width, height)
+
+    def _blank(self, width, height):
+        return np.full((int(height), int(width), 3), self.background, dtype=np.uint8)
+
+    # --- backend interface used by draw_shapes ---
+
+    def prepare(self, canvas_bounds):
+        """Size the canvas to the calibrated bounds (screen coordinates)."""
+        left, top, right, bottom = canvas_bounds
+        self.origin = (left, top)
+        if self.pixels is None:
+            self.pixels = self._blank(right - left + 1, bottom - top + 1)
+        return True
+
+    def select_tool(self, tool_name, positions=None):
+        self.active_tool = tool_name
+        return True
+
+    def drag(self, tool_name, start, end, canvas_bounds=None):
+        """Queue one primitive; screen coordinates, as produced by transform.py."""
+        self._pending.append({
+            "shape": tool_name,
+            "start_x": start[0], "start_y": start[1],
+            "end_x": end[0], "end_y": end[1],
+        })
+
+    def stroke(self, tool_name, points, canvas_bounds=None):
+        """Queue a freehand path through screen `points`."""
+        self._pending.append({"shape": "polyline", "points": [tuple(p) for p in points]})
+
+    def polygon(self, tool_name, points, canvas_bounds=None):
+        """Queue a closed polygon through screen `points`."""
+        self._pending.append({"shape": "polygon", "points": [tuple(p) for p in points]})
+
+    def capture(self, canvas_bounds=None):
+        """The canvas as drawn so far (the offscreen counterpart of a screenshot)."""
+        self.flush()
+        return self.pixels
+
+    def finish(self):
+        self.flush()
+        return True
+
+    # --- batch API ---
+
+    def flush(self):
+        """Rasterize every queued drag in a single vectorized pass."""
+        if self._pending:
+            self.render(self._pending, origin=self.origin)
+            self._pending = []
+
+    def render(self, shapes, origin=(0, 0)):
+        """Draw a list of shape dicts directly (canvas-relative by default)."""
+        if self.pixels is None:
+            raise ValueError("Canvas size unknown. Pass width/height or call prepare() first.")
+        rasterize_segments(self.pixels, shapes_to_segments(shapes, origin), self.color)
+        return self.pixels
+
+    def clear(self):
+        self.pixels[...] = self.background
+        self._pending = []
+
+    def to_image(self):
+        self.flush()
+        return Image.fromarray(self.pixels, "RGB")
+
+    def save(self, path):
+        self.to_image().save(path)
+        return path
+
+
+def render_shapes_to_png(shapes, path, width, height):
+    """Render canvas-relative model shapes to a PNG without touching MS Paint."""
+    backend = RasterBackend(width, height)
+    backend.render(shapes)
+    return backend.save(path)
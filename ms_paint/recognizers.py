@@ -0,0 +1,232 @@
+import json
+import os
+import time
+
+import speech_recognition as sr
+
+# recognizers.py
+# Speech-to-text backends for MicSession. Every backend takes an sr.AudioData
+# and returns text, raising sr.UnknownValueError / sr.RequestError like the
+# SpeechRecognition recognize_* functions do. Backends that can stream also
+# accept raw audio chunks while the user is still speaking and report partial
+# hypotheses through an on_partial callback.
+#
+#   GoogleRecognizer   Google Web Speech API (network, final result only)
+#   VoskRecognizer     offline Vosk/Kaldi model (pip install vosk), streams partials
+#   FallbackRecognizer first backend that does not fail with a RequestError
+#   StubRecognizer     deterministic answers for tests
+#
+# Select one with SPEECH_BACKEND=google|vosk|auto (VOSK_MODEL_PATH for vosk).
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+
+
+class SpeechBackend:
+    """Base class: times every recognition so backends can be compared."""
+
+    name = "base"
+    supports_streaming = False
+
+    def __init__(self):
+        self.latencies = []
+
+    def _recognize(self, recognizer, audio):
+        raise NotImplementedError
+
+    def recognize(self, recognizer, audio):
+        started = time.perf_counter()
+        try:
+            return self._recognize(recognizer, audio)
+        finally:
+            self.latencies.append(time.perf_counter() - started)
+
+    # Streaming interface; only meaningful when supports_streaming is True.
+    def start_stream(self, on_partial=None):
+        raise NotImplementedError
+
+    def stats(self):
+        if not self.latencies:
+            return {"backend": self.name, "calls": 0}
+        ordered = sorted(self.latencies)
+        return {
+            "backend": self.name,
+            "calls": len(ordered),
+            "mean_s": sum(ordered) / len(ordered),
+            "p50_s": ordered[len(ordered) // 2],
+            "max_s": ordered[-1],
+        }
+
+
+class GoogleRecognizer(SpeechBackend):
+    name = "google"
+
+    def _recognize(self, recognizer, audio):
+        # Uses Google Web Speech API (requires internet).
+        return recognizer.recognize_google(audio)
+
+
+# Bytes handed to Vosk per call when recognizing a whole clip (0.25 s).
+VOSK_CHUNK_BYTES = SAMPLE_RATE * SAMPLE_WIDTH // 4
+
+
+def _vosk_text(kaldi, segments):
+    """Finalized segments plus whatever FinalResult() still holds, joined.
+
+    When AcceptWaveform() returns True Vosk has closed a segment at a pause;
+    that text is only available from Result() at that moment, and
+    FinalResult() later returns only what came after it.
+    """
+    tail = json.loads(kaldi.FinalResult()).get("text", "")
+    return " ".join(text for text in (*segments, tail) if text)
+
+
+class _VoskStream:
+    """Feeds raw 16 kHz mono chunks to a Vosk recognizer as they are recorded."""
+
+    def __init__(self, backend, on_partial):
+        self.backend = backend
+        self.on_partial = on_partial
+        self.kaldi = backend._new_kaldi()
+        self.started = time.perf_counter()
+        self._last_partial = ""
+        self._segments = []
+
+    def feed(self, chunk):
+        raw = chunk.get_raw_data(convert_rate=SAMPLE_RATE, convert_width=SAMPLE_WIDTH)
+        if self.kaldi.AcceptWaveform(raw):
+            self._segments.append(json.loads(self.kaldi.Result()).get("text", ""))
+            return
+        partial = json.loads(self.kaldi.PartialResult()).get("partial", "")
+        if partial and partial != self._last_partial and self.on_partial:
+            self._last_partial = partial
+            self.on_partial(partial)
+
+    def finish(self):
+        text = _vosk_text(self.kaldi, self._segments)
+        self.backend.latencies.append(time.perf_counter() - self.started)
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+class VoskRecognizer(SpeechBackend):
+    """Offline recognition with a local Vosk model directory."""
+
+    name = "vosk"
+    supports_streaming = True
+
+    def __init__(self, model_path=None):
+        super().__init__()
+        self.model_path = model_path or os.getenv("VOSK_MODEL_PATH", "vosk-model")
+        self._model = None
+
+    def _get_model(self):
+        if self._model is None:
+            try:
+                import vosk
+            except ImportError as e:
+                raise sr.RequestError("vosk is not installed (pip install vosk)") from e
+            if not os.path.isdir(self.model_path):
+                raise sr.RequestError(f"Vosk model not found at '{self.model_path}'")
+            vosk.SetLogLevel(-1)
+            self._model = vosk.Model(self.model_path)
+        return self._model
+
+    def _new_kaldi(self):
+        model = self._get_model()
+        import vosk
+        return vosk.KaldiRecognizer(model, SAMPLE_RATE)
+
+    def _recognize(self, recognizer, audio):
+        kaldi = self._new_kaldi()
+        raw = audio.get_raw_data(convert_rate=SAMPLE_RATE, convert_width=SAMPLE_WIDTH)
+        segments = []
+        for offset in range(0, len(raw), VOSK_CHUNK_BYTES):
+            if kaldi.AcceptWaveform(raw[offset:offset + VOSK_CHUNK_BYTES]):
+                segments.append(json.loads(kaldi.Result()).get("text", ""))
+        text = _vosk_text(kaldi, segments)
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+    def start_stream(self, on_partial=None):
+        return _VoskStream(self, on_partial)
+
+
+class FallbackRecognizer(SpeechBackend):
+    """Tries each backend in turn, moving on when one cannot be reached."""
+
+    name = "fallback"
+
+    def __init__(self, backends):
+        super().__init__()
+        self.backends = list(backends)
+
+    def _recognize(self, recognizer, audio):
+        last_error = None
+        for backend in self.backends:
+            try:
+                return backend.recognize(recognizer, audio)
+            except sr.RequestError as e:
+                print(f"{backend.name} recognizer unavailable ({e}); trying the next one.")
+                last_error = e
+        raise last_error or sr.RequestError("no speech backends configured")
+
+
+class _StubStream:
+    def __init__(self, backend, on_partial):
+        self.backend = backend
+        self.on_partial = on_partial
+        self.chunks = 0
+
+    def feed(self, chunk):
+        partials = self.backend.partials
+        if self.chunks < len(partials) and self.on_partial:
+            self.on_partial(partials[self.chunks])
+        self.chunks += 1
+
+    def finish(self):
+        return self.backend.recognize(None, None)
+
+
+class StubRecognizer(SpeechBackend):
+    """Deterministic backend: returns `responses` in order (None = unintelligible).
+
+    `partials` are reported one per streamed chunk; `latency` is slept per call.
+    """
+
+    name = "stub"
+    supports_streaming = True
+
+    def __init__(self, responses, partials=(), latency=0.0):
+        super().__init__()
+        self.responses = list(responses)
+        self.partials = list(partials)
+        self.latency = latency
+
+    def _recognize(self, recognizer, audio):
+        if self.latency:
+            time.sleep(self.latency)
+        if not self.responses:
+            raise sr.UnknownValueError()
+        text = self.responses.pop(0)
+        if text is None:
+            raise sr.UnknownValueError()
+        return text
+
+    def start_stream(self, on_partial=None):
+        return _StubStream(self, on_partial)
+
+
+def backend_from_env():
+    """Build the backend named by SPEECH_BACKEND (default: google)."""
+    choice = os.getenv("SPEECH_BACKEND", "google").strip().lower()
+    if choice == "vosk":
+        return VoskRecognizer()
+    if choice == "auto":
+        # Prefer the offline model when one is available; fall back to Google.
+        if os.path.isdir(os.getenv("VOSK_MODEL_PATH", "vosk-model")):
+            return FallbackRecognizer([VoskRecognizer(), GoogleRecognizer()])
+        return FallbackRecognizer([GoogleRecognizer(), VoskRecognizer()])
+    return GoogleRecognizer()
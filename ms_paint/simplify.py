@@ -0,0 +1,100 @@
+import numpy as np
+
+# simplify.py
+# Path simplification for vertex-list shapes (polygon, pencil, brush,
+# polyline). Every vertex left in a path is one mouse event in Paint, and each
+# pyautogui call costs ~0.1 s, so long model-generated outlines are reduced
+# with Ramer-Douglas-Peucker in screen pixels: the simplified path never
+# strays more than `tolerance` pixels from the original.
+
+# Default allowed deviation, in screen pixels. Paint's thinnest stroke is 1 px.
+DEFAULT_TOLERANCE = 1.0
+
+
+def dedupe_consecutive(points):
+    """Drop vertices that repeat the previous one (common after rounding to pixels)."""
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    if len(points) < 2:
+        return points
+    keep = np.ones(len(points), dtype=bool)
+    keep[1:] = (np.diff(points, axis=0) != 0).any(axis=1)
+    return points[keep]
+
+
+def _segment_distances(points, a, b):
+    """Distance of every point to the segment a-b."""
+    ab = b - a
+    denom = float(ab @ ab)
+    if denom == 0.0:
+        return np.hypot(*(points - a).T)
+    t = np.clip((points - a) @ ab / denom, 0.0, 1.0)
+    return np.hypot(*(points - (a + t[:, None] * ab)).T)
+
+
+def rdp_mask(points, tolerance=DEFAULT_TOLERANCE):
+    """Boolean mask of the vertices Ramer-Douglas-Peucker keeps.
+
+    Iterative (no recursion limit on long paths); each step measures a whole
+    span of points against its chord in one NumPy call.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    n = len(points)
+    keep = np.zeros(n, dtype=bool)
+    if n == 0:
+        return keep
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        d = _segment_distances(points[first + 1:last], points[first], points[last])
+        k = int(np.argmax(d))
+        if d[k] > tolerance:
+            split = first + 1 + k
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return keep
+
+
+def simplify_path(points, tolerance=DEFAULT_TOLERANCE, closed=False):
+    """Fewest vertices that stay within `tolerance` of the path `points`.
+
+    A closed path (a polygon outline) is split at the vertex farthest from its
+    first one, so both halves are simplified against real chords and the
+    ring keeps its shape.
+    """
+    points = dedupe_consecutive(points)
+    if closed and len(points) > 1 and (points[0] == points[-1]).all():
+        points = points[:-1]
+    if len(points) < 3:
+        return points
+    if not closed:
+        return points[rdp_mask(points, tolerance)]
+
+    far = int(np.argmax(np.hypot(*(points - points[0]).T)))
+    ring = np.concatenate([points, points[:1]])
+    mask = np.concatenate([rdp_mask(ring[:far + 1], tolerance)[:-1], rdp_mask(ring[far:], tolerance)])
+    return ring[mask][:-1]
+
+
+def simplify_scene(scene, tolerance=DEFAULT_TOLERANCE, closed_tools=("polygon",)):
+    """Simplify every path of a transform.TransformedScene in screen pixels.
+
+    Returns the new scene and (points before, points after). Box shapes are
+    untouched; paths of `closed_tools` are treated as rings.
+    """
+    paths = list(scene.paths)
+    before = after = 0
+    for i, path in enumerate(paths):
+        if path is None:
+            continue
+        simplified = simplify_path(path, tolerance, closed=scene.tools[i] in closed_tools)
+        if len(simplified) < 2:
+            # Everything rounded onto one pixel; keep a dot-sized stroke.
+            simplified = np.asarray(path[:1], dtype=np.float64).repeat(2, axis=0)
+        before += len(path)
+        after += len(simplified)
+        paths[i] = np.rint(simplified).astype(np.int64)
+    return scene._replace(paths=paths), (before, after)
@@ -0,0 +1,151 @@
+import glob
+import hashlib
+import os
+import tempfile
+import threading
+
+import cv2
+import numpy as np
+
+# templates.py
+# Loads every Tool_PNG template once and keeps, per image, the grayscale array,
+# a Canny edge map and resized variants for common display scalings. The lot
+# is persisted to a single .npz next to the PNGs, keyed by each image's content
+# hash, so later calibrations and drift checks start with everything in memory
+# and only re-decode images that actually changed.
+
+TOOL_PNG_DIR = './Tool_PNG'
+CACHE_FILE = 'templates_cache.npz'
+
+# Windows display scalings (100%-200%) the templates were not captured at.
+DPI_SCALES = (1.0, 1.25, 1.5, 1.75, 2.0)
+
+
+def _file_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()[:16]
+
+
+def _scale_key(scale):
+    return f"{int(round(scale * 100))}"
+
+
+def _variants(gray, scales):
+    out = {}
+    h, w = gray.shape[:2]
+    for scale in scales:
+        if scale == 1.0:
+            scaled = gray
+        else:
+            size = (max(int(round(w * scale)), 1), max(int(round(h * scale)), 1))
+            interp = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_CUBIC
+            scaled = cv2.resize(gray, size, interpolation=interp)
+        out[_scale_key(scale)] = scaled
+    return out
+
+
+class TemplateStore:
+    """In-memory, disk-cached set of Tool_PNG templates.
+
+    - get(name, scale): grayscale template, resized for a display scaling
+    - edges(name, scale): Canny edge map of the same
+    - templates(names, scale): {name: array}, ready for locate.locate_templates
+    Names are the PNG file stems, lower-cased ("line", "top_left", ...).
+    """
+
+    def __init__(self, directory=TOOL_PNG_DIR, scales=DPI_SCALES, cache_path=None):
+        self.directory = directory
+        self.scales = tuple(scales)
+        self.cache_path = cache_path or os.path.join(directory, CACHE_FILE)
+        self.scale = None  # display scaling detected by locate, reused afterwards
+        self._gray = {}
+        self._edges = {}
+        self._hashes = {}
+        self.load()
+
+    @property
+    def names(self):
+        return sorted(self._gray)
+
+    def _paths(self):
+        paths = {}
+        for path in glob.glob(os.path.join(self.directory, "*.png")):
+            paths[os.path.splitext(os.path.basename(path))[0].lower()] = path
+        return paths
+
+    def _read_cache(self):
+        try:
+            with np.load(self.cache_path, allow_pickle=False) as data:
+                return {key: data[key] for key in data.files}
+        except (FileNotFoundError, OSError, ValueError):
+            return {}
+
+    def load(self):
+        """Fill the store from the cache, decoding only new or changed PNGs."""
+        cached = self._read_cache()
+        dirty = False
+        for name, path in self._paths().items():
+            digest = _file_hash(path)
+            prefix = f"{name}__{digest}__"
+            gray = {}
+            edges = {}
+            for scale in self.scales:
+                key = _scale_key(scale)
+                if prefix + "gray" + key in cached and prefix + "edges" + key in cached:
+                    gray[key] = cached[prefix + "gray" + key]
+                    edges[key] = cached[prefix + "edges" + key]
+            if len(gray) != len(self.scales):
+                base = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+                if base is None:
+                    print(f"⚠️ Could not read template '{path}'. Skipping.")
+                    continue
+                gray = _variants(base, self.scales)
+                edges = {key: cv2.Canny(img, 50, 150) for key, img in gray.items()}
+                dirty = True
+            self._gray[name] = gray
+            self._edges[name] = edges
+            self._hashes[name] = digest
+        if dirty:
+            self.save()
+
+    def save(self):
+        arrays = {}
+        for name, digest in self._hashes.items():
+            prefix = f"{name}__{digest}__"
+            for key, img in self._gray[name].items():
+                arrays[prefix + "gray" + key] = img
+                arrays[prefix + "edges" + key] = self._edges[name][key]
+        directory = os.path.dirname(os.path.abspath(self.cache_path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".templates.", suffix=".npz", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez_compressed(f, **arrays)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            print(f"⚠️ Could not write template cache: {e}")
+
+    def get(self, name, scale=1.0):
+        return self._gray[name.lower()][_scale_key(scale)]
+
+    def edges(self, name, scale=1.0):
+        return self._edges[name.lower()][_scale_key(scale)]
+
+    def templates(self, names=None, scale=None):
+        scale = scale or self.scale or 1.0
+        names = self.names if names is None else names
+        return {name: self.get(name, scale) for name in names if name.lower() in self._gray}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_template_store(directory=TOOL_PNG_DIR):
+    """Process-wide TemplateStore, built (or read from cache) on first use."""
+    global _store
+    with _store_lock:
+        if _store is None or _store.directory != directory:
+            _store = TemplateStore(directory)
+        return _store
@@ -0,0 +1,222 @@
+from collections import namedtuple
+
+import numpy as np
+
+# transform.py
+# Maps model shapes (0-1000 x 0-500, see models/system_prompt.txt) onto the
+# calibrated Paint canvas in one vectorized pass. The whole shape list becomes
+# an (N, 4) array of screen coordinates before the mouse moves, and every
+# shape gets validation flags instead of a print per point.
+
+MODEL_WIDTH = 1000
+MODEL_HEIGHT = 500
+
+# "contain": uniform scale, centred (keeps the model's aspect ratio)
+# "stretch": scale x and y independently to fill the canvas
+# "offset":  no scaling, model units are pixels from the canvas top-left
+FIT_MODES = ("contain", "stretch", "offset")
+DEFAULT_FIT = "contain"
+
+# Bit flags per shape.
+OUT_OF_RANGE = 1   # outside the model space; drawn clamped to the canvas
+DEGENERATE = 2     # collapses to (almost) nothing on screen; skipped
+INVALID = 4        # unknown shape or missing/non-numeric coordinates; skipped
+SKIP_MASK = DEGENERATE | INVALID
+
+# Drags shorter than this (in screen pixels) draw nothing useful in Paint.
+MIN_EXTENT = 1.0
+
+# Bounding-box tools need both a width and a height; a line only needs length.
+_LENGTH_ONLY = {"line", "polygon"}
+
+# Shapes given as a list of vertices ("points": [[x, y], ...]) rather than a
+# drag box; their start/end are the first and last vertex. Freehand strokes
+# always are; a polygon is when it has "points" (one click per vertex).
+PATH_SHAPES = {"polyline", "pencil", "brush"}
+VERTEX_SHAPES = {"polygon"}
+
+TransformedScene = namedtuple(
+    "TransformedScene",
+    [
+        "shapes",    # the input shape dicts, in order
+        "tools",     # lower-cased shape names
+        "screen",    # (N, 4) int64 start_x, start_y, end_x, end_y on screen
+        "flags",     # (N,) uint8 bit flags (OUT_OF_RANGE | DEGENERATE | INVALID)
+        "paths",     # per shape: (K, 2) int64 screen vertices for path shapes, else None
+    ],
+)
+
+
+class CoordinateTransform:
+    """Affine map from model coordinates to screen pixels inside the canvas.
+
+    `canvas_bounds` is (left, top, right, bottom) on screen. `scale` (a number
+    or an (sx, sy) pair) and `offset` override what `fit` would compute.
+    """
+
+    __slots__ = ("canvas_bounds", "scale", "offset", "model_size")
+
+    def __init__(self, canvas_bounds, fit=DEFAULT_FIT, model_size=(MODEL_WIDTH, MODEL_HEIGHT),
+                 scale=None, offset=None):
+        if fit not in FIT_MODES:
+            raise ValueError(f"Unknown fit mode '{fit}'. Expected one of {FIT_MODES}.")
+        left, top, right, bottom = canvas_bounds
+        model_w, model_h = model_size
+        width, height = right - left, bottom - top
+
+        if scale is None:
+            if fit == "offset":
+                scale = (1.0, 1.0)
+            elif fit == "stretch":
+                scale = (width / model_w, height / model_h)
+            else:
+                s = min(width / model_w, height / model_h)
+                scale = (s, s)
+        elif np.isscalar(scale):
+            scale = (scale, scale)
+        scale = (float(scale[0]), float(scale[1]))
+
+        if offset is None:
+            # Centre the scaled model space on the canvas ("offset" keeps the corner).
+            pad_x = (width - model_w * scale[0]) / 2.0 if fit != "offset" else 0.0
+            pad_y = (height - model_h * scale[1]) / 2.0 if fit != "offset" else 0.0
+            offset = (left + pad_x, top + pad_y)
+
+        self.canvas_bounds = (left, top, right, bottom)
+        self.scale = scale
+        self.offset = (float(offset[0]), float(offset[1]))
+        self.model_size = (model_w, model_h)
+
+    def apply(self, boxes):
+        """(N, 4) model boxes -> (N, 4) float screen boxes, clamped to the canvas."""
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        sx, sy = self.scale
+        ox, oy = self.offset
+        screen = boxes * (sx, sy, sx, sy) + (ox, oy, ox, oy)
+        left, top, right, bottom = self.canvas_bounds
+        np.clip(screen[:, 0::2], left, right, out=screen[:, 0::2])
+        np.clip(screen[:, 1::2], top, bottom, out=screen[:, 1::2])
+        return screen
+
+    def apply_points(self, points):
+        """(K, 2) model points -> (K, 2) float screen points, clamped to the canvas."""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        return self.apply(np.hstack([points, points]))[:, :2]
+
+    def point(self, x, y):
+        """Map a single model point; convenience for one-off callers."""
+        sx, sy, _, _ = np.rint(self.apply((x, y, x, y))[0]).astype(np.int64)
+        return int(sx), int(sy)
+
+
+def is_path_shape(tool, shape):
+    """True if `shape` (named `tool`) is drawn through a vertex list."""
+    return tool in PATH_SHAPES or (tool in VERTEX_SHAPES and isinstance(shape, dict) and "points" in shape)
+
+
+def path_points(shape):
+    """(K, 2) float vertices of a path shape; raises ValueError if malformed."""
+    try:
+        points = np.asarray(shape["points"], dtype=np.float64)
+    except (KeyError, TypeError) as e:
+        raise ValueError("missing points") from e
+    if points.ndim != 2 or points.shape[1] != 2 or len(points) < 2 or not np.isfinite(points).all():
+        raise ValueError("a path needs at least two [x, y] points")
+    return points
+
+
+def shapes_to_array(shapes, known_tools=None):
+    """Pull coordinates out of shape dicts.
+
+    Returns an (N, 4) float array of drag boxes, INVALID flags, tool names and
+    the model-space vertices of path shapes (None for the others).
+    """
+    n = len(shapes)
+    boxes = np.full((n, 4), np.nan)
+    flags = np.zeros(n, dtype=np.uint8)
+    tools = []
+    paths = [None] * n
+    for i, shape in enumerate(shapes):
+        tool = str(shape.get("shape", "")).lower() if isinstance(shape, dict) else ""
+        tools.append(tool)
+        if not tool or (known_tools is not None and tool not in known_tools):
+            flags[i] = INVALID
+            continue
+        try:
+            if is_path_shape(tool, shape):
+                paths[i] = path_points(shape)
+                boxes[i] = (*paths[i][0], *paths[i][-1])
+            else:
+                boxes[i] = (shape["start_x"], shape["start_y"], shape["end_x"], shape["end_y"])
+        except (KeyError, TypeError, ValueError):
+            flags[i] = INVALID
+    flags[~np.isfinite(boxes).all(axis=1)] |= INVALID
+    return boxes, flags, tools, paths
+
+
+def transform_shapes(shapes, canvas_bounds, transform=None, known_tools=None):
+    """Map a whole shape list to screen coordinates and validate it.
+
+    Returns a TransformedScene; shapes whose flags intersect SKIP_MASK should
+    not be drawn. Pass `transform` to override the default contain-fit mapping.
+    """
+    shapes = list(shapes)
+    if transform is None:
+        transform = CoordinateTransform(canvas_bounds)
+    boxes, flags, tools, paths = shapes_to_array(shapes, known_tools)
+
+    model_w, model_h = transform.model_size
+    with np.errstate(invalid="ignore"):
+        outside = ((boxes < 0) | (boxes > (model_w, model_h, model_w, model_h))).any(axis=1)
+    valid = (flags & INVALID) == 0
+    flags[outside & valid] |= OUT_OF_RANGE
+
+    screen = transform.apply(np.nan_to_num(boxes))
+    dx = np.abs(screen[:, 2] - screen[:, 0])
+    dy = np.abs(screen[:, 3] - screen[:, 1])
+    length_only = np.fromiter((tool in _LENGTH_ONLY for tool in tools), dtype=bool, count=len(tools))
+    degenerate = np.where(length_only, np.hypot(dx, dy) < MIN_EXTENT, (dx < MIN_EXTENT) | (dy < MIN_EXTENT))
+
+    screen_paths = [None] * len(shapes)
+    for i, points in enumerate(paths):
+        if points is None or not valid[i]:
+            continue
+        if ((points < 0) | (points > (model_w, model_h))).any():
+            flags[i] |= OUT_OF_RANGE
+        mapped = transform.apply_points(points)
+        # A closed path starts and ends at the same vertex; judge it by its length.
+        degenerate[i] = np.hypot(*np.diff(mapped, axis=0).T).sum() < MIN_EXTENT
+        screen_paths[i] = np.rint(mapped).astype(np.int64)
+    flags[degenerate & valid] |= DEGENERATE
+
+    return TransformedScene(shapes, tools, np.rint(screen).astype(np.int64), flags, screen_paths)
+
+
+def flag_names(value):
+    """Readable names for one shape's flags, e.g. "out of range, degenerate"."""
+    names = [name for bit, name in ((OUT_OF_RANGE, "out of range"), (DEGENERATE, "degenerate"),
+                                    (INVALID, "invalid")) if value & bit]
+    return ", ".join(names) or "ok"
+
+
+def describe_flags(scene):
+    """One-line summary of what validation found, for the drawing log."""
+    flags = scene.flags
+    clamped = int(np.count_nonzero(flags & OUT_OF_RANGE))
+    degenerate = int(np.count_nonzero(flags & DEGENERATE))
+    invalid = int(np.count_nonzero(flags & INVALID))
+    drawable = int(np.count_nonzero((flags & SKIP_MASK) == 0))
+    return (f"Mapped {len(flags)} shapes to the canvas: {drawable} to draw ({clamped} clamped), "
+            f"skipped {degenerate} degenerate and {invalid} invalid.")
+
+
+def drawable_only(scene):
+    """Drop the shapes flagged for skipping, keeping the rest in order."""
+    keep = np.flatnonzero((scene.flags & SKIP_MASK) == 0)
+    if len(keep) == len(scene.flags):
+        return scene
+    return TransformedScene(
+        [scene.shapes[i] for i in keep], [scene.tools[i] for i in keep],
+        scene.screen[keep], scene.flags[keep], [scene.paths[i] for i in keep],
+    )
+
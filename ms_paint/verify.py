@@ -0,0 +1,137 @@
+from collections import namedtuple
+
+import numpy as np
+
+from .raster import WHITE, sample_segments, shapes_to_segments
+
+# verify.py
+# Post-draw check for the Paint backend. A click that misses or a Paint window
+# that lags drops shapes without any error, so after drawing we grab only the
+# canvas region and compare it with what the offscreen rasterizer says each
+# shape should have painted. Coverage is computed for every shape at once:
+# the expected pixels of all shapes are sampled in one pass, labelled with the
+# shape they belong to, and looked up in the captured ink mask. Pixels that
+# another shape also paints (within the slack) are ignored, so a dense scene
+# cannot hide a missing shape under its neighbours' ink. Shapes whose pixels
+# are mostly missing are redrawn; the rest are left alone.
+
+# A shape counts as drawn when ink lies near at least this share of its
+# pixels, and of the pixels only it paints (its neighbours' ink cannot hide a
+# missing shape there, so a lower bar is enough).
+MIN_COVERAGE = 0.9
+MIN_OWN_COVERAGE = 0.6
+# Paint's outlines do not land on exactly the same pixels as the rasterizer
+# (anti-aliasing, ellipse rounding); ink this close to an expected pixel counts.
+SLACK_PIXELS = 1
+# Per-channel distance from the background that counts as ink.
+INK_THRESHOLD = 64
+# Verify-and-redraw rounds before giving up on a shape.
+REPAIR_ROUNDS = 2
+
+VerifyReport = namedtuple(
+    "VerifyReport",
+    [
+        "coverage",   # (N,) share of each shape's expected pixels with ink nearby
+        "own",        # (N,) the same over pixels no other shape paints
+        "missing",    # indices of shapes below MIN_COVERAGE or MIN_OWN_COVERAGE
+    ],
+)
+
+
+def scene_shapes(scene, indices=None):
+    """Screen-space shape dicts for (some of) a transform.TransformedScene."""
+    indices = range(len(scene.tools)) if indices is None else indices
+    shapes = []
+    for i in indices:
+        if scene.paths[i] is not None:
+            shapes.append({"shape": scene.tools[i], "points": scene.paths[i]})
+        else:
+            sx, sy, ex, ey = (int(v) for v in scene.screen[i])
+            shapes.append({"shape": scene.tools[i], "start_x": sx, "start_y": sy, "end_x": ex, "end_y": ey})
+    return shapes
+
+
+def _grow(image, slack, reduce):
+    """Separable max/min filter over a (2 * slack + 1)^2 window."""
+    out = image.copy()
+    for axis in (1, 0):
+        src = out.copy()
+        for shift in range(1, slack + 1):
+            lead = [slice(None)] * 2
+            lag = [slice(None)] * 2
+            lead[axis], lag[axis] = slice(shift, None), slice(None, -shift)
+            out[tuple(lead)] = reduce(out[tuple(lead)], src[tuple(lag)])
+            out[tuple(lag)] = reduce(out[tuple(lag)], src[tuple(lead)])
+    return out
+
+
+def ink_mask(pixels, background=WHITE, threshold=INK_THRESHOLD, slack=SLACK_PIXELS):
+    """Pixels that differ from the background, grown by `slack` pixels."""
+    diff = np.abs(pixels.astype(np.int16) - np.asarray(background, dtype=np.int16)).max(axis=-1)
+    ink = diff > threshold
+    return _grow(ink, slack, np.logical_or) if slack > 0 else ink
+
+
+def _exclusive(xs, ys, who, shape, slack):
+    """Mask of expected pixels with no other shape's pixels within `slack`.
+
+    Ink near a pixel that several shapes paint says nothing about which of
+    them was drawn, so only pixels a single shape owns are checked.
+    """
+    empty, many = -1, np.iinfo(np.int64).max
+    owner = np.full(shape, empty, dtype=np.int64)
+    owner[ys, xs] = who
+    # Pixels claimed by two or more shapes.
+    n = int(who.max()) + 1
+    pairs = np.unique((ys * shape[1] + xs) * n + who)
+    counts = np.bincount(pairs // n, minlength=shape[0] * shape[1]).reshape(shape)
+    owner[counts > 1] = many
+
+    highest = _grow(owner, slack, np.maximum)
+    lowest = _grow(np.where(owner == empty, many, np.where(owner == many, empty - 1, owner)), slack, np.minimum)
+    return (highest[ys, xs] == who) & (lowest[ys, xs] == who)
+
+
+def _share(hit, who, count):
+    """Per-shape mean of `hit`; 1.0 for shapes with no pixels to check."""
+    share = np.ones(count)
+    expected = np.bincount(who, minlength=count)
+    found = np.bincount(who, weights=hit, minlength=count)
+    has_pixels = expected > 0
+    share[has_pixels] = found[has_pixels] / expected[has_pixels]
+    return share
+
+
+def shape_coverage(pixels, shapes, origin=(0, 0), background=WHITE, slack=SLACK_PIXELS):
+    """Per-shape share of expected pixels that have ink within `slack` in `pixels`.
+
+    `shapes` are screen-space shape dicts and `origin` the screen position of
+    pixels[0, 0]. Returns (all pixels, own pixels): the second only counts
+    pixels no other shape paints nearby. Shapes with nothing to check there
+    (or outside the capture) count as covered.
+    """
+    if not shapes:
+        return np.ones(0), np.ones(0)
+    segments, owner = shapes_to_segments(shapes, origin, owners=True)
+    xs, ys, seg = sample_segments(segments)
+    h, w = pixels.shape[:2]
+    inside = (xs >= 0) & (xs < w) & (ys >= 0) & (ys < h)
+    xs, ys, who = xs[inside], ys[inside], owner[seg[inside]]
+    if len(who) == 0:
+        return np.ones(len(shapes)), np.ones(len(shapes))
+    hit = ink_mask(pixels, background, slack=slack)[ys, xs]
+    own = _exclusive(xs, ys, who, (h, w), slack)
+    return _share(hit, who, len(shapes)), _share(hit[own], who[own], len(shapes))
+
+
+def verify_scene(pixels, scene, canvas_bounds, background=WHITE):
+    """Compare a canvas capture with the expected rendering of `scene`."""
+    coverage, own = shape_coverage(pixels, scene_shapes(scene), canvas_bounds[:2], background)
+    missing = np.flatnonzero((coverage < MIN_COVERAGE) | (own < MIN_OWN_COVERAGE))
+    return VerifyReport(coverage, own, missing)
+
+
+def capture_canvas(driver, canvas_bounds):
+    """Grab only the calibrated canvas region (inclusive bounds) from the screen."""
+    left, top, right, bottom = canvas_bounds
+    return driver.grab((left, top, right - left + 1, bottom - top + 1))
@@ -0,0 +1,172 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# session.py
+# Long-running session: listening, generation and drawing run as three asyncio
+# stages connected by queues, so the next command can be captured while the
+# previous scene is still being generated and drawn. Blocking work (input(),
+# the microphone, the model call, pyautogui) runs in executors; drawing gets a
+# dedicated single thread because pyautogui is not thread-safe.
+#
+# Control words: "stop" / "stop drawing" / "cancel" aborts the current drawing
+# and drops queued scenes; "quit" / "exit" ends the session.
+
+STOP_WORDS = {"stop", "stop drawing", "cancel"}
+QUIT_WORDS = {"quit", "exit"}
+
+
+def _text_listener():
+    try:
+        return input("> ")
+    except EOFError:
+        return "quit"
+
+
+def _voice_listener():
+    from ms_paint import transcribe_from_mic
+    text = transcribe_from_mic(timeout=5, phrase_time_limit=10)
+    if text:
+        print(f"Transcription: {text}")
+    return text
+
+
+class Session:
+    """Overlapping listen -> generate -> draw pipeline.
+
+    - listen: blocking callable returning the next command (or None to retry)
+    - generate: prompt -> list of shapes (models.gemini.generate by default)
+    - draw: (shapes, cancel_event) -> bool (ms_paint draw_shapes by default)
+    Per-scene stage timings are printed and kept in `self.timings`.
+    """
+
+    def __init__(self, voice=False, listen=None, generate=None, draw=None):
+        self.listen = listen or (_voice_listener if voice else _text_listener)
+        self.generate = generate
+        self.draw = draw
+        self.cancel = threading.Event()
+        self.timings = []
+        self._epoch = 0  # bumped by "stop"; scenes from older epochs are dropped
+        self._commands = None
+        self._scenes = None
+        self._draw_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="draw")
+
+    def _default_generate(self, prompt):
+        from models.gemini import generate
+        return generate(prompt)
+
+    def _default_draw(self, shapes, cancel_event):
+        from ms_paint.draw_shapes import draw_shapes
+        return draw_shapes(shapes, cancel_event=cancel_event)
+
+    def stop(self):
+        """Abort the drawing in progress and forget scenes not yet drawn."""
+        self._epoch += 1
+        self.cancel.set()
+        while not self._scenes.empty():
+            self._scenes.get_nowait()
+        print("Stopping: current drawing cancelled, queued scenes dropped.")
+
+    async def _listen_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = time.perf_counter()
+            text = await loop.run_in_executor(None, self.listen)
+            listen_s = time.perf_counter() - started
+            if not text or not text.strip():
+                continue
+            command = text.strip()
+            lowered = command.lower()
+            if lowered in QUIT_WORDS:
+                await self._commands.put(None)
+                return
+            if lowered in STOP_WORDS:
+                self.stop()
+                continue
+            await self._commands.put({
+                "prompt": command,
+                "epoch": self._epoch,
+                "listen_s": listen_s,
+                "queued_at": time.perf_counter(),
+            })
+
+    async def _generate_loop(self):
+        loop = asyncio.get_running_loop()
+        generate = self.generate or self._default_generate
+        while True:
+            scene = await self._commands.get()
+            if scene is None:
+                await self._scenes.put(None)
+                return
+            started = time.perf_counter()
+            scene["queue_s"] = started - scene["queued_at"]
+            try:
+                scene["shapes"] = await loop.run_in_executor(None, generate, scene["prompt"])
+            except Exception as e:
+                print(f"Error communicating with AI model: {e}")
+                continue
+            scene["generate_s"] = time.perf_counter() - started
+            scene["generated_at"] = time.perf_counter()
+            if scene["epoch"] == self._epoch:
+                await self._scenes.put(scene)
+
+    async def _draw_loop(self):
+        loop = asyncio.get_running_loop()
+        draw = self.draw or self._default_draw
+        while True:
+            scene = await self._scenes.get()
+            if scene is None:
+                return
+            if scene["epoch"] != self._epoch:
+                continue
+            shapes = scene["shapes"]
+            if not isinstance(shapes, list) or not shapes:
+                print(f"No shapes to draw for '{scene['prompt']}'.")
+                continue
+            self.cancel.clear()
+            started = time.perf_counter()
+            scene["draw_wait_s"] = started - scene["generated_at"]
+            try:
+                ok = await loop.run_in_executor(self._draw_executor, draw, shapes, self.cancel)
+            except Exception as e:
+                print(f"An unexpected error occurred during drawing: {e}")
+                ok = False
+            scene["draw_s"] = time.perf_counter() - started
+            scene["ok"] = bool(ok)
+            self._report(scene)
+
+    def _report(self, scene):
+        total = scene["queue_s"] + scene["generate_s"] + scene["draw_wait_s"] + scene["draw_s"]
+        row = {
+            "prompt": scene["prompt"],
+            "ok": scene["ok"],
+            "listen_s": round(scene["listen_s"], 3),
+            "queue_s": round(scene["queue_s"], 3),
+            "generate_s": round(scene["generate_s"], 3),
+            "draw_wait_s": round(scene["draw_wait_s"], 3),
+            "draw_s": round(scene["draw_s"], 3),
+            "command_to_done_s": round(total, 3),
+        }
+        self.timings.append(row)
+        print(
+            f"Scene '{row['prompt']}' {'done' if row['ok'] else 'not completed'}: "
+            f"listen {row['listen_s']:.2f}s | queue {row['queue_s']:.2f}s | "
+            f"generate {row['generate_s']:.2f}s | wait {row['draw_wait_s']:.2f}s | "
+            f"draw {row['draw_s']:.2f}s | command->done {row['command_to_done_s']:.2f}s"
+        )
+
+    async def run(self):
+        self._commands = asyncio.Queue()
+        self._scenes = asyncio.Queue(maxsize=4)
+        print("Session started. Type or say a prompt; 'stop' cancels drawing, 'quit' exits.")
+        try:
+            await asyncio.gather(self._listen_loop(), self._generate_loop(), self._draw_loop())
+        finally:
+            self.cancel.set()
+            self._draw_executor.shutdown(wait=True)
+        return self.timings
+
+
+def run_session(voice=False, **kwargs):
+    return asyncio.run(Session(voice=voice, **kwargs).run())
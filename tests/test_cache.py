@@ -0,0 +1,106 @@
+import json
+import os
+import threading
+import time
+
+from models import cache as cache_module
+from models import gemini
+from models.cache import ResponseCache
+from models.fakes import FakeStreamingClient
+from models.resilience import ResilientCaller
+from ms_paint.mspaintdrawer_v2 import TEST_SHAPES
+
+TEXT = json.dumps(TEST_SHAPES)
+
+
+def _age(cache, key, seconds):
+    """Backdate the disk entry for `key` by `seconds`."""
+    path = cache._path(key)
+    mtime = os.stat(path).st_mtime - seconds
+    os.utime(path, (mtime, mtime))
+
+
+def test_memory_then_disk_hits(tmp_path):
+    cache = ResponseCache(directory=str(tmp_path))
+    cache.put("a", [1])
+    assert cache.get("a") == [1]
+
+    reopened = ResponseCache(directory=str(tmp_path))
+    assert reopened.get("a") == [1]
+    assert reopened.get("a") == [1]
+    assert (cache.stats()["memory_hits"], reopened.stats()["disk_hits"], reopened.stats()["memory_hits"]) == (1, 1, 1)
+
+
+def test_memory_tier_is_least_recently_used(tmp_path):
+    cache = ResponseCache(directory=None, max_memory_entries=2)
+    cache.put("a", [1])
+    cache.put("b", [2])
+    cache.get("a")
+    cache.put("c", [3])
+    assert cache.get("b") is None
+    assert cache.get("a") == [1] and cache.get("c") == [3]
+
+
+def test_expired_entries_are_not_served(tmp_path, monkeypatch):
+    cache = ResponseCache(directory=str(tmp_path), ttl=60)
+    cache.put("a", [1])
+    now = time.time()
+    monkeypatch.setattr(cache_module.time, "time", lambda: now + 120)
+    assert cache.get("a") is None
+    assert ResponseCache(directory=str(tmp_path), ttl=60).get("a") is None
+
+
+def test_expired_files_are_evicted(tmp_path, monkeypatch):
+    cache = ResponseCache(directory=str(tmp_path), ttl=60)
+    cache.put("old", [1])
+    cache.put("raced", [2])
+    _age(cache, "old", 120)
+    _age(cache, "raced", 120)
+
+    # Another process removes "raced" between our stat() and remove().
+    remove = os.remove
+
+    def racing_remove(path):
+        remove(path)
+        if path == cache._path("raced"):
+            raise FileNotFoundError(path)
+
+    monkeypatch.setattr(cache_module.os, "remove", racing_remove)
+    cache.put("new", [3])
+    assert [key for key in ("old", "raced", "new") if os.path.exists(cache._path(key))] == ["new"]
+
+
+def test_disk_is_trimmed_oldest_first(tmp_path):
+    cache = ResponseCache(directory=str(tmp_path))
+    for i, key in enumerate("abc"):
+        cache.put(key, [i])
+        _age(cache, key, 30 - 10 * i)
+    size = os.path.getsize(cache._path("a"))
+    cache.max_disk_bytes = size * 5 // 2    # room for two entries, not three
+    cache.put("d", [3])
+    assert [key for key in "abcd" if os.path.exists(cache._path(key))] == ["c", "d"]
+
+
+def test_concurrent_requests_share_one_call(tmp_path, monkeypatch):
+    monkeypatch.setattr(gemini, "response_cache", ResponseCache(directory=str(tmp_path)))
+    monkeypatch.setattr(gemini, "model_caller", ResilientCaller(hedge=False))
+    client = FakeStreamingClient(TEXT, chunk_size=len(TEXT), delay=0.2)
+    barrier = threading.Barrier(4)
+    results = []
+
+    def ask():
+        barrier.wait()
+        results.append(gemini.generate("a house", model_client=client, wire="json"))
+
+    threads = [threading.Thread(target=ask) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    assert results == [TEST_SHAPES] * 4
+    assert client.calls == 1
+    stats = gemini.cache_stats()
+    assert (stats["misses"], stats["coalesced"]) == (1, 3)
+
+    assert gemini.generate("A house.", model_client=client, wire="json") == TEST_SHAPES
+    assert client.calls == 1
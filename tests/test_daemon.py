@@ -0,0 +1,59 @@
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from ms_paint import daemon as daemon_module
+from ms_paint.calibration import Calibration
+from ms_paint.daemon import DaemonClient, DrawingDaemon, make_server
+
+CALIBRATION = Calibration.from_data({
+    "tools": {"rectangle": [600, 100], "line": [500, 100]},
+    "canvas": {"top_left": [100, 200], "bottom_right": [1100, 700]},
+})
+RECT = {"shape": "rectangle", "start_x": 100, "start_y": 100, "end_x": 300, "end_y": 200}
+
+
+@pytest.fixture
+def served(tmp_path):
+    """An HTTP server on a free port in front of a raster daemon (not started)."""
+    drawing = DrawingDaemon(backend="raster", calibration=CALIBRATION, output_dir=str(tmp_path))
+    server = make_server(drawing, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield drawing, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+    drawing.stop()
+
+
+def _status(url):
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def test_jobs_are_drawn(served):
+    drawing, url = served
+    drawing.start()
+    assert DaemonClient(url).draw([RECT], timeout=10)
+
+
+@pytest.mark.parametrize("wait", ["abc", "nan", "-1", "inf"])
+def test_invalid_wait_is_rejected(served, wait):
+    drawing, url = served
+    job = DaemonClient(url).submit([RECT])
+    assert _status(f"{url}/jobs/{job['id']}?wait={wait}") == 400
+
+
+def test_wait_is_clamped(served, monkeypatch):
+    monkeypatch.setattr(daemon_module, "MAX_WAIT", 0.1)
+    drawing, url = served
+    job = DaemonClient(url).submit([RECT])     # never drawn: the daemon is not started
+    started = time.perf_counter()
+    assert _status(f"{url}/jobs/{job['id']}?wait=1000") == 200
+    assert time.perf_counter() - started < 2
@@ -0,0 +1,125 @@
+import json
+
+import numpy as np
+import pytest
+
+from ms_paint import calibration as calibration_module
+from ms_paint.calibration import get_calibration
+from ms_paint.driver import FakeDriver, set_driver
+from ms_paint.drift import CORNER_OFFSETS, SIGNATURE_FILE, DriftMonitor
+
+TOOLS = {"pencil": [300, 100], "line": [400, 100], "rectangle": [500, 100]}
+CANVAS = {"top_left": [200, 300], "bottom_right": [1200, 900]}
+
+
+@pytest.fixture
+def desktop(tmp_path, monkeypatch):
+    """A FakeDriver with a textured icon at every tool and a textured frame
+    just outside each canvas corner, in a scratch directory."""
+    monkeypatch.chdir(tmp_path)
+    driver = FakeDriver()
+    rng = np.random.default_rng(0)
+    corners = [(x + dx, y + dy) for (x, y), (dx, dy) in
+               zip(CANVAS.values(), (CORNER_OFFSETS[corner] for corner in CANVAS))]
+    for x, y in [*TOOLS.values(), *corners]:
+        driver.screen[y - 12:y + 13, x - 12:x + 13] = rng.integers(0, 255, (25, 25, 1), dtype=np.uint8)
+    left, top = CANVAS["top_left"]
+    right, bottom = CANVAS["bottom_right"]
+    driver.screen[top:bottom + 1, left:right + 1] = 255
+    previous = set_driver(driver)
+    with open("paint_calibration.json", "w") as f:
+        json.dump({"tools": TOOLS, "canvas": CANVAS}, f)
+    calibration_module.invalidate_calibration_cache()
+    yield driver
+    set_driver(previous)
+    calibration_module.invalidate_calibration_cache()
+
+
+def shift_toolbar(driver, dx, dy):
+    toolbar = driver.screen[:200].copy()
+    driver.screen[:200] = 255
+    driver.screen[dy:200 + dy, dx:] = toolbar[:, :driver.screen.shape[1] - dx]
+
+
+def test_check_relocates_only_moved_points(desktop):
+    monitor = DriftMonitor(desktop)
+    monitor.check(get_calibration())
+    shift_toolbar(desktop, 30, 4)
+
+    checked = monitor.check(get_calibration())
+    report = monitor.last_report
+    assert set(report.moved) == set(TOOLS) and report.lost == []
+    assert checked.tools["pencil"] == (330, 104)
+    assert get_calibration().tools["pencil"] == (330, 104)
+    assert get_calibration().canvas == CANVAS
+
+
+def test_shapes_drawn_at_canvas_corners_are_not_drift(desktop):
+    monitor = DriftMonitor(desktop)
+    monitor.record(get_calibration())
+    (left, top), (right, bottom) = CANVAS.values()
+    desktop.screen[top:top + 20, left:left + 20] = 0
+    desktop.screen[bottom - 19:bottom + 1, right - 19:right + 1] = 0
+
+    monitor.check(get_calibration())
+    assert monitor.last_report.checked == len(TOOLS) + 2
+    assert monitor.last_report.moved == {} and monitor.last_report.lost == []
+
+
+def test_check_grabs_only_small_regions(desktop):
+    monitor = DriftMonitor(desktop)
+    monitor.record(get_calibration())
+    del desktop.events[:]
+    monitor.check(get_calibration())
+    regions = [event[2] for event in desktop.events if event[1] == "grab"]
+    assert len(regions) == 3
+    assert all(height <= 17 for _, _, _, height in regions)
+
+
+def test_moved_window_relocates_canvas_corners(desktop):
+    monitor = DriftMonitor(desktop)
+    monitor.record(get_calibration())
+    desktop.screen[:] = np.roll(desktop.screen, (6, 20), axis=(0, 1))
+
+    checked = monitor.check(get_calibration())
+    assert monitor.last_report.lost == []
+    assert checked.canvas == {"top_left": [220, 306], "bottom_right": [1220, 906]}
+
+
+def test_record_replaces_stale_signatures(desktop):
+    DriftMonitor(desktop).record(get_calibration())
+    stored = json.load(open(SIGNATURE_FILE))
+    stored["old_tool"] = stored["pencil"]
+    stored["pencil"]["patch"] = stored["line"]["patch"]
+    with open(SIGNATURE_FILE, "w") as f:
+        json.dump(stored, f)
+
+    monitor = DriftMonitor(desktop)
+    assert monitor.record(get_calibration()) == len(TOOLS) + 2
+    monitor.check(get_calibration())
+    assert "old_tool" not in monitor.signatures
+    assert monitor.last_report.moved == {} and monitor.last_report.lost == []
+
+
+def test_manual_calibration_records_signatures(desktop, monkeypatch):
+    monkeypatch.setattr("builtins.input", lambda prompt="": "")
+    monkeypatch.setattr(desktop, "position", lambda: tuple(TOOLS["pencil"]))
+    calibration_module.calibrate_tools()
+    signatures = json.load(open(SIGNATURE_FILE))
+    assert signatures["pencil"]["pos"] == TOOLS["pencil"]
+
+
+def test_replay_falls_back_when_paint_moved(desktop):
+    from ms_paint.program import compile_scene, replay_in_paint
+
+    calibration = get_calibration()
+    monitor = DriftMonitor(desktop)
+    monitor.record(calibration)
+    program = compile_scene([{"shape": "line", "start_x": 100, "start_y": 100, "end_x": 400, "end_y": 300}],
+                            calibration)
+    assert replay_in_paint(program, desktop, calibration=calibration, drift=monitor)
+
+    shift_toolbar(desktop, 30, 4)
+    clicks = sum(event[1] == "click" for event in desktop.events)
+    assert replay_in_paint(program, desktop, calibration=calibration, drift=monitor) is None
+    assert sum(event[1] == "click" for event in desktop.events) == clicks
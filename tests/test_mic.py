@@ -0,0 +1,75 @@
+import json
+import os
+
+import speech_recognition as sr
+
+from ms_paint.Mic import MicSession
+from ms_paint.recognizers import StubRecognizer
+
+# 8 kHz mono: a second of room noise, a short tone, two seconds of noise, a tone.
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "two_phrases.wav")
+
+
+def _session(tmp_path, responses, **kwargs):
+    """A MicSession listening to the fixture, counting its calibrations in .calibrations."""
+    session = MicSession(source=sr.AudioFile(FIXTURE), backend=StubRecognizer(responses),
+                         threshold_path=str(tmp_path / "mic_calibration.json"), **kwargs)
+    session.calibrations = 0
+    adjust = session.recognizer.adjust_for_ambient_noise
+
+    def counting_adjust(source, duration=1):
+        session.calibrations += 1
+        return adjust(source, duration=duration)
+
+    session.recognizer.adjust_for_ambient_noise = counting_adjust
+    return session
+
+
+def _stored_threshold(tmp_path):
+    with open(tmp_path / "mic_calibration.json") as f:
+        return json.load(f)["energy_threshold"]
+
+
+def test_transcribe_file_returns_each_phrase(tmp_path):
+    session = _session(tmp_path, ["draw a house", "add a sun"])
+    assert session.transcribe_file(FIXTURE) == ["draw a house", "add a sun"]
+
+
+def test_unintelligible_phrase_is_skipped(tmp_path):
+    session = _session(tmp_path, [None, "add a sun"])
+    assert session.transcribe_file(FIXTURE) == ["add a sun"]
+
+
+def test_threshold_is_calibrated_once_and_persisted(tmp_path):
+    session = _session(tmp_path, ["draw a house", "add a sun"])
+    assert session.listen_once() == "draw a house"
+    assert session.listen_once() == "add a sun"
+    assert session.calibrations == 1
+    assert _stored_threshold(tmp_path) > 0
+
+    later = _session(tmp_path, ["draw a tree"])
+    assert later.calibrated
+    assert later.recognizer.energy_threshold == _stored_threshold(tmp_path)
+    assert later.listen_once() == "draw a tree"
+    assert later.calibrations == 0
+
+
+def test_repeated_misses_recalibrate(tmp_path):
+    session = _session(tmp_path, [None, None, None, "draw a house"], max_misses=3)
+    for _ in range(3):
+        assert session.listen_once() is None
+    assert session.calibrations == 1
+    assert session.listen_once() == "draw a house"
+    assert session.calibrations == 2
+
+
+def test_drifted_threshold_is_stored(tmp_path):
+    session = _session(tmp_path, ["draw a house", "add a sun"])
+    session.listen_once()
+    stored = _stored_threshold(tmp_path)
+
+    session.recognizer.dynamic_energy_threshold = False
+    session.recognizer.energy_threshold = stored * 3
+    assert session.listen_once() == "add a sun"
+    assert _stored_threshold(tmp_path) == stored * 3
+    assert session.calibrations == 1
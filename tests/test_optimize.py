@@ -0,0 +1,29 @@
+from ms_paint.optimize import optimize_scene
+
+
+def _line(x0, y0, x1, y1):
+    return {"shape": "line", "start_x": x0, "start_y": y0, "end_x": x1, "end_y": y1}
+
+
+SQUARE = [_line(0, 0, 100, 0), _line(100, 0, 100, 100), _line(100, 100, 0, 100), _line(0, 100, 0, 0)]
+ROOF = [_line(0, 100, 50, 0), _line(50, 0, 100, 100)]
+
+
+def test_closed_chain_becomes_polygon():
+    shapes, report = optimize_scene(SQUARE)
+    assert [shape["shape"] for shape in shapes] == ["polygon"]
+    assert sorted(map(tuple, shapes[0]["points"])) == [(0, 0), (0, 100), (100, 0), (100, 100)]
+    assert (report.polygons, report.chained_lines) == (1, 4)
+    assert report.ui_ops_after < report.ui_ops_before
+
+
+def test_open_chain_stays_lines():
+    shapes, report = optimize_scene(ROOF)
+    assert shapes == ROOF
+    assert (report.polygons, report.chained_lines) == (0, 0)
+
+
+def test_without_polygon_tool_loops_stay_lines():
+    shapes, report = optimize_scene(SQUARE, polygons=False)
+    assert [shape["shape"] for shape in shapes] == ["line"] * 4
+    assert report.polygons == 0
@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from ms_paint.driver import FakeDriver
+from ms_paint.pacing import FIXED_DELAYS, MIN_DELAYS, Pacer
+
+CANVAS = (100, 200, 1100, 700)
+
+
+def test_click_waits_only_until_the_button_repaints():
+    driver = FakeDriver(lag=0.05)
+    pacer = Pacer(driver, path=None)
+    assert pacer.click_tool(300, 100)
+    assert driver.clock == pytest.approx(0.05, abs=pacer.poll)
+    assert pacer.fallbacks == 0
+    assert pacer.delays["tool"] < FIXED_DELAYS["tool"]
+
+
+def test_drag_confirms_stroke_and_speeds_up():
+    driver = FakeDriver(lag=0.05)
+    pacer = Pacer(driver, path=None)
+    for _ in range(5):
+        assert pacer.drag((300, 300), (500, 400), CANVAS)
+    assert pacer.fallbacks == 0
+    for step in ("stroke", "move_duration", "focus"):
+        assert MIN_DELAYS[step] <= pacer.delays[step] < FIXED_DELAYS[step]
+    assert driver.clock < 5 * sum(FIXED_DELAYS.values())
+
+
+def test_timeout_falls_back_to_fixed_delay():
+    driver = FakeDriver(lag=5.0)    # Paint never repaints within the timeout
+    pacer = Pacer(driver, timeout=0.1, path=None)
+    pacer.delays["tool"] = 0.01
+    assert not pacer.click_tool(300, 100)
+    assert pacer.fallbacks == 1
+    assert pacer.delays["tool"] == FIXED_DELAYS["tool"]
+    assert driver.clock == pytest.approx(FIXED_DELAYS["tool"])
+
+
+def test_missed_stroke_restores_unobservable_delays():
+    driver = FakeDriver(lag=0.05)
+    pacer = Pacer(driver, timeout=0.1, path=None)
+    pacer.drag((300, 300), (500, 400), CANVAS)
+    assert pacer.delays["move_duration"] < FIXED_DELAYS["move_duration"]
+
+    driver.lag = 5.0
+    assert not pacer.drag((300, 300), (500, 400), CANVAS)
+    assert pacer.delays["move_duration"] == FIXED_DELAYS["move_duration"]
+    assert pacer.delays["focus"] == FIXED_DELAYS["focus"]
+
+
+def test_learned_delays_persist(tmp_path):
+    path = str(tmp_path / "paint_pacing.json")
+    pacer = Pacer(FakeDriver(lag=0.05), path=path)
+    for _ in range(3):
+        pacer.drag((300, 300), (500, 400), CANVAS)
+    pacer.save()
+
+    reloaded = Pacer(FakeDriver(), path=path)
+    assert reloaded.delays == pytest.approx(pacer.delays)
+
+
+def test_stored_delays_are_floored_and_filtered(tmp_path):
+    path = tmp_path / "paint_pacing.json"
+    path.write_text(json.dumps({"move_duration": 0.0, "stroke": "fast", "unknown": 1.0}))
+    pacer = Pacer(FakeDriver(), path=str(path))
+    assert pacer.delays["move_duration"] == MIN_DELAYS["move_duration"]
+    assert pacer.delays["stroke"] == FIXED_DELAYS["stroke"]
+    assert "unknown" not in pacer.delays
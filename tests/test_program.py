@@ -0,0 +1,41 @@
+import numpy as np
+
+from ms_paint.calibration import Calibration
+from ms_paint.driver import FakeDriver
+from ms_paint.pacing import Pacer
+from ms_paint.program import ProgramCache
+
+CALIBRATION = Calibration.from_data({
+    "tools": {"rectangle": [600, 100], "line": [500, 100]},
+    "canvas": {"top_left": [100, 200], "bottom_right": [1100, 700]},
+})
+SHAPES = [
+    {"shape": "rectangle", "start_x": 100, "start_y": 100, "end_x": 300, "end_y": 200},
+    {"shape": "line", "start_x": 100, "start_y": 100, "end_x": 400, "end_y": 300},
+    {"shape": "rectangle", "start_x": 500, "start_y": 100, "end_x": 600, "end_y": 200},
+]
+
+
+def _pacer(**delays):
+    pacer = Pacer(driver=FakeDriver(), confirm=False, path=None)
+    pacer.delays.update(delays)
+    return pacer
+
+
+def test_compile_settings_are_part_of_the_scene(tmp_path):
+    cache = ProgramCache(str(tmp_path))
+    variants = [
+        {},
+        {"plan": False},
+        {"optimize": False},
+        {"simplify": None},
+        {"pacer": _pacer()},
+        {"pacer": _pacer(stroke=0.05)},
+    ]
+    programs = [cache.compile(SHAPES, CALIBRATION, **kwargs) for kwargs in variants]
+    assert len({program.scene_hash for program in programs}) == len(variants)
+    assert not np.array_equal(programs[1].events, programs[0].events)
+
+    again = cache.compile(SHAPES, CALIBRATION, pacer=_pacer(stroke=0.05))
+    assert again.scene_hash == programs[-1].scene_hash
+    assert np.array_equal(again.events, programs[-1].events)
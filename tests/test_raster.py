@@ -0,0 +1,25 @@
+import numpy as np
+
+from ms_paint.raster import RasterBackend, shapes_to_segments
+
+
+def _circle(x, y, r):
+    return {"shape": "circle", "start_x": x - r, "start_y": y - r, "end_x": x + r, "end_y": y + r}
+
+
+def test_small_circles_are_not_sized_by_the_largest():
+    small, large = _circle(50, 50, 5), _circle(500, 500, 400)
+    alone = len(shapes_to_segments([small]))
+    segments, owner = shapes_to_segments([small, large, small], owners=True)
+    assert np.count_nonzero(owner == 0) == np.count_nonzero(owner == 2) == alone
+    assert np.count_nonzero(owner == 1) > alone
+
+
+def test_batched_render_matches_one_at_a_time():
+    shapes = [_circle(50, 50, 5), _circle(300, 300, 200), _circle(120, 80, 30)]
+    together = RasterBackend(600, 600)
+    together.render(shapes)
+    apart = RasterBackend(600, 600)
+    for shape in shapes:
+        apart.render([shape])
+    assert np.array_equal(together.pixels, apart.pixels)
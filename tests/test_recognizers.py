@@ -0,0 +1,59 @@
+import os
+
+import pytest
+import speech_recognition as sr
+
+from ms_paint.Mic import MicSession
+from ms_paint.recognizers import FallbackRecognizer, SpeechBackend, StubRecognizer
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "two_phrases.wav")
+
+
+class _Unreachable(SpeechBackend):
+    name = "unreachable"
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def _recognize(self, recognizer, audio):
+        self.calls += 1
+        raise sr.RequestError("offline")
+
+
+def test_fallback_uses_first_reachable_backend():
+    down, first, second = _Unreachable(), StubRecognizer(["draw a house"]), StubRecognizer(["add a sun"])
+    fallback = FallbackRecognizer([down, first, second])
+    assert fallback.recognize(None, None) == "draw a house"
+    assert down.calls == 1
+    assert second.responses == ["add a sun"]      # never asked
+
+
+def test_fallback_does_not_retry_unintelligible_speech():
+    second = StubRecognizer(["add a sun"])
+    with pytest.raises(sr.UnknownValueError):
+        FallbackRecognizer([StubRecognizer([None]), second]).recognize(None, None)
+    assert second.responses == ["add a sun"]
+
+
+def test_fallback_raises_last_error_when_all_are_down():
+    with pytest.raises(sr.RequestError):
+        FallbackRecognizer([_Unreachable(), _Unreachable()]).recognize(None, None)
+
+
+def _session(backend):
+    return MicSession(source=sr.AudioFile(FIXTURE), backend=backend, threshold_path=None)
+
+
+def test_streaming_backend_reports_partials():
+    partials = []
+    session = _session(StubRecognizer(["draw a house"], partials=["draw", "draw a"]))
+    assert session.listen_once(on_partial=partials.append) == "draw a house"
+    assert partials == ["draw", "draw a"]
+
+
+def test_non_streaming_backend_ignores_on_partial():
+    partials = []
+    session = _session(FallbackRecognizer([_Unreachable(), StubRecognizer(["draw a house"])]))
+    assert session.listen_once(on_partial=partials.append) == "draw a house"
+    assert partials == []
@@ -0,0 +1,110 @@
+import json
+import time
+
+import pytest
+
+from models import gemini
+from models.fakes import FakeAPIError, FaultyClient
+from models.resilience import (
+    FAILURE_THRESHOLD, RESET_TIMEOUT, CircuitBreaker, CircuitOpenError, DeadlineExceeded, LatencyTracker,
+    ResilientCaller,
+)
+from ms_paint.mspaintdrawer_v2 import TEST_SHAPES
+
+TEXT = json.dumps(TEST_SHAPES)
+
+
+@pytest.fixture
+def use_caller(monkeypatch):
+    """Install a ResilientCaller as gemini.model_caller for one test."""
+    def install(**kwargs):
+        caller = ResilientCaller(**kwargs)
+        monkeypatch.setattr(gemini, "model_caller", caller)
+        return caller
+    return install
+
+
+def generate(client, timeout=5.0):
+    return gemini.generate("a house", use_cache=False, model_client=client, wire="json", timeout=timeout)
+
+
+def test_deadline_raises_deadline_exceeded(use_caller):
+    use_caller(hedge=False)
+    client = FaultyClient(TEXT, script=[0.5])
+    started = time.perf_counter()
+    with pytest.raises(DeadlineExceeded):
+        generate(client, timeout=0.1)
+    assert time.perf_counter() - started < 0.4
+
+
+def test_breaker_opens_after_threshold_and_allows_one_trial(use_caller):
+    now = [0.0]
+    breaker = CircuitBreaker(clock=lambda: now[0])
+    use_caller(attempts=1, hedge=False, breaker=breaker)
+    client = FaultyClient(TEXT, failure_rate=1.0)
+
+    for _ in range(FAILURE_THRESHOLD):
+        with pytest.raises(FakeAPIError):
+            generate(client)
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        generate(client)
+    assert client.calls == FAILURE_THRESHOLD
+
+    now[0] += RESET_TIMEOUT
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()      # only one trial while it is in flight
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    now[0] += RESET_TIMEOUT
+    client.failure_rate = 0.0
+    assert generate(client) == TEST_SHAPES
+    assert breaker.state == "closed"
+    assert client.calls == FAILURE_THRESHOLD + 1
+
+
+def _warm_tracker(seconds=0.02):
+    tracker = LatencyTracker()
+    for _ in range(tracker.min_samples):
+        tracker.add(seconds)
+    return tracker
+
+
+def test_hedge_fires_after_p95_and_fast_duplicate_wins(use_caller):
+    caller = use_caller(tracker=_warm_tracker())
+    client = FaultyClient(TEXT, script=[(0.5, TEXT), (0.0, TEXT)])
+    started = time.perf_counter()
+    assert generate(client) == TEST_SHAPES
+    assert time.perf_counter() - started < 0.3
+    stats = caller.stats()
+    assert (stats["hedges"], stats["hedge_wins"], client.calls) == (1, 1, 2)
+
+
+def test_invalid_hedge_result_does_not_win(use_caller):
+    caller = use_caller(tracker=_warm_tracker())
+    client = FaultyClient(TEXT, script=[(0.2, TEXT), (0.0, "no shapes here")])
+    assert generate(client) == TEST_SHAPES
+    stats = caller.stats()
+    assert (stats["hedges"], stats["hedge_wins"], stats["retries"]) == (1, 0, 0)
+
+
+def test_non_transient_error_is_not_retried(use_caller):
+    sleeps = []
+    caller = use_caller(hedge=False, sleep=sleeps.append)
+    client = FaultyClient(TEXT, script=[FakeAPIError(400, "bad request")])
+    with pytest.raises(FakeAPIError):
+        generate(client)
+    assert client.calls == 1
+    assert sleeps == [] and caller.stats()["retries"] == 0
+    assert caller.breaker.state == "closed"
+
+
+def test_transient_error_is_retried_with_backoff(use_caller):
+    sleeps = []
+    caller = use_caller(hedge=False, sleep=sleeps.append, seed=0)
+    client = FaultyClient(TEXT, script=[FakeAPIError(503)])
+    assert generate(client) == TEST_SHAPES
+    assert client.calls == 2
+    assert len(sleeps) == 1 and 0 <= sleeps[0] <= caller.backoff
@@ -0,0 +1,65 @@
+import itertools
+import threading
+
+from ms_paint.calibration import Calibration
+from ms_paint.draw_shapes import draw_shapes_streaming
+from ms_paint.raster import RasterBackend
+
+CALIBRATION = Calibration.from_data({
+    "tools": {"rectangle": [600, 100], "line": [500, 100]},
+    "canvas": {"top_left": [100, 200], "bottom_right": [1100, 700]},
+})
+RECT = {"shape": "rectangle", "start_x": 100, "start_y": 100, "end_x": 300, "end_y": 200}
+
+
+class _FailingPrepare(RasterBackend):
+    def prepare(self, canvas_bounds):
+        return False
+
+
+class _FailingFirstDrag(RasterBackend):
+    """Raises on the first drag, as a lost click would."""
+
+    def __init__(self):
+        super().__init__()
+        self.failures = 1
+
+    def drag(self, tool_name, start, end, canvas_bounds=None):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("drag failed")
+        return super().drag(tool_name, start, end, canvas_bounds)
+
+
+def _producer_threads():
+    return [t for t in threading.enumerate() if t.name == "shape-producer"]
+
+
+def test_streaming_draws_every_shape():
+    backend = RasterBackend()
+    assert draw_shapes_streaming(iter([RECT] * 3), backend=backend, calibration=CALIBRATION)
+
+
+def test_failed_prepare_releases_the_producer():
+    produced = []
+
+    def endless():
+        for i in itertools.count():
+            produced.append(i)
+            yield RECT
+
+    assert not draw_shapes_streaming(endless(), backend=_FailingPrepare(), queue_size=2,
+                                     calibration=CALIBRATION)
+    for thread in _producer_threads():
+        thread.join(timeout=2)
+    assert not _producer_threads()
+    assert len(produced) < 10
+
+
+def test_failed_shape_is_reported():
+    assert not draw_shapes_streaming(iter([RECT] * 2), backend=_FailingFirstDrag(), calibration=CALIBRATION)
+
+
+def test_verify_redraws_failed_shape():
+    assert draw_shapes_streaming(iter([RECT] * 2), backend=_FailingFirstDrag(), calibration=CALIBRATION,
+                                 verify=True)
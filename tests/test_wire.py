@@ -0,0 +1,51 @@
+from models.wire import WireParser, encode_shapes, parse_shapes
+from ms_paint.mspaintdrawer_v2 import TEST_SHAPES
+
+RECT = {"shape": "rectangle", "start_x": 1, "start_y": 2, "end_x": 3, "end_y": 4}
+TRIANGLE = {"shape": "triangle", "start_x": 5, "start_y": 6, "end_x": 7, "end_y": 8}
+
+
+def _stream(text, size):
+    parser = WireParser()
+    shapes = []
+    for i in range(0, len(text), size):
+        shapes += parser.feed(text[i:i + size])
+    return shapes + parser.finish()
+
+
+def test_round_trip():
+    assert parse_shapes(encode_shapes(TEST_SHAPES)) == TEST_SHAPES
+
+
+def test_tuple_ending_the_text_is_kept():
+    assert parse_shapes('[["r",1,2,3,4],["t",5,6,7,8]') == [RECT, TRIANGLE]
+
+
+def test_text_cut_after_last_tuple_keeps_every_shape():
+    text = encode_shapes(TEST_SHAPES).rstrip()
+    cut = text[:-1].rstrip()    # drop only the closing bracket of the list
+    assert parse_shapes(cut) == TEST_SHAPES
+    assert _stream(cut, 7) == TEST_SHAPES
+
+
+def test_stream_chunk_ending_on_a_tuple():
+    assert _stream('[["r",1,2,3,4],["t",5,6,7,8]', 15) == [RECT, TRIANGLE]
+
+
+def test_entry_cut_mid_shape_is_dropped():
+    assert parse_shapes('[["r",1,2,3,4],["t",5,6') == [RECT]
+
+
+def test_decoder_fast_path_matches_tolerant_parser():
+    texts = [
+        encode_shapes(TEST_SHAPES),
+        "```json\n" + encode_shapes(TEST_SHAPES) + "\n```",
+        '[{"shape": "rectangle", "start_x": 1, "start_y": 2, "end_x": 3, "end_y": 4}]',
+        '[["g",1,2,30,4,50,60],["p",[1,2],[3,4]],["r",1.5,2,3,4],["x",1,2,3,4]]',
+    ]
+    for text in texts:
+        assert parse_shapes(text) == _stream(text, len(text))
+
+
+def test_prose_in_brackets_before_the_array():
+    assert parse_shapes('Here [as asked] it is: [["r",1,2,3,4]]') == [RECT]